@@ -6,6 +6,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
 
+from src.logging.hdf5_logger import read_raw_voltage, read_gaps, read_processed_rows, read_time
+
 
 def list_sessions(filepath):
     """List all sessions in HDF5 file."""
@@ -20,7 +22,15 @@ def list_sessions(filepath):
             print(f"\n  {session_name}:")
             print(f"    Start: {session.attrs.get('start_time', 'Unknown')}")
             print(f"    End: {session.attrs.get('end_time', 'Unknown')}")
-            print(f"    Samples: {len(session['time'])}")
+            print(f"    Samples: {len(session['processed_data/force_N'])}")
+            factor = int(session.attrs.get('decimation_factor', 1))
+            if factor > 1:
+                print(f"    Decimation: {factor} ({session.attrs['sample_rate_Hz']:g} Hz raw, "
+                      f"{session.attrs['processed_sample_rate_Hz']:g} Hz processed)")
+
+            gaps = read_gaps(session)
+            if len(gaps):
+                print(f"    Gaps: {len(gaps)} ({gaps[:, 2].sum()} samples lost)")
 
             # Show analysis results if available
             if 'analysis' in session:
@@ -39,7 +49,7 @@ def plot_session(filepath, session_name='session_001'):
         session = f[session_name]
 
         # Load data
-        time = session['time'][:]
+        time = read_time(session, processed=True)
         force = session['processed_data/force_N'][:]
         displacement = session['processed_data/displacement_mm'][:]
         stress = session['processed_data/stress_MPa'][:]
@@ -142,10 +152,11 @@ def export_to_csv(filepath, session_name='session_001', output_path=None):
 
         session = f[session_name]
 
-        # Load data
-        time = session['time'][:]
-        ch0_voltage = session['raw_data/ch0_voltage'][:]
-        ch1_voltage = session['raw_data/ch1_voltage'][:]
+        # Load data (raw voltages at the processed rows if decimated)
+        time = read_time(session, processed=True)
+        rows = read_processed_rows(session)
+        ch0_voltage = read_raw_voltage(session, 0)[rows]
+        ch1_voltage = read_raw_voltage(session, 1)[rows]
         force = session['processed_data/force_N'][:]
         displacement = session['processed_data/displacement_mm'][:]
         stress = session['processed_data/stress_MPa'][:]
@@ -0,0 +1,840 @@
+"""Performance benchmarks for the acquisition and processing pipeline."""
+
+import os
+import sys
+import time
+from collections import deque
+import h5py
+import numpy as np
+from scipy import signal, stats
+
+from src.acquisition.backends import SimulatedBackend, deinterleave
+from src.acquisition.sample_block import SampleBlock
+from src.processing.calibration import CalibrationManager, calibration_from_config
+from src.processing.conversion import FusedConversion
+from src.processing.filters import Decimator, filter_from_config
+from src.processing.pipeline import FilterStage, Pipeline, PipelineData, standard_stages
+from src.processing.mechanics import MechanicsCalculator, RollingModulus, rolling_regression
+from src.utils.buffers import RollingBuffer
+from src.utils.session_store import SESSION_COLUMNS, SessionStore
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config', 'specimen.yaml')
+
+
+def time_call(func, repeat: int = 50) -> float:
+    """Return the best-of-N wall time of func() in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check(condition: bool, message: str):
+    """Fail the run (non-zero exit) when an equivalence check does not hold."""
+    if not condition:
+        raise AssertionError(message)
+
+
+def bench_deinterleave():
+    """Per-block cost of extracting a 50 ms poll window from the scan buffer."""
+    num_channels = 2
+    poll_period = 0.05
+
+    print("\nDe-interleaving one 50 ms block (2 channels, wrapping window)")
+    print(f"{'Aggregate rate':>16s} {'Values':>8s} {'Loop (us)':>12s} {'NumPy (us)':>12s} {'Speedup':>8s}")
+
+    for aggregate_rate in (1000, 10000, 50000):
+        count = int(aggregate_rate * poll_period)
+        total_count = count * 10
+        buffer = np.random.normal(size=total_count)
+        start_index = total_count - (count // 2 // num_channels) * num_channels  # Force wraparound
+
+        def loop():
+            ch0, ch1 = [], []
+            for i in range(count // num_channels):
+                index = (start_index + i * num_channels) % len(buffer)
+                ch0.append(buffer[index])
+                ch1.append(buffer[index + 1])
+            return np.array(ch0), np.array(ch1)
+
+        def vectorized():
+            return deinterleave(buffer, start_index, count, num_channels)
+
+        loop_ch0, loop_ch1 = loop()
+        assert np.array_equal(vectorized(), np.vstack((loop_ch0, loop_ch1)))
+
+        t_loop = time_call(loop)
+        t_vec = time_call(vectorized)
+        print(f"{aggregate_rate:>13d} Hz {count:>8d} {t_loop * 1e6:>12.1f} "
+              f"{t_vec * 1e6:>12.1f} {t_loop / t_vec:>7.1f}x")
+
+
+def bench_buffer_read():
+    """Per-poll cost of copying the whole scan buffer vs reading a view of the new region."""
+    num_channels = 2
+    count = 500  # 50 ms at 10 kHz aggregate
+
+    print("\nReading 500 new values per poll from the scan buffer")
+    print(f"{'Buffer size':>12s} {'Full copy (us)':>15s} {'View (us)':>10s}")
+
+    for total_count in (10000, 100000, 1000000):
+        buffer = np.random.normal(size=total_count)
+        start_index = total_count // 2
+
+        def full_copy():
+            # Equivalent of ul.scaled_win_buf_to_array()
+            return deinterleave(np.array(buffer), start_index, count, num_channels)
+
+        def view():
+            return deinterleave(buffer, start_index, count, num_channels)
+
+        t_copy = time_call(full_copy)
+        t_view = time_call(view)
+        print(f"{total_count:>12d} {t_copy * 1e6:>15.1f} {t_view * 1e6:>10.1f}")
+
+
+def bench_simulator():
+    """Generation throughput of the simulated backend (not paced to the wall clock)."""
+    print("\nSimulated backend generation throughput (2 channels)")
+    print(f"{'Block size':>11s} {'Per block (us)':>15s} {'Samples/s per channel':>22s}")
+
+    for block_size in (100, 1000, 5000, 20000):
+        backend = SimulatedBackend(sample_rate=100000, seed=1, block_size=block_size, realtime=False)
+        backend.start()
+
+        t_block = time_call(backend.read, repeat=200)
+        print(f"{block_size:>11d} {t_block * 1e6:>15.1f} {block_size / t_block:>22,.0f}")
+
+
+def index_signal(num_channels: int):
+    """Signal whose value encodes sample index and channel, for checking continuity."""
+    def signal(start_sample: int, samples: int) -> np.ndarray:
+        index = np.arange(start_sample, start_sample + samples, dtype=np.float64)
+        return index + np.arange(num_channels)[:, None] * 0.25
+    return signal
+
+
+def bench_emulator():
+    """MCC read path throughput and wraparound correctness against the emulated driver."""
+    from src.acquisition.mcc_emulator import EmulatedMCCBackend, VirtualClock
+
+    num_channels = 2
+    poll_period = 0.05
+    duration = 60.0  # Virtual seconds per rate
+
+    print(f"\nMCC read path on emulated driver ({duration:.0f} s virtual, 50 ms polls, partial scans)")
+    print(f"{'Rate/channel':>13s} {'Per poll (us)':>14s} {'Realtime factor':>16s} {'Continuous':>11s}")
+
+    for sample_rate in (1000, 10000, 50000, 100000):
+        clock = VirtualClock()
+        backend = EmulatedMCCBackend(
+            high_chan=num_channels - 1, sample_rate=sample_rate,
+            buffer_size=int(sample_rate * poll_period * 3) + 7,  # Odd size: wrap mid-block
+            clock=clock, signal=index_signal(num_channels), report_partial_scans=True
+        )
+        backend.start()
+
+        expected = 0
+        continuous = True
+        busy = 0.0
+        polls = int(duration / poll_period)
+        for _ in range(polls):
+            clock.advance(poll_period)
+            start = time.perf_counter()
+            result = backend.read()
+            busy += time.perf_counter() - start
+
+            data, start_sample, overrun = result
+            continuous &= (not overrun and start_sample == expected and
+                           data[0, 0] == expected and data[0, -1] == expected + data.shape[1] - 1 and
+                           np.array_equal(data[1], data[0] + 0.25))
+            expected += data.shape[1]
+        backend.close()
+
+        print(f"{sample_rate:>10d} Hz {busy / polls * 1e6:>14.1f} {duration / busy:>15,.0f}x "
+              f"{'yes' if continuous else 'NO':>11s}")
+        check(continuous, f"Emulated read path lost or reordered samples at {sample_rate} Hz")
+
+
+def bench_replay():
+    """End-to-end throughput: replay a recorded session through calibration, mechanics and logging."""
+    import tempfile
+    import yaml
+    from src.acquisition.mcc_daq import MCCDataAcquisition
+    from src.processing.calibration import CalibrationManager, calibration_from_config
+    from src.processing.mechanics import MechanicsCalculator
+    from src.logging.hdf5_logger import HDF5Logger
+
+    with open(CONFIG_PATH, 'r') as f:
+        config = yaml.safe_load(f)
+    sample_rate = 10000
+    duration = 60.0
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        # Record a session from the simulator
+        source = SimulatedBackend(sample_rate=sample_rate, seed=1, block_size=sample_rate, realtime=False)
+        source.start()
+        recorder = HDF5Logger(base_dir)
+        recorder.start_session({'sample_rate_Hz': sample_rate})
+        calibration = CalibrationManager(config)
+        mechanics = MechanicsCalculator(
+            cross_section_area=config['specimen']['cross_section_area'],
+            gauge_length=config['specimen']['gauge_length']
+        )
+        for _ in range(int(duration)):
+            data, start_sample, _ = source.read()
+            voltage = SampleBlock(data, start_sample / sample_rate, sample_rate, start_sample)
+            engineering = calibration.convert_block(voltage)
+            recorder.append_block(voltage, engineering, mechanics.calculate_block(engineering))
+        recorder.end_session()
+        recorder.close()
+
+        print(f"\nReplay of a {duration:.0f} s, {sample_rate} Hz session through the live pipeline")
+        print(f"{'Block size':>11s} {'Wall (s)':>9s} {'Samples/s':>12s} {'Realtime factor':>16s} {'Identical':>10s}")
+
+        for block_size in (1000, 10000, 65536):
+            # Separate directory: file names only have one-second resolution
+            logger = HDF5Logger(os.path.join(base_dir, f"replay_{block_size}"))
+            logger.start_session({'sample_rate_Hz': sample_rate})
+
+            def process(block):
+                engineering = calibration.convert_block(block)
+                logger.append_block(block, engineering, mechanics.calculate_block(engineering))
+
+            daq = MCCDataAcquisition(
+                sample_rate=sample_rate, backend='replay',
+                backend_options={'file_path': recorder.file_path, 'speed': None, 'block_size': block_size}
+            )
+            daq.set_data_callback(process)
+            start = time.perf_counter()
+            daq.start()
+            while daq.is_running():
+                time.sleep(0.001)
+            daq.close()
+            logger.end_session()
+            logger.close()
+            wall = time.perf_counter() - start
+
+            with h5py.File(recorder.file_path, 'r') as original, h5py.File(logger.file_path, 'r') as replayed:
+                # Time is rebuilt from each block's t0, so it may differ in the last bit
+                identical = all(
+                    np.allclose(original['session_001'][name][:], replayed['session_001'][name][:],
+                                rtol=0, atol=1e-12 if name == 'time' else 0)
+                    for name in HDF5Logger.DATASETS
+                )
+            os.remove(logger.file_path)
+
+            samples = int(duration * sample_rate)
+            print(f"{block_size:>11d} {wall:>9.2f} {samples / wall:>12,.0f} {duration / wall:>15,.0f}x "
+                  f"{'yes' if identical else 'NO':>10s}")
+            check(identical, f"Replay in {block_size}-sample blocks does not reproduce the recorded session")
+
+        # Full-speed replay through a queue holding less than one replay block
+        from src.acquisition.process_daq import ProcessDataAcquisition
+        options = {'file_path': recorder.file_path, 'speed': None}
+        samples = int(duration * sample_rate)
+        for label, daq in (
+            ('Queued', MCCDataAcquisition(sample_rate=sample_rate, backend='replay', backend_options=options,
+                                          queue_policy='block', queue_seconds=0.5)),
+            ('Out of process', ProcessDataAcquisition(sample_rate=sample_rate, backend='replay',
+                                                      backend_options=options, queue_policy='block',
+                                                      queue_seconds=0.5)),
+        ):
+            delivered = []
+            daq.set_data_callback(lambda block: delivered.append(block.num_samples))
+            start = time.perf_counter()
+            daq.start()
+            while daq.is_running() and time.perf_counter() - start < 60.0:
+                time.sleep(0.01)
+            daq.close()
+            print(f"{label} replay with a {int(0.5 * sample_rate)}-sample queue: "
+                  f"{sum(delivered)} of {samples} samples delivered")
+            check(daq.error is None and daq.finished and sum(delivered) == samples,
+                  f"{label} replay longer than the queue lost data (error: {daq.error})")
+
+
+def bench_raw_counts():
+    """Ring transport cost and raw data storage size of float64 volts vs uint16 counts."""
+    import tempfile
+    from src.logging.hdf5_logger import HDF5Logger
+    from src.utils.buffers import BlockRing
+
+    sample_rate = 50000
+    block_size = 2500  # 50 ms polls
+    blocks = 400       # 20 s of data
+
+    print(f"\nRaw data path at {sample_rate} Hz, 2 channels, {blocks * block_size / sample_rate:.0f} s")
+    print(f"{'Format':>8s} {'Ring push+drain (us/block)':>27s} {'Raw bytes/sample':>17s} {'Raw on disk (MB)':>17s}")
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        for raw_counts in (False, True):
+            backend = SimulatedBackend(
+                sample_rate=sample_rate, seed=1, block_size=block_size,
+                realtime=False, raw_counts=raw_counts
+            )
+            backend.start()
+            data, _, _ = backend.read()
+            block = SampleBlock(data, 0.0, sample_rate, scale=backend.scale, offset=backend.offset)
+            ring = BlockRing(2, sample_rate, dtype=backend.dtype)
+
+            def transport():
+                ring.push(block)
+                ring.drain()
+
+            t_ring = time_call(transport, repeat=200)
+
+            logger = HDF5Logger(os.path.join(base_dir, backend.dtype.name))
+            logger.start_session({'sample_rate_Hz': sample_rate},
+                                 raw_scale=(backend.scale, backend.offset) if raw_counts else None)
+            engineering = block.with_data(np.zeros((2, block_size)))
+            backend.start()
+            for _ in range(blocks):
+                data, start_sample, _ = backend.read()
+                raw = SampleBlock(data, start_sample / sample_rate, sample_rate, start_sample,
+                                  scale=backend.scale, offset=backend.offset)
+                logger.append_block(raw, engineering, engineering)
+            logger.end_session()
+            raw_bytes = sum(
+                logger.session_group[name].id.get_storage_size() for name in logger.datasets[1:3]
+            )
+            logger.close()
+
+            print(f"{backend.dtype.name:>8s} {t_ring * 1e6:>27.1f} {backend.dtype.itemsize * 2:>17d} "
+                  f"{raw_bytes / 1e6:>17.1f}")
+
+
+def bench_stalls():
+    """Overruns under injected consumer stalls: fixed 5000-sample buffer vs auto sizing."""
+    from src.acquisition.mcc_daq import MCCDataAcquisition
+
+    sample_rate = 20000
+    stall = 0.3          # Consumer stall in seconds
+    stall_every = 1.0    # Seconds between stalls
+    duration = 4.0
+
+    print(f"\nEmulated MCC at {sample_rate} Hz with {stall * 1000:.0f} ms consumer stalls every "
+          f"{stall_every:.0f} s (callback on the acquisition thread)")
+    print(f"{'Buffer':>14s} {'Seconds':>8s} {'Gaps':>5s} {'Lost samples':>13s} "
+          f"{'Fill max':>9s} {'High events':>12s} {'Low events':>11s}")
+
+    for buffer_size in (5000, 'auto'):
+        daq = MCCDataAcquisition(
+            sample_rate=sample_rate, buffer_size=buffer_size, stall_budget=2 * stall,
+            backend='emulated', backend_options={'seed': 1}
+        )
+        next_stall = [time.perf_counter() + stall_every]
+
+        def consumer(block):
+            # Stall the acquisition loop periodically (e.g. a slow disk write)
+            if time.perf_counter() >= next_stall[0]:
+                time.sleep(stall)
+                next_stall[0] = time.perf_counter() + stall_every
+
+        daq.set_data_callback(consumer)
+        daq.start()
+        time.sleep(duration)
+        daq.close()
+
+        gaps = daq.get_gap_statistics()
+        poll = daq.get_poll_statistics()
+        label = f"{daq.buffer_size}" + (" (auto)" if buffer_size == 'auto' else "")
+        print(f"{label:>14s} {poll['buffer_seconds']:>8.2f} {gaps['gaps']:>5d} "
+              f"{gaps['lost_samples_per_channel'][0]:>13d} {poll['fill_max']:>9.0%} "
+              f"{poll['high_watermark_events']:>12d} {poll['low_watermark_events']:>11d}")
+
+
+def bench_stations():
+    """Several simulated stations at 10 kHz each, processed on a shared thread pool."""
+    import tempfile
+    import yaml
+    from src.acquisition.stations import StationManager
+
+    with open(CONFIG_PATH, 'r') as f:
+        config = yaml.safe_load(f)
+    sample_rate = 10000
+    duration = 10.0
+
+    print(f"\nStations at {sample_rate} Hz each, {duration:.0f} s, calibration + mechanics + HDF5 logging")
+    print(f"{'Stations':>9s} {'Workers':>8s} {'Received':>9s} {'Dropped':>8s} {'Lost':>5s} "
+          f"{'Proc/block (us)':>16s} {'Max lag (ms)':>13s} {'CPU':>5s} {'Origin spread (ms)':>19s}")
+
+    for num_stations in (1, 4, 8):
+        config['acquisition']['sample_rate'] = sample_rate
+        config['acquisition']['backend'] = 'simulated'
+        config['stations'] = [
+            {'name': f"frame_{i}", 'acquisition': {'board_num': i, 'simulated': {'seed': i}}}
+            for i in range(num_stations)
+        ]
+
+        with tempfile.TemporaryDirectory() as base_dir:
+            manager = StationManager.from_config(config, base_dir=base_dir)
+            cpu_start = time.process_time()
+            manager.start()
+            time.sleep(duration)
+            manager.close()
+            cpu = (time.process_time() - cpu_start) / duration
+
+            stats = list(manager.get_statistics().values())
+            received = sum(s['samples_processed'] for s in stats) / (num_stations * sample_rate * duration)
+            dropped = sum(s['dropped_blocks'] for s in stats)
+            lost = sum(s['lost_samples_per_channel'][0] for s in stats)
+            per_block = sum(s['processing_time_s'] for s in stats) / max(sum(s['blocks_processed'] for s in stats), 1)
+            max_lag = max(s['max_lag_s'] for s in stats)
+            offsets = [s['time_offset_s'] for s in stats]
+
+        print(f"{num_stations:>9d} {manager.workers:>8d} {received:>9.1%} {dropped:>8d} {lost:>5d} "
+              f"{per_block * 1e6:>16.0f} {max_lag * 1e3:>13.1f} {cpu:>5.0%} "
+              f"{(max(offsets) - min(offsets)) * 1e3:>19.2f}")
+
+
+def bench_rolling():
+    """Display buffer: one 50 ms block extend plus one full read per GUI tick."""
+    display_time = 120
+    block_time = 0.05
+
+    print("\nRolling display buffer (120 s, 3 channels), per 50 ms GUI tick")
+    print(f"{'Sample rate':>12s} {'Deque (ms)':>11s} {'Ring (ms)':>10s} {'Speedup':>8s} "
+          f"{'Deque B/sample':>15s} {'Ring B/sample':>14s}")
+
+    for sample_rate in (1000, 10000, 100000):
+        maxlen = sample_rate * display_time
+        count = int(sample_rate * block_time)
+        block = np.random.normal(size=(3, count))
+        history = np.random.normal(size=(3, maxlen + count // 2))
+
+        # Reference: the previous deque-of-floats implementation
+        deques = [deque(row.tolist(), maxlen=maxlen) for row in history]
+        ring = RollingBuffer(maxlen)
+        ring.extend(*history)
+
+        def deque_tick():
+            for t, c0, c1 in zip(*block):
+                deques[0].append(t)
+                deques[1].append(c0)
+                deques[2].append(c1)
+            return tuple(np.array(d) for d in deques)
+
+        def ring_tick():
+            ring.extend(*block)
+            return ring.get_arrays()
+
+        for expected, actual in zip(deque_tick(), ring_tick()):
+            assert np.array_equal(expected, actual)
+
+        repeat = 20 if sample_rate < 100000 else 3
+        t_deque = time_call(deque_tick, repeat)
+        t_ring = time_call(ring_tick, repeat)
+
+        # deque slot (8 B) plus a boxed float (24 B) per value
+        deque_bytes = 3 * (8 + sys.getsizeof(1.0))
+        ring_bytes = ring.nbytes / maxlen
+        print(f"{sample_rate:>9d} Hz {t_deque * 1e3:>11.2f} {t_ring * 1e3:>10.2f} "
+              f"{t_deque / t_ring:>7.1f}x {deque_bytes:>15.0f} {ring_bytes:>14.0f}")
+
+
+def bench_session():
+    """Session storage: append each 50 ms block, read the session on each GUI tick."""
+    sample_rate = 5000
+    block = np.random.normal(size=int(sample_rate * 0.05))
+    names = [name for name, _ in SESSION_COLUMNS]
+
+    print("\nSession storage at 5 kHz, 8 columns: one block append + one read per tick")
+    print(f"{'Session':>8s} {'Lists (ms)':>11s} {'Store (ms)':>11s} {'Speedup':>8s} "
+          f"{'Lists (MB)':>11s} {'Store (MB)':>11s}")
+
+    for minutes in (1, 5, 30):
+        count = sample_rate * 60 * minutes
+        history = np.random.normal(size=count)
+
+        lists = {name: history.tolist() for name in names}
+        store = SessionStore()
+        store.extend(**{name: history for name in names})
+
+        def lists_tick():
+            for values in lists.values():
+                values.extend(block)
+            return [np.array(values) for values in lists.values()]
+
+        def store_tick():
+            store.extend(**{name: block for name in names})
+            return store.columns()
+
+        for expected, actual in zip(lists_tick(), store_tick()):
+            assert np.array_equal(expected, actual)
+
+        repeat = 5 if minutes < 30 else 2
+        t_lists = time_call(lists_tick, repeat)
+        t_store = time_call(store_tick, repeat)
+
+        # List slot (8 B) plus a boxed float (24 B) per value
+        list_mb = len(names) * len(lists['time']) * (8 + sys.getsizeof(1.0)) / 1e6
+        store_mb = store.memory_usage()['allocated_bytes'] / 1e6
+        print(f"{minutes:>5d} min {t_lists * 1e3:>11.2f} {t_store * 1e3:>11.3f} "
+              f"{t_lists / t_store:>7.0f}x {list_mb:>11.0f} {store_mb:>11.0f}")
+
+
+def youngs_reference(stress: np.ndarray, strain: np.ndarray, window: int, breaks) -> np.ndarray:
+    """Rolling Young's modulus as originally computed: one linregress per window."""
+    youngs = np.full(len(stress), np.nan)
+    for i in range(window, len(stress)):
+        # Windows with samples on both sides of a gap have no modulus
+        if any(i - window < b < i for b in breaks):
+            continue
+        slope, _, _, _, _ = stats.linregress(strain[i - window:i], stress[i - window:i])
+        youngs[i] = slope / 1000.0
+    return youngs
+
+
+def bench_modulus():
+    """Rolling Young's modulus per 50 ms block: full-session recompute vs streaming."""
+    sample_rate = 1000
+    window = 100
+    block_size = int(sample_rate * 0.05)
+    mechanics = MechanicsCalculator(cross_section_area=50.0, gauge_length=100.0)
+    rng = np.random.default_rng(0)
+
+    # Equivalence with the linregress loop over a session with random block sizes and gaps
+    count = 5000
+    strain = np.cumsum(rng.random(count)) * 1e-5
+    stress = strain * 200e3 + rng.normal(size=count)
+    modulus = RollingModulus(window)
+    breaks, streamed, position = [], [], 0
+    while position < count:
+        n = int(rng.integers(1, 3 * block_size))
+        gap = position > 0 and rng.random() < 0.05
+        if gap:
+            breaks.append(position)
+        streamed.append(modulus.update(stress[position:position + n], strain[position:position + n], gap))
+        position += n
+    streamed = np.concatenate(streamed)
+    expected = youngs_reference(stress, strain, window, breaks)
+    batch = mechanics.calculate_youngs_modulus(stress, strain, window, breaks)
+    check(len(breaks) > 0, "Equivalence session has no gaps")
+    for name, result in (('RollingModulus', streamed), ('calculate_youngs_modulus()', batch)):
+        check(np.array_equal(np.isnan(result), np.isnan(expected)),
+              f"{name} gives a modulus for different windows than the linregress loop")
+        check(np.allclose(result, expected, rtol=1e-6, equal_nan=True),
+              f"{name} differs from the linregress loop")
+
+    print(f"\nRolling Young's modulus (window {window}), per {block_size}-sample block")
+    print(f"Streaming and batch match the linregress loop over {count} samples with {len(breaks)} gaps")
+    print(f"{'Session':>10s} {'Recompute (ms)':>15s} {'Streaming (ms)':>15s} {'Speedup':>8s}")
+
+    block_strain = strain[:block_size]
+    block_stress = stress[:block_size]
+    for session_length in (1000, 5000, 20000):
+        history_strain = np.resize(strain, session_length)
+        history_stress = np.resize(stress, session_length)
+
+        def recompute():
+            combined_stress = np.concatenate([history_stress, block_stress])
+            combined_strain = np.concatenate([history_strain, block_strain])
+            return mechanics.calculate_youngs_modulus(combined_stress, combined_strain, window)[-block_size:]
+
+        streaming = RollingModulus(window)
+        streaming.update(history_stress, history_strain)
+
+        def stream():
+            return streaming.update(block_stress, block_strain)
+
+        t_recompute = time_call(recompute, 1)
+        t_stream = time_call(stream, 20)
+        print(f"{session_length:>10d} {t_recompute * 1e3:>15.1f} {t_stream * 1e3:>15.3f} "
+              f"{t_recompute / t_stream:>7.0f}x")
+
+
+def bench_regression():
+    """Batch rolling regression: linregress loop vs prefix-sum vectorization."""
+    rng = np.random.default_rng(0)
+    count = 20000
+    strain = np.cumsum(rng.random(count)) * 1e-5
+    stress = strain * 200e3 + rng.normal(size=count)
+
+    print(f"\nRolling regression over {count} samples (slope, intercept, R²)")
+    print(f"{'Window':>8s} {'Loop (s)':>10s} {'Vectorized (ms)':>16s} {'Speedup':>9s} {'Max rel. error':>15s}")
+
+    for window in (50, 200, 500, 1000, 2000):
+        def loop():
+            results = np.empty((count - window + 1, 3))
+            for i in range(len(results)):
+                fit = stats.linregress(strain[i:i + window], stress[i:i + window])
+                results[i] = fit.slope, fit.intercept, fit.rvalue ** 2
+            return results
+
+        def vectorized():
+            return rolling_regression(strain, stress, window)
+
+        start = time.perf_counter()
+        expected = loop()
+        t_loop = time.perf_counter() - start
+        t_vec = time_call(vectorized, 5)
+
+        slope, intercept, r_squared = vectorized()
+        # Intercepts near zero are compared on the scale of the fitted stress
+        error = max(
+            np.max(np.abs(slope - expected[:, 0]) / np.abs(expected[:, 0])),
+            np.max(np.abs(intercept - expected[:, 1]) / np.max(np.abs(stress))),
+            np.max(np.abs(r_squared - expected[:, 2]))
+        )
+        print(f"{window:>8d} {t_loop:>10.2f} {t_vec * 1e3:>16.2f} {t_loop / t_vec:>8.0f}x {error:>15.1e}")
+
+    count = 1000000
+    strain = np.cumsum(rng.random(count)) * 1e-5
+    stress = strain * 200e3 + rng.normal(size=count)
+    print(f"\n{count} samples, window 100:")
+    for label, kwargs in (('float64', {}),
+                          ('float32', {'dtype': np.float32}),
+                          ('stride 10', {'stride': 10})):
+        elapsed = time_call(lambda: rolling_regression(strain, stress, 100, **kwargs), 3)
+        print(f"  {label:<10s} {elapsed * 1e3:8.1f} ms")
+
+
+def bench_fused():
+    """Raw block to force, displacement, stress and strain: two stages vs fused."""
+    config = {'calibration': {'load_cell': {'slope': 1000.0, 'offset': 2.0},
+                              'displacement': {'slope': 10.0, 'offset': -0.5}}}
+    calibration = CalibrationManager(config)
+    mechanics = MechanicsCalculator(cross_section_area=50.0, gauge_length=100.0)
+    fused = FusedConversion(calibration, mechanics)
+    rng = np.random.default_rng(0)
+
+    print("\nConverting one block to force, displacement, stress and strain")
+    print(f"{'Block':>8s} {'Data':>8s} {'Two-stage (us)':>15s} {'Fused (us)':>11s} {'Speedup':>8s} "
+          f"{'Output':>8s} {'Equal':>6s}")
+
+    for num_samples in (500, 5000, 50000):
+        volts = rng.uniform(-10, 10, size=(2, num_samples))
+        blocks = {
+            'float64': SampleBlock(volts, 0.0, 1000.0),
+            'float32': SampleBlock(volts.astype(np.float32), 0.0, 1000.0),
+            'counts': SampleBlock(rng.integers(0, 65536, size=(2, num_samples), dtype=np.uint16),
+                                  0.0, 1000.0, scale=20.0 / 65536, offset=-10.0),
+        }
+        for label, block in blocks.items():
+            out = np.empty((4, num_samples), fused.output_dtype(block))
+
+            def two_stage():
+                engineering = calibration.convert_block(block)
+                return engineering, mechanics.calculate_block(engineering)
+
+            def one_pass():
+                return fused.convert(block, out=out)
+
+            expected = np.vstack([result.data for result in two_stage()])
+            actual = np.vstack([result.data for result in one_pass()])
+            # Relative to each row's range, as offsets put some values near zero
+            rtol = 1e-6 if actual.dtype == np.float32 else 1e-12
+            scale = np.abs(expected).max(axis=1, keepdims=True)
+            equal = bool(np.all(np.abs(actual - expected) <= rtol * scale))
+
+            t_two = time_call(two_stage, 20)
+            t_fused = time_call(one_pass, 20)
+            print(f"{num_samples:>8d} {label:>8s} {t_two * 1e6:>15.1f} {t_fused * 1e6:>11.1f} "
+                  f"{t_two / t_fused:>7.1f}x {str(actual.dtype):>8s} {'yes' if equal else 'NO':>6s}")
+            check(equal, f"Fused conversion of {label} blocks differs from the two stages")
+
+    # Both sensors wired to one channel
+    shared = CalibrationManager(dict(config, acquisition={'channels': {'load': 1, 'displacement': 1}}))
+    block = SampleBlock(rng.uniform(-10, 10, size=(2, 500)), 0.0, 1000.0)
+    engineering = shared.convert_block(block)
+    expected = np.vstack([engineering.data, mechanics.calculate_block(engineering).data])
+    actual = np.vstack([result.data for result in FusedConversion(shared, mechanics).convert(block)])
+    check(np.allclose(actual, expected, rtol=1e-12, atol=0),
+          "Fused conversion differs from the two stages with both sensors on one channel")
+
+
+def bench_calibration():
+    """Calibration throughput per type: linear, polynomial and lookup table."""
+    calibrations = {
+        'linear': calibration_from_config({'slope': 1000.0, 'offset': 2.0}),
+        'poly 3': calibration_from_config({'type': 'polynomial',
+                                           'coefficients': [2.0, 1000.0, 1.5, -0.02]}),
+        'poly 5': calibration_from_config({'type': 'polynomial',
+                                           'coefficients': [2.0, 1000.0, 1.5, -0.02, 1e-3, -1e-5]}),
+        'table 11': calibration_from_config({'type': 'table', 'points': [
+            [v, 1000.0 * v + 0.5 * v * abs(v)] for v in np.linspace(-10, 10, 11)]}),
+        'table 101': calibration_from_config({'type': 'table', 'points': [
+            [v, 1000.0 * v + 0.5 * v * abs(v)] for v in np.linspace(-10, 10, 101)]}),
+    }
+    num_samples = 50000  # One second at 50 kHz
+    scale, offset = 20.0 / 65536, -10.0
+    rng = np.random.default_rng(0)
+    volts = rng.uniform(-10, 10, num_samples)
+    counts = rng.integers(0, 65536, num_samples, dtype=np.uint16)
+    out = np.empty(num_samples)
+
+    print(f"\nConverting {num_samples} samples (one second at 50 kHz)")
+    print(f"{'Type':>10s} {'Volts (us)':>11s} {'MS/s':>7s} {'vs linear':>10s} "
+          f"{'Counts (us)':>12s} {'Inverse (us)':>13s} {'Round trip err':>15s}")
+
+    t_linear = None
+    for label, calibration in calibrations.items():
+        counts_calibration = calibration.for_counts(scale, offset)
+        t_volts = time_call(lambda: calibration.convert(volts, out=out), 20)
+        t_counts = time_call(lambda: counts_calibration.convert(counts, out=out), 20)
+        values = calibration.convert(volts)
+        t_inverse = time_call(lambda: calibration.inverse(values), 5)
+        error = np.abs(calibration.inverse(values) - volts).max()
+        t_linear = t_linear or t_volts
+        print(f"{label:>10s} {t_volts * 1e6:>11.1f} {num_samples / t_volts / 1e6:>7.1f} "
+              f"{t_volts / t_linear:>9.1f}x {t_counts * 1e6:>12.1f} {t_inverse * 1e6:>13.1f} "
+              f"{error:>15.1e}")
+
+
+def bench_filters():
+    """Streaming filters at 100 kHz: block-by-block cost and equality with offline filtering."""
+    sample_rate = 100000
+    block_size = 5000  # 50 ms
+    rng = np.random.default_rng(0)
+    x = np.cumsum(rng.normal(size=sample_rate)) * 1e-3 + rng.normal(scale=0.01, size=sample_rate)
+    sliding = np.lib.stride_tricks.sliding_window_view
+
+    def offline(config):
+        if config['type'] == 'butterworth':
+            return signal.sosfilt(filter_from_config(config, sample_rate).sos, x)
+        length = config['length']
+        if config['type'] == 'moving_average':
+            return signal.lfilter(np.ones(length) / length, 1, x)
+        return np.median(sliding(np.r_[np.zeros(length - 1), x], length), axis=1)
+
+    configs = {
+        'butter 2': {'type': 'butterworth', 'order': 2, 'cutoff': 500.0},
+        'butter 4': {'type': 'butterworth', 'order': 4, 'cutoff': 500.0},
+        'butter 8': {'type': 'butterworth', 'order': 8, 'cutoff': 500.0},
+        'mean 16': {'type': 'moving_average', 'length': 16},
+        'mean 256': {'type': 'moving_average', 'length': 256},
+        'median 5': {'type': 'median', 'length': 5},
+        'median 31': {'type': 'median', 'length': 31},
+    }
+
+    print(f"\nFiltering 1 s of one channel at {sample_rate // 1000} kHz in {block_size}-sample blocks")
+    print(f"{'Filter':>10s} {'Per block (us)':>15s} {'Per second (ms)':>16s} {'Core load':>10s} "
+          f"{'Max error':>10s}")
+    for label, config in configs.items():
+        def stream():
+            streaming = filter_from_config(config, sample_rate)
+            return np.concatenate([streaming.process(x[i:i + block_size])
+                                   for i in range(0, len(x), block_size)])
+
+        error = np.abs(stream() - offline(config)).max()
+        check(error <= 1e-12, f"Streaming {label} filter differs from offline filtering by {error:.1e}")
+        elapsed = time_call(stream, 5)
+        print(f"{label:>10s} {elapsed / (len(x) // block_size) * 1e6:>15.1f} {elapsed * 1e3:>16.1f} "
+              f"{elapsed:>9.1%} {error:>10.1e}")
+
+    # Whole stage, both channels
+    stage = FilterStage({0: [configs['butter 4']], 1: [configs['median 5']]})
+    volts = np.vstack([x, x[::-1]])
+    blocks = [SampleBlock(volts[:, i:i + block_size], i / sample_rate, sample_rate)
+              for i in range(0, sample_rate, block_size)]
+
+    def run_stage():
+        stage.reset()
+        for block in blocks:
+            stage.process(PipelineData(block))
+
+    elapsed = time_call(run_stage, 5)
+    print(f"\nFilter stage (butter 4 + median 5), 2 channels: {elapsed * 1e3:.1f} ms per second "
+          f"of data ({elapsed:.1%} of one core)")
+
+
+def bench_decimation():
+    """Polyphase decimation of a 100 kHz stream: cost per block and equality with offline."""
+    sample_rate = 100000
+    block_size = 5000  # 50 ms
+    rng = np.random.default_rng(0)
+    volts = np.cumsum(rng.normal(size=(2, sample_rate)), axis=1) * 1e-3
+    volts += rng.normal(scale=0.01, size=volts.shape)
+
+    print(f"\nDecimating 1 s of 2 channels at {sample_rate // 1000} kHz in {block_size}-sample blocks")
+    print(f"{'Factor':>7s} {'Taps':>5s} {'Output rate':>12s} {'Per block (us)':>15s} "
+          f"{'Per second (ms)':>16s} {'Core load':>10s} {'Max error':>10s}")
+    for factor, taps_per_phase in ((2, 16), (10, 16), (50, 16), (10, 32)):
+        decimator = Decimator(factor, taps_per_phase)
+        offsets = rng.integers(1, 2 * block_size, size=2 * sample_rate // block_size)
+        starts = [i for i in np.cumsum(offsets) if i < sample_rate]
+        edges = list(zip([0] + starts, starts + [sample_rate]))
+
+        def stream(edges):
+            decimator.reset()
+            return np.concatenate([
+                decimator.process(SampleBlock(volts[:, a:b], a / sample_rate, sample_rate,
+                                              start_index=a)).data
+                for a, b in edges
+            ], axis=1)
+
+        # Irregular blocks against the whole signal
+        decimated = stream(edges)
+        offline = np.vstack([signal.upfirdn(decimator.taps, row, down=factor) for row in volts])
+        error = np.abs(decimated - offline[:, :decimated.shape[1]]).max()
+        check(decimated.shape[1] == (sample_rate + factor - 1) // factor,
+              f"factor {factor}: {decimated.shape[1]} output samples")
+        check(error <= 1e-12, f"factor {factor}: streaming differs from offline by {error:.1e}")
+
+        regular = [(i, i + block_size) for i in range(0, sample_rate, block_size)]
+        elapsed = time_call(lambda: stream(regular), 5)
+        print(f"{factor:>7d} {len(decimator.taps):>5d} {sample_rate / factor:>10.0f} Hz "
+              f"{elapsed / len(regular) * 1e6:>15.1f} {elapsed * 1e3:>16.1f} {elapsed:>9.1%} "
+              f"{error:>10.1e}")
+
+    # Two-stage (calibration, mechanics) and fused conversion after decimation
+    config = {'calibration': {'load_cell': {'slope': 1000.0, 'offset': 2.0},
+                              'displacement': {'slope': 10.0, 'offset': -0.5}},
+              'decimation': {'factor': 4}}
+    calibration = CalibrationManager(config)
+    mechanics = MechanicsCalculator(cross_section_area=50.0, gauge_length=100.0)
+    products = {}
+    for names in (('decimate', 'calibration', 'mechanics'), ('decimate', 'conversion')):
+        stages = standard_stages(config, calibration, mechanics)
+        pipeline = Pipeline([stages[name] for name in names])
+        outputs = []
+        for a, b in edges:
+            data = pipeline.process(SampleBlock(volts[:, a:b], a / sample_rate, sample_rate,
+                                                start_index=a))
+            # Stage buffers are reused for the next block
+            outputs.append(np.vstack([data.engineering.data, data.mechanics.data]))
+        products[names[-1]] = np.hstack(outputs)
+    two_stage, fused = products['mechanics'], products['conversion']
+    check(two_stage.shape == fused.shape and two_stage.shape[1] == sample_rate // 4,
+          f"decimated pipeline output shapes {two_stage.shape} and {fused.shape}")
+    check(np.allclose(two_stage, fused, rtol=1e-12, atol=1e-12),
+          "decimate -> calibration -> mechanics differs from decimate -> conversion")
+    print("Decimated two-stage and fused pipelines agree")
+
+
+BENCHMARKS = {
+    'deinterleave': bench_deinterleave,
+    'buffer_read': bench_buffer_read,
+    'simulator': bench_simulator,
+    'emulator': bench_emulator,
+    'replay': bench_replay,
+    'raw_counts': bench_raw_counts,
+    'stalls': bench_stalls,
+    'stations': bench_stations,
+    'rolling': bench_rolling,
+    'session': bench_session,
+    'modulus': bench_modulus,
+    'regression': bench_regression,
+    'fused': bench_fused,
+    'calibration': bench_calibration,
+    'filters': bench_filters,
+    'decimation': bench_decimation,
+}
+
+
+def main():
+    """Run selected benchmarks (all by default)."""
+    names = sys.argv[1:] or list(BENCHMARKS)
+
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name}")
+            print(f"Available: {', '.join(BENCHMARKS)}")
+            return
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main()
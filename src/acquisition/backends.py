@@ -0,0 +1,545 @@
+"""DAQ backends: hardware (MCC Universal Library) and simulated sources."""
+
+import ctypes
+import importlib
+import inspect
+import time
+import numpy as np
+from types import SimpleNamespace
+from typing import Optional, Callable, Tuple
+
+try:
+    from typing import Protocol
+except ImportError:  # Python < 3.8
+    Protocol = object
+
+try:
+    from mcculw import ul
+    from mcculw.enums import ScanOptions, FunctionType, Status, ULRange, EventType
+    from mcculw.ul import ULError
+    # Everything MCCBackend uses from the Universal Library, so it can be swapped for an emulator
+    MCC_DRIVER = SimpleNamespace(
+        ul=ul,
+        ScanOptions=ScanOptions,
+        FunctionType=FunctionType,
+        Status=Status,
+        ULRange=ULRange,
+        EventType=EventType,
+        ULError=ULError
+    )
+    MCC_AVAILABLE = True
+except ImportError:
+    MCC_DRIVER = None
+    MCC_AVAILABLE = False
+    print("WARNING: mcculw not available. Running in simulation mode.")
+
+
+class DAQError(Exception):
+    """Raised by a backend when acquisition cannot continue."""
+
+
+def deinterleave(
+    buffer: np.ndarray,
+    start_index: int,
+    count: int,
+    num_channels: int
+) -> np.ndarray:
+    """
+    Extract interleaved samples from a circular scan buffer.
+
+    Args:
+        buffer: Circular buffer of interleaved channel values
+        start_index: Buffer index of the first value to extract
+        count: Number of values to extract (truncated to whole scans)
+        num_channels: Number of channels per scan
+
+    Returns:
+        Array of shape (num_channels, samples)
+    """
+    samples = count // num_channels
+    end = start_index + samples * num_channels
+
+    if end <= len(buffer):
+        flat = buffer[start_index:end]
+    else:
+        # Window wraps around the end of the buffer
+        flat = np.concatenate((buffer[start_index:], buffer[:end - len(buffer)]))
+
+    return np.ascontiguousarray(flat.reshape(samples, num_channels).T)
+
+
+def counts_scale(voltage_range: float, bits: int = 16) -> Tuple[float, float]:
+    """
+    Get the conversion of offset-binary ADC counts to volts.
+
+    Args:
+        voltage_range: Bipolar input range (±V)
+        bits: ADC resolution
+
+    Returns:
+        (volts per count, volts at count zero)
+    """
+    return 2.0 * voltage_range / (1 << bits), -voltage_range
+
+
+def to_counts(volts: np.ndarray, voltage_range: float, bits: int = 16) -> np.ndarray:
+    """Quantize volts to offset-binary ADC counts (as the board would)."""
+    scale, offset = counts_scale(voltage_range, bits)
+    counts = np.rint((volts - offset) / scale)
+    return np.clip(counts, 0, (1 << bits) - 1).astype(np.uint16 if bits <= 16 else np.uint32)
+
+
+class DAQBackend(Protocol):
+    """
+    Source of continuously acquired samples.
+
+    read() is called from the acquisition loop and returns the samples that
+    became available since the previous call as
+    (data of shape (num_channels, n), index of first sample, overrun flag),
+    or None if there is nothing new. The index counts every sample the
+    device acquired, so samples lost to an overrun show up as a jump in it.
+
+    Backends delivering raw ADC counts set scale and offset (volts per
+    count, volts at count zero); backends delivering volts set scale to None.
+    """
+
+    num_channels: int
+    sample_rate: float
+    buffer_size: int
+    fill: float  # Fraction of the device buffer holding unread data at the last read
+    dtype: np.dtype  # Sample data type returned by read()
+    scale: Optional[float]
+    offset: float
+
+    def start(self, wake: Optional[Callable[[], None]] = None) -> None:
+        """Start acquiring. wake may be called when new data is available."""
+
+    def read(self) -> Optional[Tuple[np.ndarray, int, bool]]:
+        """Return newly available samples, or None."""
+
+    def stop(self) -> None:
+        """Stop acquiring (resources may be kept for a restart)."""
+
+    def close(self) -> None:
+        """Stop acquiring and release resources."""
+
+
+class MCCBackend:
+    """Continuous background scan on an MCC board via the Universal Library."""
+
+    def __init__(
+        self,
+        board_num: int = 0,
+        low_chan: int = 0,
+        high_chan: int = 1,
+        sample_rate: int = 1000,
+        buffer_size: int = 5000,
+        voltage_range: float = 10.0,
+        use_data_events: bool = False,
+        raw_counts: bool = False,
+        driver: Optional[SimpleNamespace] = None
+    ):
+        """
+        Initialize MCC backend.
+
+        Args:
+            board_num: Board number (default 0)
+            low_chan: First channel to scan
+            high_chan: Last channel to scan
+            sample_rate: Sampling rate in Hz per channel
+            buffer_size: Size of circular buffer in samples per channel
+            voltage_range: Voltage range (±V)
+            use_data_events: Call the wake callback from the driver's
+                ON_DATA_AVAILABLE event
+            raw_counts: Acquire unscaled 16-bit counts instead of volts
+            driver: Universal Library namespace (default: mcculw; see MCC_DRIVER)
+        """
+        self.driver = driver or MCC_DRIVER
+        if self.driver is None:
+            raise DAQError("mcculw is not installed")
+
+        self.board_num = board_num
+        self.low_chan = low_chan
+        self.high_chan = high_chan
+        self.num_channels = high_chan - low_chan + 1
+        self.sample_rate = sample_rate
+        self.buffer_size = buffer_size
+        self.total_count = buffer_size * self.num_channels
+        self.use_data_events = use_data_events
+        self.raw_counts = raw_counts
+
+        # Set voltage range
+        ULRange = self.driver.ULRange
+        if voltage_range == 10.0:
+            self.ul_range = ULRange.BIP10VOLTS
+        elif voltage_range == 5.0:
+            self.ul_range = ULRange.BIP5VOLTS
+        elif voltage_range == 2.0:
+            self.ul_range = ULRange.BIP2VOLTS
+        else:
+            self.ul_range = ULRange.BIP10VOLTS
+            voltage_range = 10.0
+        self.voltage_range = voltage_range
+
+        if raw_counts:
+            self.dtype = np.dtype(np.uint16)
+            self.scale, self.offset = counts_scale(voltage_range)
+        else:
+            self.dtype = np.dtype(np.float64)
+            self.scale, self.offset = None, 0.0
+
+        self.memhandle = None
+        self.buffer_view: Optional[np.ndarray] = None
+        self.prev_count = 0
+        self.prev_index = 0
+        self.fill = 0.0
+        self.overruns = 0
+        self.lost_samples = 0  # Per channel
+        self._wake: Optional[Callable[[], None]] = None
+        self._event_callback = None
+
+    def start(self, wake: Optional[Callable[[], None]] = None):
+        """Start the background scan."""
+        self.prev_count = 0
+        self.prev_index = 0
+        self.fill = 0.0
+        self.overruns = 0
+        self.lost_samples = 0
+        self._wake = wake
+        ul, ScanOptions = self.driver.ul, self.driver.ScanOptions
+
+        try:
+            # Allocate buffer (reused across start/stop cycles)
+            self._allocate_buffer()
+
+            # Configure scan options
+            scan_options = ScanOptions.BACKGROUND | ScanOptions.CONTINUOUS
+            if not self.raw_counts:
+                scan_options |= ScanOptions.SCALEDATA
+
+            if self.use_data_events and wake is not None:
+                self._enable_data_event()
+
+            # Start background scan
+            ul.a_in_scan(
+                self.board_num,
+                self.low_chan,
+                self.high_chan,
+                self.total_count,
+                self.sample_rate,
+                self.ul_range,
+                self.memhandle,
+                scan_options
+            )
+        except self.driver.ULError as e:
+            raise DAQError(f"Error starting scan: {e}") from e
+
+    def read(self) -> Optional[Tuple[np.ndarray, int, bool]]:
+        """Extract new data from MCC circular buffer."""
+        try:
+            # Get current status
+            status, curr_count, curr_index = self.driver.ul.get_status(
+                self.board_num, self.driver.FunctionType.AIFUNCTION
+            )
+        except self.driver.ULError as e:
+            raise DAQError(f"Error reading data: {e}") from e
+
+        # Calculate new data count
+        new_data_count = curr_count - self.prev_count
+        self.fill = min(new_data_count / self.total_count, 1.0)
+
+        if new_data_count <= 0:
+            return None
+
+        # Check for buffer overrun: the scan has overwritten values we had not read
+        overrun = new_data_count > self.total_count
+        if overrun:
+            # Skip to the oldest whole scan still in the buffer
+            lost = -(-(new_data_count - self.total_count) // self.num_channels)
+            skipped = lost * self.num_channels
+            self.prev_count += skipped
+            self.prev_index = (self.prev_index + skipped) % self.total_count
+            new_data_count -= skipped
+            self.overruns += 1
+            self.lost_samples += lost
+            print(f"WARNING: Buffer overrun! Lost {lost} samples per channel "
+                  f"at sample {self.prev_count // self.num_channels - lost}")
+
+        # Calculate sample count per channel
+        samples_per_chan = new_data_count // self.num_channels
+        if samples_per_chan == 0:
+            return None
+
+        # Extract only the new region of the buffer
+        channels = deinterleave(
+            self.buffer_view, self.prev_index, new_data_count, self.num_channels
+        )
+        start_sample = self.prev_count // self.num_channels
+
+        # Update tracking (partial scans are picked up next poll)
+        consumed = samples_per_chan * self.num_channels
+        self.prev_count = curr_count - (new_data_count - consumed)
+        self.prev_index = (self.prev_index + consumed) % self.total_count
+
+        return channels, start_sample, overrun
+
+    def stop(self):
+        """Stop the background scan (the buffer is kept for a restart)."""
+        if not self.memhandle:
+            return
+
+        ul = self.driver.ul
+        try:
+            ul.stop_background(self.board_num, self.driver.FunctionType.AIFUNCTION)
+            if self._event_callback is not None:
+                ul.disable_event(self.board_num, self.driver.EventType.ON_DATA_AVAILABLE)
+                self._event_callback = None
+        except self.driver.ULError as e:
+            print(f"Error stopping acquisition: {e}")
+
+    def close(self):
+        """Stop the scan and release the buffer."""
+        self.stop()
+
+        if self.memhandle:
+            try:
+                self.driver.ul.win_buf_free(self.memhandle)
+            except self.driver.ULError as e:
+                print(f"Error freeing buffer: {e}")
+
+        self.memhandle = None
+        self.buffer_view = None
+
+    def _allocate_buffer(self):
+        """Allocate the scan buffer and wrap it as a NumPy view (no copy)."""
+        if self.memhandle:
+            return
+
+        if self.raw_counts:
+            self.memhandle = self.driver.ul.win_buf_alloc(self.total_count)
+            ctype = ctypes.c_uint16
+        else:
+            self.memhandle = self.driver.ul.scaled_win_buf_alloc(self.total_count)
+            ctype = ctypes.c_double
+        if not self.memhandle:
+            raise DAQError(f"Failed to allocate scan buffer of {self.total_count} samples")
+
+        # View the driver-owned memory directly instead of copying it each poll
+        data_ptr = ctypes.cast(self.memhandle, ctypes.POINTER(ctype))
+        self.buffer_view = np.ctypeslib.as_array(data_ptr, shape=(self.total_count,))
+
+    def _enable_data_event(self):
+        """Register for the driver's ON_DATA_AVAILABLE event."""
+        # Fire about four times per buffer
+        event_count = max(self.total_count // 4 // self.num_channels, 1) * self.num_channels
+
+        # Keep a reference: the driver calls back through this ctypes object
+        ul = self.driver.ul
+        self._event_callback = ul.ULEventCallback(self._on_data_event)
+        ul.enable_event(
+            self.board_num,
+            self.driver.EventType.ON_DATA_AVAILABLE,
+            event_count,
+            self._event_callback,
+            None
+        )
+
+    def _on_data_event(self, board_num, event_type, event_data, user_data):
+        """Driver event handler: wake the acquisition loop."""
+        if self._wake is not None:
+            self._wake()
+
+
+class SimulatedBackend:
+    """
+    Deterministic tensile test simulator.
+
+    Channel 0 is load and the remaining channels are displacement. The
+    displacement ramps at a constant rate and the load follows a saturating
+    elastic-plastic curve until fracture. Noise is taken from pre-generated
+    pools so generation cost is dominated by a few vectorized operations.
+    """
+
+    def __init__(
+        self,
+        low_chan: int = 0,
+        high_chan: int = 1,
+        sample_rate: int = 1000,
+        buffer_size: int = 5000,
+        voltage_range: float = 10.0,
+        raw_counts: bool = False,
+        seed: int = 0,
+        block_size: Optional[int] = None,
+        realtime: bool = True,
+        noise_pool_size: int = 1 << 16,
+        load_noise: float = 0.01,
+        displacement_noise: float = 0.005,
+        displacement_rate: float = 0.02,
+        yield_load: float = 5.0,
+        elastic_displacement: float = 0.02,
+        fracture_displacement: float = 2.0
+    ):
+        """
+        Initialize simulator.
+
+        Args:
+            low_chan: First simulated channel
+            high_chan: Last simulated channel
+            sample_rate: Sampling rate in Hz per channel
+            buffer_size: Simulated device buffer size in samples per channel
+            voltage_range: Voltage range (±V) for raw counts
+            raw_counts: Return 16-bit counts quantized over voltage_range instead of volts
+            seed: Random seed for the noise pools
+            block_size: If set, samples are returned in whole blocks of this size
+            realtime: Pace output to the wall clock; if False every read()
+                returns one block immediately
+            noise_pool_size: Length of each pre-generated noise pool
+            load_noise: Load channel noise standard deviation (V)
+            displacement_noise: Displacement channel noise standard deviation (V)
+            displacement_rate: Displacement ramp rate (V/s)
+            yield_load: Load plateau (V)
+            elastic_displacement: Displacement scale of the elastic region (V)
+            fracture_displacement: Displacement at fracture (V)
+        """
+        print("Running in SIMULATION mode - no real DAQ")
+
+        self.num_channels = high_chan - low_chan + 1
+        self.sample_rate = sample_rate
+        self.buffer_size = buffer_size
+        self.seed = seed
+        self.block_size = block_size or (None if realtime else 1000)
+        self.realtime = realtime
+        self.displacement_rate = displacement_rate
+        self.yield_load = yield_load
+        self.elastic_displacement = elastic_displacement
+        self.fracture_displacement = fracture_displacement
+        self.voltage_range = voltage_range
+        self.raw_counts = raw_counts
+        if raw_counts:
+            self.dtype = np.dtype(np.uint16)
+            self.scale, self.offset = counts_scale(voltage_range)
+        else:
+            self.dtype = np.dtype(np.float64)
+            self.scale, self.offset = None, 0.0
+
+        # Noise pools, padded so any block up to pool size is one contiguous slice
+        rng = np.random.default_rng(seed)
+        sigma = np.full((self.num_channels, 1), displacement_noise)
+        sigma[0] = load_noise
+        pool = rng.standard_normal((self.num_channels, noise_pool_size)) * sigma
+        self.noise_pool = np.concatenate((pool, pool), axis=1)
+        self.noise_pool_size = noise_pool_size
+        self._rng = rng
+
+        self.counter = 0
+        self.start_time = 0.0
+        self.fill = 0.0
+
+    def start(self, wake: Optional[Callable[[], None]] = None):
+        """Start generating samples."""
+        self.counter = 0
+        self.fill = 0.0
+        self._rng = np.random.default_rng(self.seed)
+        self.start_time = time.perf_counter()
+
+    def read(self) -> Optional[Tuple[np.ndarray, int, bool]]:
+        """Generate the samples produced since the last read."""
+        if self.realtime:
+            elapsed = time.perf_counter() - self.start_time
+            samples = int(elapsed * self.sample_rate) - self.counter
+            if self.block_size:
+                samples -= samples % self.block_size
+        else:
+            samples = self.block_size
+
+        if samples <= 0:
+            return None
+        self.fill = min(samples / self.buffer_size, 1.0)
+
+        start_sample = self.counter
+        data = self.generate(start_sample, samples)
+        if self.raw_counts:
+            data = to_counts(data, self.voltage_range)
+        self.counter += samples
+        return data, start_sample, False
+
+    def generate(self, start_sample: int, samples: int) -> np.ndarray:
+        """
+        Generate a block of simulated voltages.
+
+        Args:
+            start_sample: Index of the first sample
+            samples: Number of samples per channel
+
+        Returns:
+            Array of shape (num_channels, samples)
+        """
+        data = np.empty((self.num_channels, samples))
+
+        # Displacement ramp on all channels after the load channel
+        t = np.arange(start_sample, start_sample + samples, dtype=np.float64)
+        t *= self.displacement_rate / self.sample_rate
+        data[1:] = t
+
+        # Elastic-plastic load, dropping to zero after fracture
+        np.divide(t, self.elastic_displacement, out=data[0])
+        np.tanh(data[0], out=data[0])
+        data[0] *= self.yield_load
+        data[0, t >= self.fracture_displacement] = 0.0
+
+        # Add noise from the pool at a random offset
+        position = 0
+        while position < samples:
+            n = min(samples - position, self.noise_pool_size)
+            offset = int(self._rng.integers(self.noise_pool_size))
+            data[:, position:position + n] += self.noise_pool[:, offset:offset + n]
+            position += n
+
+        return data
+
+    def stop(self):
+        """Stop generating samples."""
+
+    def close(self):
+        """Release resources."""
+
+
+BACKENDS = {
+    'mcc': MCCBackend,
+    'simulated': SimulatedBackend,
+}
+
+# Backends in their own modules, imported on first use
+OPTIONAL_BACKENDS = {
+    'emulated': '.mcc_emulator',
+    'replay': '.replay',
+}
+
+
+def create_backend(name: str = 'auto', **options) -> DAQBackend:
+    """
+    Create a DAQ backend by name.
+
+    Args:
+        name: 'mcc', 'simulated', 'emulated' (MCC code path on an emulated
+            driver), 'replay' (recorded HDF5 session), or 'auto' (mcc if
+            mcculw is installed)
+        **options: Backend constructor arguments; arguments the backend
+            does not accept (e.g. board_num for the simulator) are ignored
+
+    Returns:
+        Backend instance
+    """
+    if name == 'auto':
+        name = 'mcc' if MCC_AVAILABLE else 'simulated'
+    if name in OPTIONAL_BACKENDS and name not in BACKENDS:
+        # Registers itself in BACKENDS on import
+        importlib.import_module(OPTIONAL_BACKENDS[name], __package__)
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown DAQ backend '{name}', expected one of {list(BACKENDS) + list(OPTIONAL_BACKENDS)}"
+        )
+
+    backend_class = BACKENDS[name]
+    accepted = inspect.signature(backend_class).parameters
+    return backend_class(**{key: value for key, value in options.items() if key in accepted})
@@ -0,0 +1,91 @@
+"""Mapping of hardware sample indices to monotonic and wall-clock time."""
+
+import time
+import numpy as np
+from typing import Optional, Sequence, Tuple
+
+
+def clock_anchor(sample_index: int) -> Tuple[int, int, int]:
+    """
+    Pair a sample index with the current monotonic and wall-clock times.
+
+    Args:
+        sample_index: Index of the sample being acquired now
+
+    Returns:
+        (sample_index, monotonic_ns, wall_ns)
+    """
+    return int(sample_index), time.monotonic_ns(), time.time_ns()
+
+
+class ClockModel:
+    """
+    Linear fit of monotonic and wall-clock time against sample index.
+
+    The DAQ clock and the host clocks drift relative to each other, so the
+    nominal index / sample_rate slowly diverges from host time. Fitting the
+    anchors recorded during acquisition gives the effective sample rate and
+    converts any sample index to absolute time. Fits are done on offsets from
+    the first anchor so int64 nanosecond values keep their precision.
+    """
+
+    def __init__(self, anchors: Sequence[Sequence[int]], sample_rate: Optional[float] = None):
+        """
+        Fit the model.
+
+        Args:
+            anchors: (sample_index, monotonic_ns, wall_ns) rows
+            sample_rate: Nominal sampling rate in Hz, used for the slope when
+                fewer than two anchors are available
+        """
+        anchors = np.asarray(anchors, dtype=np.int64).reshape(-1, 3)
+        if len(anchors) == 0:
+            raise ValueError("At least one clock anchor is required")
+
+        self.anchors = anchors
+        self.index0, self.monotonic0, self.wall0 = (int(value) for value in anchors[0])
+
+        di = (anchors[:, 0] - self.index0).astype(np.float64)
+        dm = (anchors[:, 1] - self.monotonic0).astype(np.float64)
+        dw = (anchors[:, 2] - self.wall0).astype(np.float64)
+
+        if len(anchors) >= 2 and di[-1] > di[0]:
+            # Least-squares lines through the anchors (ns per sample, ns offset)
+            self.monotonic_slope, self.monotonic_intercept = np.polyfit(di, dm, 1)
+            self.wall_slope, self.wall_intercept = np.polyfit(di, dw, 1)
+            fitted = self.monotonic_slope * di + self.monotonic_intercept
+            self.residual_ns = float(np.std(dm - fitted))
+        else:
+            if sample_rate is None:
+                raise ValueError("sample_rate is required with a single clock anchor")
+            self.monotonic_slope = self.wall_slope = 1e9 / sample_rate
+            self.monotonic_intercept = self.wall_intercept = 0.0
+            self.residual_ns = 0.0
+
+    @property
+    def sample_rate(self) -> float:
+        """Effective sampling rate in Hz measured against the monotonic clock."""
+        return 1e9 / self.monotonic_slope
+
+    def to_monotonic_ns(self, sample_index: np.ndarray) -> np.ndarray:
+        """Convert sample indices to time.monotonic_ns() values."""
+        offset = (np.asarray(sample_index) - self.index0) * self.monotonic_slope + self.monotonic_intercept
+        return self.monotonic0 + np.rint(offset).astype(np.int64)
+
+    def to_wall_ns(self, sample_index: np.ndarray) -> np.ndarray:
+        """Convert sample indices to time.time_ns() values (ns since the epoch)."""
+        offset = (np.asarray(sample_index) - self.index0) * self.wall_slope + self.wall_intercept
+        return self.wall0 + np.rint(offset).astype(np.int64)
+
+    def to_seconds(self, sample_index: np.ndarray, origin_index: int = 0) -> np.ndarray:
+        """
+        Convert sample indices to drift-corrected seconds since a reference sample.
+
+        Args:
+            sample_index: Sample indices
+            origin_index: Sample index at time zero
+
+        Returns:
+            Seconds measured on the monotonic clock
+        """
+        return (np.asarray(sample_index) - origin_index) * (self.monotonic_slope * 1e-9)
@@ -3,15 +3,46 @@
 import threading
 import time
 import numpy as np
-from typing import Optional, Callable
-try:
-    from mcculw import ul
-    from mcculw.enums import ScanOptions, FunctionType, Status, ULRange
-    from mcculw.ul import ULError
-    MCC_AVAILABLE = True
-except ImportError:
-    MCC_AVAILABLE = False
-    print("WARNING: mcculw not available. Running in simulation mode.")
+from typing import Optional, Callable, Tuple, Union
+
+from .backends import DAQBackend, DAQError, create_backend
+from .clock import ClockModel, clock_anchor
+from .sample_block import SampleBlock
+from .scheduler import PollScheduler, auto_buffer_size
+from ..utils.buffers import BlockRing
+
+
+def daq_options(acq_config: dict) -> dict:
+    """
+    Get DAQ constructor arguments from the 'acquisition' config section.
+
+    Args:
+        acq_config: Acquisition configuration
+
+    Returns:
+        Keyword arguments for MCCDataAcquisition or ProcessDataAcquisition
+        (excluding queue_policy)
+    """
+    channels = acq_config['channels']
+    backend = acq_config.get('backend', 'auto')
+    return dict(
+        board_num=acq_config['board_num'],
+        low_chan=min(channels.values()),
+        high_chan=max(channels.values()),
+        sample_rate=acq_config['sample_rate'],
+        buffer_size=acq_config['buffer_size'],
+        voltage_range=acq_config['voltage_range'],
+        poll_target_fill=acq_config.get('poll_target_fill', 0.25),
+        stall_budget=acq_config.get('stall_budget', 1.0),
+        high_watermark=acq_config.get('high_watermark', 0.75),
+        low_watermark=acq_config.get('low_watermark', 0.25),
+        anchor_interval=acq_config.get('anchor_interval', 1.0),
+        use_data_events=acq_config.get('use_data_events', False),
+        raw_counts=acq_config.get('raw_counts', False),
+        backend=backend,
+        # Per-backend options section; 'auto' falls back to the simulator's
+        backend_options=acq_config.get('simulated' if backend == 'auto' else backend)
+    )
 
 
 class MCCDataAcquisition:
@@ -23,8 +54,19 @@ class MCCDataAcquisition:
         low_chan: int = 0,
         high_chan: int = 1,
         sample_rate: int = 1000,
-        buffer_size: int = 5000,
-        voltage_range: float = 10.0
+        buffer_size: Union[int, str] = 5000,
+        voltage_range: float = 10.0,
+        queue_policy: Optional[str] = None,
+        queue_seconds: float = 10.0,
+        poll_target_fill: float = 0.25,
+        stall_budget: float = 1.0,
+        high_watermark: float = 0.75,
+        low_watermark: float = 0.25,
+        anchor_interval: float = 1.0,
+        use_data_events: bool = False,
+        raw_counts: bool = False,
+        backend: Union[str, DAQBackend] = 'auto',
+        backend_options: Optional[dict] = None
     ):
         """
         Initialize MCC DAQ.
@@ -34,189 +76,312 @@ class MCCDataAcquisition:
             low_chan: First channel to scan
             high_chan: Last channel to scan
             sample_rate: Sampling rate in Hz per channel
-            buffer_size: Size of circular buffer in samples
+            buffer_size: Size of circular buffer in samples per channel, or 'auto'
+                to size it from sample_rate and stall_budget
             voltage_range: Voltage range (±V)
+            queue_policy: If set, blocks are queued to a processing thread with this
+                backpressure policy ('drop-oldest', 'block' or 'grow') instead of
+                running the callback on the acquisition thread
+            queue_seconds: Queue capacity in seconds of data
+            poll_target_fill: Circular buffer fill fraction the poll rate aims to stay below
+            stall_budget: Longest acquisition loop stall in seconds an 'auto'
+                sized buffer must absorb without overrunning
+            high_watermark: Buffer fill fraction that raises a 'high' watermark event
+            low_watermark: Buffer fill fraction below which a 'low' event
+                signals recovery after a 'high' event
+            anchor_interval: Seconds between clock anchors pairing the sample
+                index with monotonic and wall-clock time
+            use_data_events: Wake the acquisition loop from the driver's
+                ON_DATA_AVAILABLE event instead of waiting for the poll deadline
+            raw_counts: Deliver raw 16-bit ADC counts (with their volts scale)
+                instead of volts
+            backend: Backend name ('auto', 'mcc', 'simulated', 'emulated', 'replay')
+                or a DAQBackend instance
+            backend_options: Constructor arguments for a named backend, overriding
+                the ones above (a replay runs at the recorded sample rate
+                unless these set sample_rate)
         """
-        if not MCC_AVAILABLE:
-            print("Running in SIMULATION mode - no real DAQ")
+        if buffer_size == 'auto':
+            buffer_size = auto_buffer_size(sample_rate, stall_budget=stall_budget)
+
+        if isinstance(backend, str):
+            options = dict(
+                board_num=board_num,
+                low_chan=low_chan,
+                high_chan=high_chan,
+                sample_rate=sample_rate,
+                buffer_size=buffer_size,
+                voltage_range=voltage_range,
+                use_data_events=use_data_events,
+                raw_counts=raw_counts
+            )
+            if backend == 'replay':
+                del options['sample_rate']  # Timebase of the recording
+            options.update(backend_options or {})
+            backend = create_backend(backend, **options)
+        self.backend = backend
 
         self.board_num = board_num
-        self.low_chan = low_chan
-        self.high_chan = high_chan
-        self.num_channels = high_chan - low_chan + 1
-        self.sample_rate = sample_rate
-        self.buffer_size = buffer_size
-        self.total_count = buffer_size * self.num_channels
-
-        # Set voltage range
-        if MCC_AVAILABLE:
-            if voltage_range == 10.0:
-                self.ul_range = ULRange.BIP10VOLTS
-            elif voltage_range == 5.0:
-                self.ul_range = ULRange.BIP5VOLTS
-            elif voltage_range == 2.0:
-                self.ul_range = ULRange.BIP2VOLTS
-            else:
-                self.ul_range = ULRange.BIP10VOLTS
-        else:
-            self.ul_range = None
+        self.num_channels = backend.num_channels
+        self.sample_rate = backend.sample_rate
+        self.buffer_size = backend.buffer_size
+        # Largest block read() may return (a replay can exceed the device buffer)
+        self.max_block_size = max(self.buffer_size, getattr(backend, 'max_block_size', 0))
 
-        self.memhandle = None
         self.running = False
+        self.finished = False  # The backend reached the end of its data
+        self.error: Optional[str] = None  # Why acquisition stopped on a DAQ error
         self.thread = None
-        self.prev_count = 0
-        self.prev_index = 0
-        self.data_callback: Optional[Callable] = None
+        self.processing_thread = None
+        self.queue_policy = queue_policy
+        self.queue_seconds = queue_seconds
+        self.ring: Optional[BlockRing] = None
+        self.scheduler = PollScheduler(
+            self.sample_rate, self.num_channels, self.buffer_size, target_fill=poll_target_fill
+        )
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.above_watermark = False
+        self.watermark_events = {'high': 0, 'low': 0}
+        self.watermark_callback: Optional[Callable[[str, float], None]] = None
+
+        self.start_time = 0.0
+        self.time_offset = 0.0  # Time of sample 0 relative to the time origin
+        self.anchor_interval = anchor_interval
+        self.anchors = []  # (sample_index, monotonic_ns, wall_ns)
+        self.next_anchor_ns = 0
+        self.sequence = 0
+        self.next_sample = 0
+        self.gaps = []  # (start sample index, length) of each run of lost samples
+        self.lost_samples = np.zeros(self.num_channels, dtype=np.int64)
+        self.data_callback: Optional[Callable[[SampleBlock], None]] = None
+
+    def set_data_callback(self, callback: Callable[[SampleBlock], None]):
+        """Set callback function for new data. Callback signature: callback(block)"""
+        self.data_callback = callback
 
-        # Simulation mode variables
-        self.sim_time = 0.0
-        self.sim_counter = 0
+    def set_watermark_callback(self, callback: Callable[[str, float], None]):
+        """
+        Set callback for buffer fill watermark events.
 
-    def set_data_callback(self, callback: Callable):
-        """Set callback function for new data. Callback signature: callback(time, ch0_data, ch1_data)"""
-        self.data_callback = callback
+        Callback signature: callback(level, fill), with level 'high' when fill
+        reaches high_watermark and 'low' when it falls back below low_watermark.
+        Called from the acquisition thread.
+        """
+        self.watermark_callback = callback
+
+    def start(self, time_origin: Optional[float] = None):
+        """
+        Start continuous acquisition in background thread.
 
-    def start(self):
-        """Start continuous acquisition in background thread."""
+        Args:
+            time_origin: time.perf_counter() value that block times are
+                measured from (default: the start of this acquisition). A
+                shared origin puts several acquisitions on one time base.
+        """
         if self.running:
             print("Acquisition already running")
             return
 
-        if MCC_AVAILABLE:
-            # Allocate buffer
-            self.memhandle = ul.scaled_win_buf_alloc(self.total_count)
+        self.finished = False
+        self.error = None
+        self.sequence = 0
+        self.next_sample = 0
+        self.gaps = []
+        self.lost_samples[:] = 0
+        self.above_watermark = False
+        self.watermark_events = {'high': 0, 'low': 0}
+        self.anchors = []
+        self.next_anchor_ns = 0
+        self.scheduler.reset()
+        self.start_time = time.perf_counter()
+        self.time_offset = 0.0 if time_origin is None else self.start_time - time_origin
+        self.backend.start(wake=self.scheduler.wake)
+        self.running = True
 
-            # Configure scan options
-            scan_options = (
-                ScanOptions.BACKGROUND |
-                ScanOptions.CONTINUOUS |
-                ScanOptions.SCALEDATA
-            )
+        self.thread = threading.Thread(target=self._acquisition_loop, daemon=True)
 
-            # Start background scan
-            ul.a_in_scan(
-                self.board_num,
-                self.low_chan,
-                self.high_chan,
-                self.total_count,
-                self.sample_rate,
-                self.ul_range,
-                self.memhandle,
-                scan_options
+        # Start processing thread fed through the block ring
+        if self.queue_policy:
+            capacity = max(int(self.sample_rate * self.queue_seconds), self.max_block_size)
+            self.ring = BlockRing(
+                self.num_channels, capacity, policy=self.queue_policy,
+                dtype=getattr(self.backend, 'dtype', np.float64)
             )
-
-        self.running = True
-        self.prev_count = 0
-        self.prev_index = 0
-        self.sim_time = 0.0
-        self.sim_counter = 0
+            self.processing_thread = threading.Thread(target=self._processing_loop, daemon=True)
+            self.processing_thread.start()
 
         # Start monitoring thread
-        self.thread = threading.Thread(target=self._acquisition_loop, daemon=True)
         self.thread.start()
         print(f"Acquisition started: {self.sample_rate} Hz, {self.num_channels} channels")
 
     def stop(self):
-        """Stop acquisition and free resources."""
-        if not self.running:
+        """Stop acquisition (the backend keeps its buffer for a restart)."""
+        if self.thread is None:
             return
 
         self.running = False
+        self.scheduler.wake()
+        self.thread.join(timeout=2.0)
 
-        if self.thread:
-            self.thread.join(timeout=2.0)
-
-        if MCC_AVAILABLE and self.memhandle:
-            try:
-                ul.stop_background(self.board_num, FunctionType.AIFUNCTION)
-                ul.win_buf_free(self.memhandle)
-            except ULError as e:
-                print(f"Error stopping acquisition: {e}")
+        # Processing thread exits once the ring is drained
+        if self.processing_thread:
+            self.processing_thread.join(timeout=2.0)
+            self.processing_thread = None
 
-        self.memhandle = None
+        self.thread = None
+        self.backend.stop()
         print("Acquisition stopped")
 
+    def close(self):
+        """Stop acquisition and release backend resources."""
+        self.stop()
+        self.backend.close()
+
     def _acquisition_loop(self):
         """Background thread that monitors buffer and extracts data."""
-        while self.running:
-            if MCC_AVAILABLE:
-                self._process_real_data()
-            else:
-                self._process_simulated_data()
-
-            time.sleep(0.05)  # 20 Hz monitoring rate
-
-    def _process_real_data(self):
-        """Extract new data from MCC circular buffer."""
-        try:
-            # Get current status
-            status, curr_count, curr_index = ul.get_status(
-                self.board_num, FunctionType.AIFUNCTION
-            )
-
-            # Calculate new data count
-            new_data_count = curr_count - self.prev_count
-
-            if new_data_count > 0:
-                # Check for buffer overrun
-                if new_data_count > self.buffer_size * self.num_channels:
-                    print(f"WARNING: Buffer overrun! Lost {new_data_count - self.buffer_size} samples")
-                    new_data_count = self.buffer_size * self.num_channels
-
-                # Extract data from buffer
-                data_array = ul.scaled_win_buf_to_array(self.memhandle)
-
-                # Calculate sample count per channel
-                samples_per_chan = new_data_count // self.num_channels
-
-                if samples_per_chan > 0:
-                    # Extract data for each channel
-                    ch0_data = []
-                    ch1_data = []
-
-                    for i in range(samples_per_chan):
-                        index = (self.prev_index + i * self.num_channels) % len(data_array)
-                        ch0_data.append(data_array[index])
-                        ch1_data.append(data_array[index + 1])
-
-                    ch0_data = np.array(ch0_data)
-                    ch1_data = np.array(ch1_data)
-
-                    # Generate time array
-                    start_sample = self.prev_count // self.num_channels
-                    time_array = (start_sample + np.arange(samples_per_chan)) / self.sample_rate
+        # Backends that are not paced to the wall clock are read back to back
+        paced = getattr(self.backend, 'realtime', True)
 
-                    # Call callback
-                    if self.data_callback:
-                        self.data_callback(time_array, ch0_data, ch1_data)
-
-                    # Update tracking
-                    self.prev_count = curr_count
-                    self.prev_index = (self.prev_index + new_data_count) % len(data_array)
-
-        except ULError as e:
-            print(f"Error reading data: {e}")
-            self.running = False
-
-    def _process_simulated_data(self):
-        """Generate simulated data for testing without hardware."""
-        # Generate 50 samples at a time (50ms at 1kHz)
-        samples = 50
-        dt = 1.0 / self.sample_rate
-
-        time_array = self.sim_time + np.arange(samples) * dt
+        while self.running:
+            if paced:
+                self.scheduler.wait()
+                if not self.running:
+                    break
 
-        # Simulate tensile test: increasing load and displacement
-        # Simple ramp with some noise
-        ch0_data = (self.sim_counter / 100.0) + np.random.normal(0, 0.01, samples)  # Load
-        ch1_data = (self.sim_counter / 200.0) + np.random.normal(0, 0.005, samples)  # Displacement
+            try:
+                result = self.backend.read()
+                self.scheduler.record_fill(self.backend.fill)
+                self._check_watermarks(self.backend.fill)
+                if result is not None:
+                    data, start_sample, overrun = result
+                    anchor = self._take_anchor(start_sample + data.shape[1])
+                    self._emit_block(data, start_sample, overrun, anchor)
+            except DAQError as e:
+                print(f"Error reading data: {e}")
+                self.error = f"Error reading data: {e}"
+                self.running = False
+                break
+            except Exception as e:
+                # Do not leave the acquisition looking alive after the thread dies
+                print(f"ERROR: Acquisition failed: {e!r}")
+                self.error = f"Acquisition failed: {e!r}"
+                self.running = False
+                break
+
+            if result is None and getattr(self.backend, 'finished', False):
+                print("DAQ backend reached end of data")
+                self.finished = True
+                self.running = False
+                break
+
+    def _processing_loop(self):
+        """Background thread that drains the block ring into the callback."""
+        acquisition_thread = self.thread
+        while True:
+            blocks = self.ring.drain()
+            for block in blocks:
+                if self.data_callback:
+                    self.data_callback(block)
+
+            if not blocks:
+                if not self.running and not acquisition_thread.is_alive():
+                    break
+                time.sleep(0.005)
+
+    def _take_anchor(self, sample_index: int) -> Optional[Tuple[int, int, int]]:
+        """Record a clock anchor for the sample being acquired now, if one is due."""
+        if not getattr(self.backend, 'realtime', True):
+            return None  # Not paced to the host clock
+
+        anchor = clock_anchor(sample_index)
+        if anchor[1] < self.next_anchor_ns:
+            return None
+        self.next_anchor_ns = anchor[1] + int(self.anchor_interval * 1e9)
+        self.anchors.append(anchor)
+        return anchor
+
+    def get_clock_model(self) -> Optional[ClockModel]:
+        """Fit the clock anchors recorded so far (None before the first one)."""
+        if not self.anchors:
+            return None
+        return ClockModel(self.anchors, self.sample_rate)
+
+    def _check_watermarks(self, fill: float):
+        """Raise a watermark event when fill crosses a threshold (with hysteresis)."""
+        if not self.above_watermark and fill >= self.high_watermark:
+            level = 'high'
+            print(f"WARNING: DAQ buffer {fill:.0%} full")
+        elif self.above_watermark and fill <= self.low_watermark:
+            level = 'low'
+        else:
+            return
 
-        self.sim_time += samples * dt
-        self.sim_counter += samples
+        self.above_watermark = level == 'high'
+        self.watermark_events[level] += 1
+        if self.watermark_callback:
+            self.watermark_callback(level, fill)
 
-        # Call callback
-        if self.data_callback:
-            self.data_callback(time_array, ch0_data, ch1_data)
+    def _emit_block(
+        self,
+        data: np.ndarray,
+        start_sample: int,
+        overrun: bool = False,
+        anchor: Optional[Tuple[int, int, int]] = None
+    ):
+        """Wrap extracted samples in a SampleBlock and pass it to the callback."""
+        # Samples skipped since the previous block form a gap recorded with this block
+        gap = max(start_sample - self.next_sample, 0)
+        if gap:
+            self.gaps.append((self.next_sample, gap))
+            self.lost_samples += gap
+        self.next_sample = start_sample + data.shape[1]
+
+        block = SampleBlock(
+            data,
+            t0=self.time_offset + start_sample / self.sample_rate,
+            sample_rate=self.sample_rate,
+            start_index=start_sample,
+            sequence=self.sequence,
+            overrun=overrun,
+            gap=gap,
+            scale=getattr(self.backend, 'scale', None),
+            offset=getattr(self.backend, 'offset', 0.0),
+            anchor=anchor
+        )
+        self.sequence += 1
+
+        if self.ring is not None:
+            self.ring.push(block)
+        elif self.data_callback:
+            self.data_callback(block)
+
+    @property
+    def raw_scale(self) -> Optional[Tuple[float, float]]:
+        """(volts per count, volts at count zero) if blocks hold raw counts, else None."""
+        scale = getattr(self.backend, 'scale', None)
+        return None if scale is None else (scale, self.backend.offset)
+
+    def get_queue_statistics(self) -> dict:
+        """Get block ring statistics (empty if blocks are not queued)."""
+        return self.ring.get_statistics() if self.ring is not None else {}
+
+    def get_gap_statistics(self) -> dict:
+        """Get counts of samples lost to buffer overruns."""
+        return {
+            'gaps': len(self.gaps),
+            'lost_samples_per_channel': self.lost_samples.tolist(),
+            'last_gap': self.gaps[-1] if self.gaps else None,
+        }
+
+    def get_poll_statistics(self) -> dict:
+        """Get poll period, jitter, buffer fill and watermark statistics."""
+        stats = self.scheduler.get_statistics()
+        stats['buffer_size'] = self.buffer_size
+        stats['buffer_seconds'] = self.buffer_size / self.sample_rate
+        stats['high_watermark_events'] = self.watermark_events['high']
+        stats['low_watermark_events'] = self.watermark_events['low']
+        return stats
 
     def is_running(self) -> bool:
         """Check if acquisition is running."""
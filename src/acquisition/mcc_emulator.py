@@ -0,0 +1,445 @@
+"""
+Emulated subset of the MCC Universal Library (mcculw) for testing off Windows.
+
+Emulates a continuous background scan writing interleaved samples into a
+driver-owned circular buffer, so MCCBackend's status polling, buffer views,
+wraparound and overrun handling run unchanged on any platform. The scan is
+driven by a clock (the wall clock or a VirtualClock advanced by a test) and
+can be disturbed with USB stalls and forced overruns.
+"""
+
+import ctypes
+import threading
+import time
+import numpy as np
+from enum import IntEnum, IntFlag
+from types import SimpleNamespace
+from typing import Optional, Callable
+
+from .backends import BACKENDS, MCCBackend, SimulatedBackend, to_counts
+
+
+class ScanOptions(IntFlag):
+    """Emulated mcculw.enums.ScanOptions (subset)."""
+    BACKGROUND = 0x0001
+    CONTINUOUS = 0x0002
+    SCALEDATA = 0x10000000
+
+
+class FunctionType(IntEnum):
+    """Emulated mcculw.enums.FunctionType (subset)."""
+    AIFUNCTION = 1
+
+
+class Status(IntEnum):
+    """Emulated mcculw.enums.Status."""
+    IDLE = 0
+    RUNNING = 1
+
+
+class ULRange(IntEnum):
+    """Emulated mcculw.enums.ULRange (subset)."""
+    BIP10VOLTS = 1
+    BIP5VOLTS = 0
+    BIP2VOLTS = 14
+
+
+class EventType(IntEnum):
+    """Emulated mcculw.enums.EventType (subset)."""
+    ON_DATA_AVAILABLE = 0x0002
+
+
+class ErrorCode(IntEnum):
+    """Emulated mcculw.enums.ErrorCode (subset)."""
+    BADBOARD = 1
+    BADRATE = 16
+    OVERRUN = 29
+    NOMEMORY = 35
+    BADMEMHANDLE = 48
+
+
+RANGE_VOLTS = {
+    ULRange.BIP10VOLTS: 10.0,
+    ULRange.BIP5VOLTS: 5.0,
+    ULRange.BIP2VOLTS: 2.0,
+}
+
+
+class ULError(Exception):
+    """Emulated mcculw.ul.ULError."""
+
+    def __init__(self, errorcode: ErrorCode):
+        super().__init__(f"Error {int(errorcode)}: {errorcode.name}")
+        self.errorcode = errorcode
+
+
+class VirtualClock:
+    """Manually advanced clock for deterministic, faster-than-real-time runs."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        """Move the clock forward."""
+        self.now += seconds
+
+
+class EmulatedUL:
+    """
+    Emulated mcculw.ul module for one board.
+
+    The scan position is derived from the clock whenever the driver state is
+    queried. Samples come from signal(start_sample, n) -> (num_channels, n)
+    voltages; by default a SimulatedBackend tensile curve.
+    """
+
+    ULEventCallback = staticmethod(lambda func: func)
+
+    def __init__(
+        self,
+        clock: Optional[Callable[[], float]] = None,
+        signal: Optional[Callable[[int, int], np.ndarray]] = None,
+        seed: int = 0,
+        fifo_size: int = 4096,
+        max_rate: Optional[float] = None,
+        report_partial_scans: bool = False
+    ):
+        """
+        Initialize emulator.
+
+        Args:
+            clock: Time source in seconds (default: time.perf_counter)
+            signal: Sample generator (default: seeded SimulatedBackend)
+            seed: Seed for the default signal
+            fifo_size: Device FIFO size in values; a stall that outlasts it
+                stops the scan with an OVERRUN error
+            max_rate: Maximum aggregate rate in values per second (default: unlimited)
+            report_partial_scans: Let get_status() report counts that end
+                mid-scan, as real devices can
+        """
+        self.clock = clock or time.perf_counter
+        self.signal = signal
+        self.seed = seed
+        self.fifo_size = fifo_size
+        self.max_rate = max_rate
+        self.report_partial_scans = report_partial_scans
+
+        self._buffers = {}
+        self._lock = threading.RLock()
+        self._scan = None
+        self._event = None
+        self._event_thread = None
+
+    # Buffer management
+
+    def scaled_win_buf_alloc(self, num_points: int) -> int:
+        """Allocate a float64 scan buffer and return its memhandle."""
+        return self._alloc(num_points, ctypes.c_double)
+
+    def win_buf_alloc(self, num_points: int) -> int:
+        """Allocate a 16-bit count scan buffer and return its memhandle."""
+        return self._alloc(num_points, ctypes.c_uint16)
+
+    def win_buf_free(self, memhandle: int):
+        """Free a scan buffer."""
+        with self._lock:
+            if memhandle not in self._buffers:
+                raise ULError(ErrorCode.BADMEMHANDLE)
+            if self._scan is not None and self._scan.memhandle == memhandle:
+                self._scan = None
+            del self._buffers[memhandle]
+
+    def scaled_win_buf_to_array(self, memhandle: int, array=None, first_point: int = 0, count: Optional[int] = None):
+        """Copy a scaled buffer into a new ctypes array."""
+        with self._lock:
+            self._update()
+            raw, view = self._buffer(memhandle)
+            count = len(view) - first_point if count is None else count
+            out = (ctypes.c_double * count)() if array is None else array
+            np.ctypeslib.as_array(out)[:count] = view[first_point:first_point + count]
+            return out
+
+    # Scanning
+
+    def a_in_scan(
+        self,
+        board_num: int,
+        low_chan: int,
+        high_chan: int,
+        num_points: int,
+        rate: int,
+        ul_range: ULRange,
+        memhandle: int,
+        options: int
+    ) -> int:
+        """Start a background scan into memhandle; returns the actual rate."""
+        with self._lock:
+            raw, view = self._buffer(memhandle)
+            num_channels = high_chan - low_chan + 1
+            if num_points > len(view) or num_points % num_channels:
+                raise ULError(ErrorCode.NOMEMORY)
+            if rate <= 0 or (self.max_rate and rate * num_channels > self.max_rate):
+                raise ULError(ErrorCode.BADRATE)
+
+            signal = self.signal
+            if signal is None:
+                signal = SimulatedBackend(
+                    low_chan, high_chan, rate, num_points // num_channels, seed=self.seed
+                ).generate
+
+            volts = RANGE_VOLTS.get(ul_range, 10.0)
+            self._scan = SimpleNamespace(
+                board_num=board_num,
+                num_channels=num_channels,
+                num_points=num_points,
+                rate=rate,
+                memhandle=memhandle,
+                view=view[:num_points],
+                scaled=bool(options & ScanOptions.SCALEDATA),
+                continuous=bool(options & ScanOptions.CONTINUOUS),
+                volts=volts,
+                signal=signal,
+                start_time=self.clock(),
+                stall_end=None,
+                skipped=0,              # Values skipped by forced overruns
+                written=0,              # Values written to the buffer
+                running=True,
+                error=None
+            )
+            self._update_event_thread()
+            return rate
+
+    def get_status(self, board_num: int, function_type: FunctionType):
+        """Return (status, cur_count, cur_index) of the background scan."""
+        with self._lock:
+            scan = self._scan
+            if scan is None:
+                return Status.IDLE, 0, -1
+
+            self._update()
+            if scan.error is not None:
+                error, scan.error = scan.error, None
+                raise ULError(error)
+
+            status = Status.RUNNING if scan.running else Status.IDLE
+            cur_index = (scan.written - 1) % scan.num_points if scan.written else -1
+            return status, scan.written, cur_index
+
+    def stop_background(self, board_num: int, function_type: FunctionType):
+        """Stop the background scan."""
+        with self._lock:
+            if self._scan is not None:
+                self._update()
+                self._scan.running = False
+            self._update_event_thread()
+
+    def enable_event(self, board_num: int, event_type: EventType, event_param: int, callback, user_data):
+        """Call callback whenever event_param more values are available."""
+        with self._lock:
+            self._event = SimpleNamespace(
+                type=event_type, count=event_param, callback=callback,
+                user_data=user_data, next_count=event_param
+            )
+            self._update_event_thread()
+
+    def disable_event(self, board_num: int, event_type: EventType):
+        """Stop delivering events."""
+        with self._lock:
+            self._event = None
+
+    # Fault injection
+
+    def stall(self, duration: float):
+        """
+        Emulate a USB stall: no data reaches the host buffer for duration seconds.
+
+        Data acquired during the stall is held in the device FIFO and arrives
+        in a burst afterwards, unless it exceeds fifo_size, in which case the
+        scan stops with an OVERRUN error.
+        """
+        with self._lock:
+            scan = self._scan
+            if scan is None:
+                return
+            self._update()
+            scan.stall_end = self.clock() + duration
+
+    def force_overrun(self, values: int):
+        """Advance the scan by values without the host reading them (buffer overwrite)."""
+        with self._lock:
+            if self._scan is not None:
+                self._scan.skipped += values
+                self._update()
+
+    # Internals
+
+    def _alloc(self, num_points: int, ctype) -> int:
+        """Allocate a buffer of ctype values and return its address as memhandle."""
+        with self._lock:
+            raw = (ctype * num_points)()
+            memhandle = ctypes.addressof(raw)
+            self._buffers[memhandle] = (raw, np.ctypeslib.as_array(raw))
+            return memhandle
+
+    def _buffer(self, memhandle: int):
+        """Look up a buffer by memhandle."""
+        try:
+            return self._buffers[memhandle]
+        except KeyError:
+            raise ULError(ErrorCode.BADMEMHANDLE) from None
+
+    def _acquired_values(self, scan, now: float) -> int:
+        """Values the ADC has acquired by time now (whether or not transferred)."""
+        elapsed = now - scan.start_time
+        if self.report_partial_scans:
+            return int(elapsed * scan.rate * scan.num_channels) + scan.skipped
+        return int(elapsed * scan.rate) * scan.num_channels + scan.skipped
+
+    def _update(self):
+        """Bring the buffer contents up to the current clock time."""
+        scan = self._scan
+        if scan is None or not scan.running:
+            return
+
+        now = self.clock()
+        acquired = self._acquired_values(scan, now)
+
+        if scan.stall_end is not None:
+            # Host sees nothing new during a stall; data piles up in the device FIFO
+            if self._acquired_values(scan, min(now, scan.stall_end)) - scan.written > self.fifo_size:
+                scan.running = False
+                scan.error = ErrorCode.OVERRUN
+                return
+            if now < scan.stall_end:
+                return
+            scan.stall_end = None
+
+        if not scan.continuous:
+            acquired = min(acquired, scan.num_points)
+            if acquired >= scan.num_points:
+                scan.running = False
+
+        if acquired > scan.written:
+            self._write(scan, scan.written, acquired)
+            scan.written = acquired
+            self._fire_event(scan)
+
+    def _write(self, scan, first: int, last: int):
+        """Write values [first, last) of the scan into the circular buffer."""
+        # Older values would be overwritten anyway
+        first = max(first, last - scan.num_points)
+
+        nch = scan.num_channels
+        first_scan = first // nch
+        last_scan = -(-last // nch)
+        data = scan.signal(first_scan, last_scan - first_scan)
+        values = data.T.reshape(-1)[first - first_scan * nch:last - first_scan * nch]
+
+        if not scan.scaled:
+            # Offset-binary 16-bit counts
+            values = to_counts(values, scan.volts)
+
+        start = first % scan.num_points
+        head = min(len(values), scan.num_points - start)
+        scan.view[start:start + head] = values[:head]
+        scan.view[:len(values) - head] = values[head:]
+
+    def _fire_event(self, scan):
+        """Deliver ON_DATA_AVAILABLE events that are due."""
+        event = self._event
+        if event is None or scan.written < event.next_count:
+            return
+
+        event.next_count = scan.written + event.count
+        event.callback(scan.board_num, event.type, scan.written, event.user_data)
+
+    def _update_event_thread(self):
+        """Run a background updater while events are enabled on a running scan."""
+        needed = self._event is not None and self._scan is not None and self._scan.running
+        if needed and self._event_thread is None:
+            self._event_thread = threading.Thread(target=self._event_loop, daemon=True)
+            self._event_thread.start()
+
+    def _event_loop(self):
+        """Advance the scan periodically so events fire without host polling."""
+        while True:
+            with self._lock:
+                if self._event is None or self._scan is None or not self._scan.running:
+                    self._event_thread = None
+                    return
+                self._update()
+            time.sleep(0.001)
+
+
+def create_driver(**options) -> SimpleNamespace:
+    """
+    Create an emulated Universal Library namespace for MCCBackend(driver=...).
+
+    Args:
+        **options: EmulatedUL arguments
+
+    Returns:
+        Namespace with ul, enums and ULError
+    """
+    return SimpleNamespace(
+        ul=EmulatedUL(**options),
+        ScanOptions=ScanOptions,
+        FunctionType=FunctionType,
+        Status=Status,
+        ULRange=ULRange,
+        EventType=EventType,
+        ULError=ULError
+    )
+
+
+class EmulatedMCCBackend(MCCBackend):
+    """MCCBackend running against an emulated driver."""
+
+    def __init__(
+        self,
+        board_num: int = 0,
+        low_chan: int = 0,
+        high_chan: int = 1,
+        sample_rate: int = 1000,
+        buffer_size: int = 5000,
+        voltage_range: float = 10.0,
+        use_data_events: bool = False,
+        raw_counts: bool = False,
+        clock: Optional[Callable[[], float]] = None,
+        signal: Optional[Callable[[int, int], np.ndarray]] = None,
+        seed: int = 0,
+        fifo_size: int = 4096,
+        report_partial_scans: bool = False
+    ):
+        """
+        Initialize emulated MCC backend.
+
+        Args:
+            board_num: Board number (default 0)
+            low_chan: First channel to scan
+            high_chan: Last channel to scan
+            sample_rate: Sampling rate in Hz per channel
+            buffer_size: Size of circular buffer in samples per channel
+            voltage_range: Voltage range (±V)
+            use_data_events: Call the wake callback from ON_DATA_AVAILABLE events
+            raw_counts: Acquire unscaled 16-bit counts instead of volts
+            clock: Emulator time source (default: time.perf_counter)
+            signal: Sample generator (default: seeded tensile test simulation)
+            seed: Seed for the default signal
+            fifo_size: Device FIFO size in values
+            report_partial_scans: Let status counts end mid-scan
+        """
+        driver = create_driver(
+            clock=clock, signal=signal, seed=seed,
+            fifo_size=fifo_size, report_partial_scans=report_partial_scans
+        )
+        super().__init__(
+            board_num, low_chan, high_chan, sample_rate, buffer_size,
+            voltage_range, use_data_events, raw_counts, driver=driver
+        )
+
+
+BACKENDS['emulated'] = EmulatedMCCBackend
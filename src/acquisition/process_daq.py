@@ -0,0 +1,320 @@
+"""Out-of-process data acquisition with shared-memory transport."""
+
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+import numpy as np
+from typing import Optional, Callable, Tuple
+
+from .backends import DAQError, counts_scale
+from .sample_block import SampleBlock
+from .scheduler import auto_buffer_size
+from ..utils.buffers import SharedBlockRing
+
+
+def _run_acquisition(daq_kwargs: dict, control_queue, stop_event, status_queue):
+    """
+    Child process entry point: run the DAQ loop and publish blocks to the ring.
+
+    Once the DAQ is open the child reports ('ready', properties of its DAQ)
+    and waits for the spec of the ring the parent sizes from them before
+    acquiring. If acquisition stops on its own, it reports ('finished', None)
+    when the backend reached the end of its data, else ('error', text).
+
+    Args:
+        daq_kwargs: Keyword arguments for MCCDataAcquisition
+        control_queue: Queue on which the parent sends SharedBlockRing.spec()
+        stop_event: Event set by the parent to request shutdown
+        status_queue: Queue for reporting status to the parent
+    """
+    from .mcc_daq import MCCDataAcquisition
+
+    ring = None
+    daq = None
+    try:
+        daq = MCCDataAcquisition(**daq_kwargs)
+        status_queue.put(('ready', {
+            'raw_scale': daq.raw_scale,
+            'num_channels': daq.num_channels,
+            'sample_rate': daq.sample_rate,
+            'buffer_size': daq.buffer_size,
+            'dtype': np.dtype(getattr(daq.backend, 'dtype', np.float64)).str,
+            'max_block_size': daq.max_block_size,
+        }))
+        ring_spec = None
+        while ring_spec is None:
+            try:
+                ring_spec = control_queue.get(timeout=0.05)
+            except queue.Empty:
+                if stop_event.is_set():
+                    return
+        ring = SharedBlockRing.attach(ring_spec)
+        daq.set_data_callback(ring.push)
+        daq.start()
+
+        while not stop_event.wait(0.05):
+            if not daq.is_running():
+                if daq.finished:
+                    status_queue.put(('finished', None))
+                else:
+                    status_queue.put(('error', daq.error or "Acquisition stopped unexpectedly"))
+                break
+    except Exception:
+        status_queue.put(('error', traceback.format_exc()))
+    finally:
+        if daq is not None:
+            daq.close()
+        if ring is not None:
+            ring.close()
+
+
+class ProcessDataAcquisition:
+    """
+    Runs MCCDataAcquisition in a child process.
+
+    Blocks are published through a SharedBlockRing and delivered to the data
+    callback by a reader thread in this process, so the DAQ polling loop does
+    not compete for the GIL with the GUI. Provides the same start/stop/callback
+    interface as MCCDataAcquisition.
+
+    The channel count, sample rate, sample type, raw scale and largest
+    block are those of the child's backend, so they are only known once the
+    child has opened it: call prepare() before reading them (start()
+    prepares the child if needed). Until then they are the nominal values
+    of the arguments. The ring is built from the reported values, so it
+    matches the blocks the backend returns.
+    """
+
+    def __init__(
+        self,
+        queue_policy: str = 'drop-oldest',
+        queue_seconds: float = 10.0,
+        **daq_kwargs
+    ):
+        """
+        Initialize out-of-process DAQ.
+
+        Args:
+            queue_policy: Shared ring backpressure policy ('drop-oldest' or 'block')
+            queue_seconds: Shared ring capacity in seconds of data
+            **daq_kwargs: Arguments for MCCDataAcquisition in the child process
+        """
+        self.daq_kwargs = daq_kwargs
+        self.queue_policy = queue_policy
+        self.queue_seconds = queue_seconds
+
+        # Nominal values, replaced by those the child reports in prepare()
+        self.sample_rate = daq_kwargs.get('sample_rate', 1000)
+        self.buffer_size = daq_kwargs.get('buffer_size', 5000)
+        if self.buffer_size == 'auto':
+            self.buffer_size = auto_buffer_size(
+                self.sample_rate, stall_budget=daq_kwargs.get('stall_budget', 1.0)
+            )
+        self.num_channels = daq_kwargs.get('high_chan', 1) - daq_kwargs.get('low_chan', 0) + 1
+        self.dtype = np.uint16 if daq_kwargs.get('raw_counts', False) else np.float64
+
+        self._context = multiprocessing.get_context('spawn')
+        self.process = None
+        self.thread = None
+        self.ring: Optional[SharedBlockRing] = None
+        self.control_queue = None
+        self.stop_event = None
+        self.status_queue = None
+        self.error: Optional[str] = None
+        self.finished = False  # The child's backend reached the end of its data
+        self.release_lock = threading.Lock()
+        self.release_pending = False  # Reader thread releases the ring when it exits
+        self.reported_scale: Optional[Tuple[float, float]] = None
+        self.running = False
+        self.data_callback: Optional[Callable[[SampleBlock], None]] = None
+
+    def set_data_callback(self, callback: Callable[[SampleBlock], None]):
+        """Set callback function for new data. Callback signature: callback(block)"""
+        self.data_callback = callback
+
+    def prepare(self, timeout: float = 30.0):
+        """
+        Start the acquisition process and wait until its DAQ is open.
+
+        Acquisition itself waits for start(); num_channels, sample_rate,
+        buffer_size, dtype and raw_scale then give the child backend's
+        values, and the ring is built from them.
+
+        Args:
+            timeout: Longest wait in seconds for the child to open the DAQ
+
+        Raises:
+            DAQError: If the child fails to open the DAQ in time
+        """
+        if self.process is not None:
+            return
+
+        self.control_queue = self._context.Queue()
+        self.stop_event = self._context.Event()
+        self.status_queue = self._context.Queue()
+        self.error = None
+        self.finished = False
+        self.reported_scale = None
+
+        self.process = self._context.Process(
+            target=_run_acquisition,
+            args=(self.daq_kwargs, self.control_queue, self.stop_event, self.status_queue),
+            daemon=True
+        )
+        self.process.start()
+
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                kind, value = self.status_queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.process.is_alive() and time.perf_counter() < deadline:
+                    continue
+                kind, value = 'error', "Acquisition process did not open the DAQ"
+            if kind == 'ready':
+                self.reported_scale = value['raw_scale']
+                self.num_channels = value['num_channels']
+                self.sample_rate = value['sample_rate']
+                self.buffer_size = value['buffer_size']
+                self.dtype = np.dtype(value['dtype'])
+                capacity = max(int(self.sample_rate * self.queue_seconds), value['max_block_size'])
+                self.ring = SharedBlockRing(
+                    self.num_channels, capacity, policy=self.queue_policy, dtype=self.dtype
+                )
+                return
+            if kind == 'error':
+                self.stop()
+                self.error = value
+                raise DAQError(f"Acquisition process failed to start: {value}")
+
+    def start(self):
+        """Start the acquisition process (if not prepared) and the reader thread."""
+        if self.running:
+            print("Acquisition already running")
+            return
+
+        self.prepare()
+        self.control_queue.put(self.ring.spec())
+
+        self.running = True
+        self.thread = threading.Thread(
+            target=self._reader_loop,
+            args=(self.ring, self.process, self.stop_event, self.status_queue),
+            daemon=True
+        )
+        self.thread.start()
+        print(f"Acquisition process started (pid {self.process.pid})")
+
+    def stop(self):
+        """Stop the acquisition process and release shared memory."""
+        if self.process is None:
+            return
+
+        self.stop_event.set()
+        self.process.join(timeout=5.0)
+        if self.process.is_alive():
+            print("Acquisition process did not exit, terminating")
+            self.process.terminate()
+            self.process.join()
+
+        # Reader thread drains the remaining blocks, then exits
+        if self.thread:
+            self.thread.join(timeout=2.0)
+        self._check_errors(self.status_queue)
+        self.running = False
+
+        with self.release_lock:
+            if self.thread is not None and self.thread.is_alive():
+                print("WARNING: Reader thread still delivering queued blocks; "
+                      "shared memory is released when it finishes")
+                self.release_pending = True
+            elif self.ring is not None:
+                self.ring.close()
+                self.ring.unlink()
+        self.ring = None
+        self.thread = None
+        self.process = None
+        print("Acquisition process stopped")
+
+    def close(self):
+        """Stop acquisition (buffers are owned by the child process)."""
+        self.stop()
+
+    def _reader_loop(self, ring: SharedBlockRing, process, stop_event, status_queue):
+        """
+        Background thread that drains the shared ring into the callback.
+
+        Takes this session's ring, process, stop event and status queue, as
+        a later start() replaces the attributes.
+        """
+        try:
+            while True:
+                # Check liveness before draining so no block published before exit is missed
+                exited = not process.is_alive()
+
+                blocks = ring.drain()
+                for block in blocks:
+                    if self.data_callback:
+                        self.data_callback(block)
+                if blocks:
+                    continue
+
+                errors = self._check_errors(status_queue)
+                if exited or errors:
+                    if not stop_event.is_set():
+                        # Child finished, died or reported an error: stop delivering data
+                        if self.finished and self.error is None:
+                            print("Acquisition finished: end of data")
+                        else:
+                            if self.error is None:
+                                self.error = f"Acquisition process exited with code {process.exitcode}"
+                            print(f"Acquisition error: {self.error}")
+                        stop_event.set()
+                    self.running = False
+                    break
+
+                time.sleep(0.005)
+        finally:
+            with self.release_lock:
+                if self.release_pending:
+                    ring.close()
+                    ring.unlink()
+                    self.release_pending = False
+
+    def _check_errors(self, status_queue) -> bool:
+        """Collect status reported by the child. Returns True if it reported an error."""
+        found = False
+        while True:
+            try:
+                kind, value = status_queue.get_nowait()
+            except queue.Empty:
+                return found
+            if kind == 'error':
+                self.error = value
+                found = True
+            elif kind == 'finished':
+                self.finished = True
+
+    @property
+    def raw_scale(self) -> Optional[Tuple[float, float]]:
+        """
+        (volts per count, volts at count zero) if blocks hold raw counts, else None.
+
+        Reported by the child's backend after prepare(); before that, the
+        nominal scale of the configured voltage range.
+        """
+        if not self.daq_kwargs.get('raw_counts', False):
+            return None
+        if self.reported_scale is not None:
+            return self.reported_scale
+        return counts_scale(self.daq_kwargs.get('voltage_range', 10.0))
+
+    def get_queue_statistics(self) -> dict:
+        """Get shared ring statistics."""
+        return self.ring.get_statistics() if self.ring is not None else {}
+
+    def is_running(self) -> bool:
+        """Check if acquisition is running."""
+        return self.running
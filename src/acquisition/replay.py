@@ -0,0 +1,190 @@
+"""Replay of recorded HDF5 sessions as a DAQ backend."""
+
+import time
+import h5py
+import numpy as np
+from typing import Optional, Callable, Tuple
+
+from .backends import BACKENDS, counts_scale, to_counts
+from ..logging.hdf5_logger import read_gaps
+
+
+class ReplayBackend:
+    """
+    Feeds the raw channels of a session written by HDF5Logger back through
+    the acquisition pipeline, as volts or as 16-bit counts.
+
+    With speed set, samples are released at speed times the recorded rate
+    against clock; with speed=None each read() returns the next block
+    immediately (as fast as the consumer can take them). Blocks are split
+    at recorded gaps and carry the original sample indices, so gaps are
+    reproduced downstream.
+    """
+
+    CHANNELS = ('ch0', 'ch1')
+
+    def __init__(
+        self,
+        file_path: str,
+        session: Optional[str] = None,
+        sample_rate: Optional[float] = None,
+        buffer_size: int = 5000,
+        voltage_range: float = 10.0,
+        raw_counts: bool = False,
+        speed: Optional[float] = 1.0,
+        block_size: Optional[int] = None,
+        chunk_size: int = 65536,
+        clock: Optional[Callable[[], float]] = None
+    ):
+        """
+        Initialize replay.
+
+        Args:
+            file_path: HDF5 file written by HDF5Logger
+            session: Session group name (default: last session in the file)
+            sample_rate: Sampling rate in Hz (default: session 'sample_rate_Hz'
+                attribute, else inferred from the time dataset)
+            buffer_size: Nominal device buffer size used for fill reporting
+            voltage_range: Voltage range (±V) for quantizing a session
+                recorded in volts when raw_counts is set
+            raw_counts: Deliver 16-bit counts instead of volts
+            speed: Replay speed relative to real time, or None for as fast as possible
+            block_size: Samples per block (default: as released by the clock, or
+                chunk_size when replaying as fast as possible)
+            chunk_size: Samples read from the file at a time (also the largest
+                block without block_size)
+            clock: Time source in seconds (default: time.perf_counter)
+        """
+        self.file = h5py.File(file_path, 'r')
+        if session is None:
+            sessions = sorted(key for key in self.file.keys() if key.startswith('session_'))
+            if not sessions:
+                raise ValueError(f"No sessions in {file_path}")
+            session = sessions[-1]
+        self.session = self.file[session]
+
+        raw_group = self.session['raw_data']
+        self.recorded_counts = f'{self.CHANNELS[0]}_counts' in raw_group
+        suffix = '_counts' if self.recorded_counts else '_voltage'
+        self.datasets = [raw_group[name + suffix] for name in self.CHANNELS]
+        self.total_samples = len(self.datasets[0])
+
+        # Dataset row after each gap and samples lost up to and including that gap
+        gaps = read_gaps(self.session)
+        self.gap_rows = gaps[:, 0]
+        self.gap_lost = np.cumsum(gaps[:, 2])
+
+        self.voltage_range = voltage_range
+        self.raw_counts = raw_counts
+        if self.recorded_counts:
+            attrs = self.datasets[0].attrs
+            self.recorded_scale = (float(attrs['scale_V_per_count']), float(attrs['offset_V']))
+        if not raw_counts:
+            self.dtype = np.dtype(np.float64)
+            self.scale, self.offset = None, 0.0
+        else:
+            self.dtype = np.dtype(np.uint16)
+            if self.recorded_counts:
+                self.scale, self.offset = self.recorded_scale
+            else:
+                self.scale, self.offset = counts_scale(voltage_range)
+
+        if sample_rate is None:
+            sample_rate = self.session.attrs.get('sample_rate_Hz')
+        if sample_rate is None and 'time' in self.session:
+            time_head = self.session['time'][:2]
+            if len(time_head) == 2:
+                sample_rate = 1.0 / (time_head[1] - time_head[0])
+        if sample_rate is None:
+            sample_rate = 1000.0
+
+        self.num_channels = len(self.CHANNELS)
+        self.sample_rate = float(sample_rate)
+        self.buffer_size = buffer_size
+        self.speed = speed
+        self.realtime = bool(speed)
+        self.block_size = block_size or (None if speed else chunk_size)
+        self.max_block_size = block_size or chunk_size  # Largest block read() returns
+        self.chunk_size = chunk_size
+        self.clock = clock or time.perf_counter
+
+        self.position = 0
+        self.start_time = 0.0
+        self.fill = 0.0
+        self.finished = False
+        self._chunk = np.empty((self.num_channels, 0), dtype=self.dtype)
+        self._chunk_start = 0
+
+    def start(self, wake: Optional[Callable[[], None]] = None):
+        """Restart replay from the beginning of the session."""
+        self.position = 0
+        self.fill = 0.0
+        self.finished = self.total_samples == 0
+        self._chunk = np.empty((self.num_channels, 0), dtype=self.dtype)
+        self._chunk_start = 0
+        self.start_time = self.clock()
+
+    def read(self) -> Optional[Tuple[np.ndarray, int, bool]]:
+        """Return the samples released since the last read."""
+        if self.speed:
+            elapsed = self.clock() - self.start_time
+            samples = int(elapsed * self.sample_rate * self.speed) - self.position
+            if self.block_size:
+                samples -= samples % self.block_size
+        else:
+            samples = self.block_size
+
+        samples = min(samples, self.max_block_size, self.total_samples - self.position)
+
+        # Do not run a block across a gap
+        next_gap = np.searchsorted(self.gap_rows, self.position, side='right')
+        if next_gap < len(self.gap_rows):
+            samples = min(samples, int(self.gap_rows[next_gap]) - self.position)
+
+        if samples <= 0:
+            self.finished = self.position >= self.total_samples
+            return None
+        self.fill = min(samples / self.buffer_size, 1.0)
+
+        data = self._read_samples(self.position, samples)
+        start_sample = self.position + (int(self.gap_lost[next_gap - 1]) if next_gap else 0)
+        self.position += samples
+        return data, start_sample, False
+
+    def _read_samples(self, start: int, samples: int) -> np.ndarray:
+        """Read samples through a cache of file chunks."""
+        data = np.empty((self.num_channels, samples), dtype=self.dtype)
+        filled = 0
+        while filled < samples:
+            offset = start + filled - self._chunk_start
+            if offset >= self._chunk.shape[1]:
+                # Load the next chunk
+                self._chunk_start = start + filled
+                end = min(self._chunk_start + self.chunk_size, self.total_samples)
+                self._chunk = self._load_chunk(self._chunk_start, end)
+                offset = 0
+
+            n = min(samples - filled, self._chunk.shape[1] - offset)
+            data[:, filled:filled + n] = self._chunk[:, offset:offset + n]
+            filled += n
+        return data
+
+    def _load_chunk(self, start: int, end: int) -> np.ndarray:
+        """Read a chunk of all channels, converted to the delivered format."""
+        chunk = np.vstack([ds[start:end] for ds in self.datasets])
+        if self.recorded_counts and not self.raw_counts:
+            scale, offset = self.recorded_scale
+            return chunk * scale + offset
+        if self.raw_counts and not self.recorded_counts:
+            return to_counts(chunk, self.voltage_range)
+        return chunk
+
+    def stop(self):
+        """Pause replay."""
+
+    def close(self):
+        """Close the session file."""
+        self.file.close()
+
+
+BACKENDS['replay'] = ReplayBackend
@@ -0,0 +1,133 @@
+"""Compact container for a block of multi-channel samples."""
+
+import numpy as np
+from typing import Optional, Tuple
+
+
+class SampleBlock:
+    """
+    Block of samples from consecutive scans of one or more channels.
+
+    Data is held as one contiguous (num_channels, num_samples) array. Time
+    stamps are not stored; they are derived from t0 + i / sample_rate when
+    requested. The int64 start_index counts samples since acquisition start
+    and is the exact time base; t0 is its nominal conversion to seconds. Raw
+    ADC counts carry a scale and offset so they can be converted to volts
+    where needed.
+    """
+
+    __slots__ = (
+        'data', 't0', 'sample_rate', 'start_index', 'sequence', 'overrun', 'gap',
+        'scale', 'offset', 'anchor'
+    )
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        t0: float,
+        sample_rate: float,
+        start_index: int = 0,
+        sequence: int = 0,
+        overrun: bool = False,
+        gap: int = 0,
+        scale: Optional[float] = None,
+        offset: float = 0.0,
+        anchor: Optional[Tuple[int, int, int]] = None
+    ):
+        """
+        Initialize block.
+
+        Args:
+            data: Sample array of shape (num_channels, num_samples)
+            t0: Time of the first sample in seconds
+            sample_rate: Sampling rate in Hz per channel
+            start_index: Index of the first sample since acquisition start
+            sequence: Block sequence number
+            overrun: True if samples were lost before this block
+            gap: Number of samples per channel lost immediately before this
+                block (start_index accounts for them)
+            scale: Volts per count if data holds raw ADC counts (None for volts)
+            offset: Volts at count zero (used with scale)
+            anchor: Clock anchor (sample_index, monotonic_ns, wall_ns) taken
+                when this block was read, if any
+        """
+        self.data = np.ascontiguousarray(np.atleast_2d(data))
+        self.t0 = float(t0)
+        self.sample_rate = float(sample_rate)
+        self.start_index = np.int64(start_index)
+        self.sequence = sequence
+        self.overrun = overrun or gap > 0
+        self.gap = int(gap)
+        self.scale = scale
+        self.offset = offset
+        self.anchor = anchor
+
+    @property
+    def num_channels(self) -> int:
+        """Number of channels in the block."""
+        return self.data.shape[0]
+
+    @property
+    def num_samples(self) -> int:
+        """Number of samples per channel."""
+        return self.data.shape[1]
+
+    def __len__(self) -> int:
+        return self.data.shape[1]
+
+    @property
+    def time(self) -> np.ndarray:
+        """Time array in seconds (materialized on each access)."""
+        return self.t0 + np.arange(self.num_samples) / self.sample_rate
+
+    @property
+    def sample_index(self) -> np.ndarray:
+        """Sample index of each sample (int64)."""
+        return self.start_index + np.arange(self.num_samples, dtype=np.int64)
+
+    @property
+    def end_time(self) -> float:
+        """Time of the sample following the last sample in the block."""
+        return self.t0 + self.num_samples / self.sample_rate
+
+    @property
+    def gap_start(self) -> int:
+        """Index of the first lost sample before this block (start_index if there is no gap)."""
+        return int(self.start_index) - self.gap
+
+    @property
+    def is_counts(self) -> bool:
+        """True if data holds raw ADC counts."""
+        return self.scale is not None
+
+    def channel(self, index: int) -> np.ndarray:
+        """Get a view of one channel's samples."""
+        return self.data[index]
+
+    def volts(self) -> np.ndarray:
+        """Sample data in volts (the data itself unless it holds counts)."""
+        if self.scale is None:
+            return self.data
+        return self.data * self.scale + self.offset
+
+    def with_data(self, data: np.ndarray) -> 'SampleBlock':
+        """
+        Create a block with the same timing metadata and new sample data.
+
+        Args:
+            data: Sample array of shape (num_channels, num_samples) in
+                physical units (the count scale is not carried over)
+
+        Returns:
+            New SampleBlock
+        """
+        return SampleBlock(
+            data,
+            t0=self.t0,
+            sample_rate=self.sample_rate,
+            start_index=self.start_index,
+            sequence=self.sequence,
+            overrun=self.overrun,
+            gap=self.gap,
+            anchor=self.anchor
+        )
@@ -0,0 +1,145 @@
+"""Poll scheduling for the acquisition loop."""
+
+import math
+import threading
+import time
+from typing import Optional
+
+
+def auto_buffer_size(
+    sample_rate: float,
+    poll_period: float = 0.05,
+    stall_budget: float = 1.0,
+    granularity: int = 64
+) -> int:
+    """
+    Size the DAQ circular buffer to survive a stalled consumer.
+
+    The buffer holds one poll period of data plus the longest stall the
+    acquisition loop must ride out without losing samples.
+
+    Args:
+        sample_rate: Sampling rate in Hz per channel
+        poll_period: Longest poll period in seconds
+        stall_budget: Worst-case acquisition loop stall in seconds
+        granularity: Round the size up to a multiple of this many samples
+
+    Returns:
+        Buffer size in samples per channel
+    """
+    samples = math.ceil(sample_rate * (poll_period + stall_budget))
+    return -(-samples // granularity) * granularity
+
+
+class PollScheduler:
+    """
+    Drift-free poll timer sized to the DAQ circular buffer.
+
+    The nominal poll period is the time it takes the scan to fill
+    target_fill of the buffer. If a poll finds the buffer fuller than the
+    target, the period is shortened and then relaxed back to nominal.
+    Deadlines advance on a fixed perf_counter grid so sleep overshoot does
+    not accumulate.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float,
+        num_channels: int,
+        buffer_size: int,
+        target_fill: float = 0.25,
+        min_period: float = 0.001,
+        max_period: float = 0.05
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            sample_rate: Sampling rate in Hz per channel
+            num_channels: Number of scanned channels
+            buffer_size: Size of circular buffer in samples per channel
+            target_fill: Buffer fill fraction to stay below between polls
+            min_period: Shortest poll period in seconds
+            max_period: Longest poll period in seconds
+        """
+        self.target_fill = target_fill
+        self.min_period = min_period
+        self.max_period = max_period
+
+        # Time for the scan to fill target_fill of the buffer
+        values_per_second = sample_rate * num_channels
+        fill_time = target_fill * buffer_size * num_channels / values_per_second
+        self.nominal_period = min(max(fill_time, min_period), max_period)
+        self.period = self.nominal_period
+
+        self.wake_event = threading.Event()
+        self.reset()
+
+    def reset(self):
+        """Restart the deadline grid and clear statistics."""
+        self.period = self.nominal_period
+        self.deadline = time.perf_counter() + self.period
+        self.polls = 0
+        self.missed_deadlines = 0
+        self.jitter_sum = 0.0
+        self.jitter_sq_sum = 0.0
+        self.jitter_max = 0.0
+        self.fill = 0.0
+        self.fill_max = 0.0
+        self.wake_event.clear()
+
+    def wait(self):
+        """Sleep until the next poll deadline (or an early wake-up) and advance it."""
+        now = time.perf_counter()
+        if self.deadline > now:
+            self.wake_event.wait(self.deadline - now)
+            self.wake_event.clear()
+            now = time.perf_counter()
+
+        # Positive jitter is lateness relative to the deadline
+        jitter = max(now - self.deadline, 0.0)
+        self.polls += 1
+        self.jitter_sum += jitter
+        self.jitter_sq_sum += jitter * jitter
+        self.jitter_max = max(self.jitter_max, jitter)
+
+        self.deadline += self.period
+        if self.deadline <= now:
+            # Fell behind by more than a period: resync instead of bursting
+            self.missed_deadlines += 1
+            self.deadline = now + self.period
+
+    def wake(self):
+        """Wake the waiting loop early (e.g. from a driver data event)."""
+        self.wake_event.set()
+
+    def record_fill(self, fill: float):
+        """
+        Record buffer fill observed at a poll and adapt the period.
+
+        Args:
+            fill: Fraction of the circular buffer holding unread data
+        """
+        self.fill = fill
+        self.fill_max = max(self.fill_max, fill)
+
+        if fill > self.target_fill:
+            self.period = max(self.period / 2, self.min_period)
+        elif self.period < self.nominal_period:
+            self.period = min(self.period * 1.1, self.nominal_period)
+
+    def get_statistics(self) -> dict:
+        """Get poll timing and buffer fill statistics."""
+        mean = self.jitter_sum / self.polls if self.polls else 0.0
+        variance = self.jitter_sq_sum / self.polls - mean * mean if self.polls else 0.0
+        return {
+            'poll_period_s': self.period,
+            'nominal_period_s': self.nominal_period,
+            'polls': self.polls,
+            'missed_deadlines': self.missed_deadlines,
+            'jitter_mean_s': mean,
+            'jitter_std_s': math.sqrt(max(variance, 0.0)),
+            'jitter_max_s': self.jitter_max,
+            'fill': self.fill,
+            'fill_max': self.fill_max,
+        }
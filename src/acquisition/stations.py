@@ -0,0 +1,360 @@
+"""Several test stations (board, sensors, specimen) acquired in one process."""
+
+import copy
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Callable, Dict, List
+
+import numpy as np
+
+from .mcc_daq import MCCDataAcquisition, daq_options
+from .sample_block import SampleBlock
+from ..processing.calibration import CalibrationManager
+from ..processing.mechanics import MechanicsCalculator
+from ..processing.pipeline import BlockSink, CallbackSink, Pipeline, PipelineData, standard_stages
+from ..logging.hdf5_logger import HDF5Logger
+from ..logging.live_tap import live_tap_from_config
+from ..utils.buffers import BlockRing
+
+
+# callback(station, raw, engineering, mechanics)
+StationCallback = Callable[['Station', SampleBlock, SampleBlock, SampleBlock], None]
+
+
+def merge_config(base: dict, override: dict) -> dict:
+    """Deep-merge override into a copy of base."""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+class Station:
+    """
+    One load frame: DAQ board, channel map, calibration, mechanics and logger.
+
+    The acquisition thread only copies blocks into the station's ring; the
+    processing (calibration, mechanics, logging) runs on a shared thread pool,
+    at most one task per station at a time so blocks stay in order.
+    """
+
+    def __init__(self, name: str, config: dict, base_dir: str = "data"):
+        """
+        Initialize station.
+
+        Args:
+            name: Station name (also the data subdirectory)
+            config: Full configuration dict (as in config/specimen.yaml)
+            base_dir: Base directory for data files
+        """
+        self.name = name
+        self.config = config
+        acq_config = config['acquisition']
+
+        self.calibration = CalibrationManager(config)
+        self.mechanics = MechanicsCalculator(
+            cross_section_area=config['specimen']['cross_section_area'],
+            gauge_length=config['specimen']['gauge_length']
+        )
+        self.logger = HDF5Logger(
+            os.path.join(base_dir, name),
+            store_time=config.get('logging', {}).get('store_time', True)
+        )
+        self.live_tap = live_tap_from_config(config)
+        self.daq = MCCDataAcquisition(**daq_options(acq_config))
+        self.daq.set_data_callback(self._enqueue)
+
+        # The station callback is the pipeline's display sink
+        stages = standard_stages(config, self.calibration, self.mechanics)
+        stages['logger'] = BlockSink('logger', self.logger)
+        stages['live_tap'] = BlockSink('live_tap', self.live_tap) if self.live_tap else None
+        stages['display'] = CallbackSink('display', self._on_processed)
+        self.pipeline = Pipeline.from_config(config, stages)
+
+        self.queue_policy = acq_config.get('queue_policy') or 'drop-oldest'
+        self.queue_seconds = acq_config.get('queue_seconds', 10.0)
+        self.ring: Optional[BlockRing] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.lock = threading.Lock()
+        self.scheduled = False
+        self.data_callback: Optional[StationCallback] = None
+
+        self.blocks_processed = 0
+        self.samples_processed = 0
+        self.processing_time = 0.0
+        self.max_lag = 0.0
+        self.processing_errors = 0
+        self.error: Optional[Exception] = None  # First processing error of the session
+
+    def set_data_callback(self, callback: StationCallback):
+        """
+        Set callback for processed data (called from a pool thread).
+
+        Callback signature: callback(station, raw, engineering, mechanics)
+
+        The engineering and mechanics data live in buffers reused for the
+        next block; copy them to keep them. With decimation they have fewer
+        samples than raw (see their sample_rate and start_index).
+        """
+        self.data_callback = callback
+
+    def start(
+        self,
+        executor: ThreadPoolExecutor,
+        time_origin: float,
+        metadata: Optional[Dict] = None
+    ):
+        """
+        Start a logger session and acquisition.
+
+        Args:
+            executor: Shared processing thread pool
+            time_origin: Common time.perf_counter() origin for block times
+            metadata: Session metadata
+        """
+        daq = self.daq
+        capacity = max(int(daq.sample_rate * self.queue_seconds), daq.max_block_size)
+        self.ring = BlockRing(
+            daq.num_channels, capacity, policy=self.queue_policy,
+            dtype=getattr(daq.backend, 'dtype', np.float64)
+        )
+        self.executor = executor
+        self.scheduled = False
+        self.blocks_processed = 0
+        self.samples_processed = 0
+        self.processing_time = 0.0
+        self.max_lag = 0.0
+        self.processing_errors = 0
+        self.error = None
+        self.pipeline.reset()
+
+        session_metadata = dict(metadata or {})
+        session_metadata.update({
+            'station': self.name,
+            'board_num': daq.board_num,
+            'sample_rate_Hz': daq.sample_rate,
+        })
+        self.logger.start_session(session_metadata, raw_scale=daq.raw_scale)
+        if self.live_tap:
+            self.live_tap.start()
+        daq.start(time_origin=time_origin)
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop acquisition, finish processing queued blocks and end the session.
+
+        Args:
+            timeout: Longest wait in seconds for queued blocks to be processed
+
+        Raises:
+            RuntimeError: If any block failed processing (from the first error)
+        """
+        self.daq.stop()
+
+        # Let the pool finish this station's queued blocks
+        deadline = time.perf_counter() + timeout
+        while True:
+            with self.lock:
+                if not self.scheduled and len(self.ring) == 0:
+                    break
+            if time.perf_counter() > deadline:
+                print(f"WARNING: Station {self.name}: {len(self.ring)} queued blocks "
+                      f"not processed within {timeout} s")
+                break
+            time.sleep(0.005)
+
+        self.logger.end_session()
+        if self.error is not None:
+            raise RuntimeError(
+                f"Station {self.name}: {self.processing_errors} blocks failed processing"
+            ) from self.error
+
+    def close(self):
+        """Release the DAQ, close the data file and the live tap."""
+        self.daq.close()
+        self.logger.close()
+        if self.live_tap:
+            self.live_tap.close()
+
+    def _enqueue(self, block: SampleBlock):
+        """Queue a block for processing (acquisition thread)."""
+        self.ring.push(block)
+        with self.lock:
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self.executor.submit(self._process_queued)
+
+    def _process_queued(self):
+        """Process queued blocks until the ring is empty (pool thread)."""
+        finished = False
+        try:
+            while True:
+                blocks = self.ring.drain()
+                if not blocks:
+                    with self.lock:
+                        # Checked under the lock so a concurrent _enqueue either sees
+                        # this task still scheduled or schedules a new one
+                        if len(self.ring) == 0:
+                            self.scheduled = False
+                            finished = True
+                            return
+                    continue
+
+                for block in blocks:
+                    try:
+                        self._process(block)
+                    except Exception as error:
+                        # Skip the block; stop() re-raises the first error
+                        self.processing_errors += 1
+                        if self.error is None:
+                            self.error = error
+                            print(f"ERROR: Station {self.name}: processing block "
+                                  f"{block.sequence} failed: {error!r}")
+        finally:
+            if not finished:
+                # Nothing would schedule processing again otherwise
+                with self.lock:
+                    self.scheduled = False
+
+    def _process(self, block: SampleBlock):
+        """Run one block through the processing pipeline."""
+        start = time.perf_counter()
+
+        self.pipeline.process(block)
+
+        end = time.perf_counter()
+        self.processing_time += end - start
+        self.blocks_processed += 1
+        self.samples_processed += block.num_samples
+
+        # Delay from the end of the block's acquisition to the end of its processing
+        lag = end - self.daq.start_time - (block.end_time - self.daq.time_offset)
+        self.max_lag = max(self.max_lag, lag)
+
+    def _on_processed(self, data: PipelineData):
+        """Display sink: pass the block to the station callback."""
+        if self.data_callback:
+            self.data_callback(self, data.raw, data.engineering, data.mechanics)
+
+    def get_statistics(self) -> dict:
+        """Get processing, queue and acquisition loss statistics."""
+        stats = {
+            'blocks_processed': self.blocks_processed,
+            'samples_processed': self.samples_processed,
+            'processing_time_s': self.processing_time,
+            'max_lag_s': self.max_lag,
+            'processing_errors': self.processing_errors,
+            'time_offset_s': self.daq.time_offset,
+        }
+        if self.ring is not None:
+            stats.update(self.ring.get_statistics())
+        stats.update(self.daq.get_gap_statistics())
+        stats['pipeline'] = self.pipeline.get_statistics()
+        return stats
+
+
+class StationManager:
+    """
+    Drives several stations concurrently in one process.
+
+    Each station has its own acquisition thread; processing shares one
+    thread pool. All stations are started against a common time origin, so
+    block times (and the logged time datasets) are directly comparable
+    across stations.
+    """
+
+    def __init__(self, stations: List[Station], workers: Optional[int] = None):
+        """
+        Initialize manager.
+
+        Args:
+            stations: Stations to drive
+            workers: Processing threads (default: one per station, up to the CPU count)
+        """
+        self.stations = stations
+        self.workers = workers or min(len(stations), os.cpu_count() or 1)
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.time_origin = 0.0
+        self.running = False
+
+    @classmethod
+    def from_config(
+        cls,
+        config: dict,
+        base_dir: str = "data",
+        workers: Optional[int] = None
+    ) -> 'StationManager':
+        """
+        Create stations from the 'stations' list of a configuration.
+
+        Each entry has a 'name' and overrides (e.g. 'acquisition',
+        'calibration', 'specimen') merged into the rest of the configuration.
+
+        Args:
+            config: Full configuration dict
+            base_dir: Base directory for data files
+            workers: Processing threads
+
+        Returns:
+            StationManager
+        """
+        base = {key: value for key, value in config.items() if key != 'stations'}
+        stations = []
+        for i, entry in enumerate(config.get('stations') or [{}]):
+            overrides = {key: value for key, value in entry.items() if key != 'name'}
+            name = entry.get('name', f"station_{i + 1}")
+            stations.append(Station(name, merge_config(base, overrides), base_dir))
+        return cls(stations, workers)
+
+    def start(self, metadata: Optional[Dict] = None):
+        """Start all stations on a common time origin."""
+        if self.running:
+            print("Stations already running")
+            return
+
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='station')
+        self.time_origin = time.perf_counter()
+        session_metadata = dict(metadata or {})
+        session_metadata['time_origin'] = datetime.now().isoformat()
+
+        for station in self.stations:
+            station.start(self.executor, self.time_origin, session_metadata)
+        self.running = True
+        print(f"Started {len(self.stations)} stations with {self.workers} processing threads")
+
+    def stop(self):
+        """Stop all stations and wait for queued processing."""
+        if not self.running:
+            return
+
+        errors = []
+        for station in self.stations:
+            try:
+                station.stop()
+            except RuntimeError as error:
+                errors.append(error)
+        self.executor.shutdown(wait=True)
+        self.executor = None
+        self.running = False
+        print("Stations stopped")
+        if errors:
+            raise errors[0]
+
+    def close(self):
+        """Stop all stations and release their resources."""
+        try:
+            self.stop()
+        finally:
+            for station in self.stations:
+                station.close()
+
+    def get_statistics(self) -> Dict[str, dict]:
+        """Get statistics per station name."""
+        return {station.name: station.get_statistics() for station in self.stations}
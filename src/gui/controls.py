@@ -150,7 +150,10 @@ Current Strain: {current_strain:.4f}
             if yield_data['stress_MPa'] is not None:
                 text += f"YIELD POINT:\n"
                 text += f"  Stress: {yield_data['stress_MPa']:.2f} MPa\n"
-                text += f"  Strain: {yield_data['strain']:.4f}\n\n"
+                text += f"  Strain: {yield_data['strain']:.4f}\n"
+                if yield_data.get('after_gap'):
+                    text += "  (first sample after a data gap)\n"
+                text += "\n"
 
         if 'ultimate' in results:
             uts = results['ultimate']
@@ -162,7 +165,10 @@ Current Strain: {current_strain:.4f}
             fracture = results['fracture']
             text += f"FRACTURE:\n"
             text += f"  Stress: {fracture['stress_MPa']:.2f} MPa\n"
-            text += f"  Strain: {fracture['strain']:.4f}\n\n"
+            text += f"  Strain: {fracture['strain']:.4f}\n"
+            if fracture.get('after_gap'):
+                text += "  (first sample after a data gap)\n"
+            text += "\n"
 
         if 'plastic' in results:
             plastic = results['plastic']
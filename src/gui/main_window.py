@@ -9,12 +9,16 @@ import numpy as np
 import yaml
 from typing import Optional
 
-from ..acquisition.mcc_daq import MCCDataAcquisition
+from ..acquisition.mcc_daq import MCCDataAcquisition, daq_options
+from ..acquisition.process_daq import ProcessDataAcquisition
 from ..processing.calibration import CalibrationManager
-from ..processing.mechanics import MechanicsCalculator
+from ..processing.mechanics import MechanicsCalculator, RollingModulus
 from ..processing.analysis import RegionAnalysis
+from ..processing.pipeline import BlockSink, CallbackSink, Pipeline, PipelineData, standard_stages
 from ..logging.hdf5_logger import HDF5Logger
+from ..logging.live_tap import live_tap_from_config
 from ..utils.buffers import RollingBuffer
+from ..utils.session_store import SessionStore, SpillingSessionStore
 from .plots import ForcePlot, DisplacementPlot, StressStrainPlot, YoungsModulusPlot
 from .controls import ControlPanel, MetricsDisplay
 
@@ -22,6 +26,12 @@ from .controls import ControlPanel, MetricsDisplay
 class MainWindow(QMainWindow):
     """Main application window for tensile testing platform."""
 
+    MAX_PLOT_POINTS = 200000  # Session plots are decimated beyond this
+    MODULUS_WINDOW = 100      # Samples per rolling Young's modulus fit
+    DISPLAY_TIME = 120        # Seconds shown by the time-series plots
+    PLOT_COLUMNS = (('time', np.float64), ('stress', np.float64), ('strain', np.float64),
+                    ('youngs', np.float64))
+
     def __init__(self, config_path: str):
         super().__init__()
 
@@ -39,35 +49,56 @@ class MainWindow(QMainWindow):
             cross_section_area=self.config['specimen']['cross_section_area'],
             gauge_length=self.config['specimen']['gauge_length']
         )
+        self.modulus = RollingModulus(window_size=self.MODULUS_WINDOW)
         self.analysis = RegionAnalysis()
-        self.logger = HDF5Logger()
+        self.logger = HDF5Logger(store_time=self.config.get('logging', {}).get('store_time', True))
+        self.live_tap = live_tap_from_config(self.config)
+        if self.live_tap:
+            self.live_tap.start()
 
         # Initialize DAQ
         acq_config = self.config['acquisition']
-        self.daq = MCCDataAcquisition(
-            board_num=acq_config['board_num'],
-            low_chan=acq_config['channels']['load'],
-            high_chan=acq_config['channels']['displacement'],
-            sample_rate=acq_config['sample_rate'],
-            buffer_size=acq_config['buffer_size'],
-            voltage_range=acq_config['voltage_range']
-        )
-        self.daq.set_data_callback(self._on_new_data)
+        daq_kwargs = daq_options(acq_config)
+        if acq_config.get('out_of_process', False):
+            self.daq = ProcessDataAcquisition(
+                queue_policy=acq_config.get('queue_policy') or 'drop-oldest',
+                **daq_kwargs
+            )
+        else:
+            self.daq = MCCDataAcquisition(
+                queue_policy=acq_config.get('queue_policy'),
+                **daq_kwargs
+            )
+
+        # Processing pipeline; the window is its display sink
+        stages = standard_stages(self.config, self.calibration, self.mechanics, self.modulus)
+        stages['logger'] = BlockSink('logger', self.logger)
+        stages['live_tap'] = BlockSink('live_tap', self.live_tap) if self.live_tap else None
+        stages['display'] = CallbackSink('display', self._on_processed)
+        self.pipeline = Pipeline.from_config(self.config, stages)
+        print(f"Processing pipeline: {' -> '.join(self.pipeline.names)}")
+        self.daq.set_data_callback(self.pipeline.process)
 
-        # Data storage
-        display_time = 120  # 120 seconds display window
-        buffer_size = acq_config['sample_rate'] * display_time
-        self.display_buffer = RollingBuffer(maxlen=buffer_size)
+        # Data storage, at the processed (possibly decimated) rate
+        processed_rate = self._processed_rate()
+        self.display_buffer = RollingBuffer(maxlen=processed_rate * self.DISPLAY_TIME)
 
         # Full session data (for analysis)
-        self.session_time = []
-        self.session_ch0 = []
-        self.session_ch1 = []
-        self.session_force = []
-        self.session_displacement = []
-        self.session_stress = []
-        self.session_strain = []
-        self.session_youngs = []
+        session_config = self.config.get('session') or {}
+        if session_config.get('spill', False):
+            self.session = SpillingSessionStore(
+                directory=session_config.get('spill_dir'),
+                memory_budget=int(session_config.get('memory_budget_mb', 256) * 2**20)
+            )
+        else:
+            self.session = SessionStore(capacity=processed_rate * 60)
+        self.session_breaks = []  # Session index of the first sample after each gap
+
+        # Decimated copy of the session for the stress-strain and modulus plots,
+        # extended with the samples appended since the previous refresh
+        self.plot_history = SessionStore(self.PLOT_COLUMNS)
+        self.plot_step = 1  # Session samples per plotted point
+        self.plot_read = 0  # Session samples already taken into the plot history
 
         print("Initializing UI...")
         self._init_ui()
@@ -140,19 +171,29 @@ class MainWindow(QMainWindow):
 
         main_layout.addWidget(main_splitter)
 
+    def _processed_rate(self) -> int:
+        """Samples per second reaching the display sink (the DAQ rate after decimation)."""
+        decimation = int((self.config.get('decimation') or {}).get('factor', 1))
+        return max(int(self.daq.sample_rate) // decimation, 1)
+
     def _on_start(self):
         """Handle start button click."""
         print("\n>>> START button clicked <<<")
+        if isinstance(self.daq, ProcessDataAcquisition):
+            # The child process reports its backend's rate and raw scale once the DAQ is open
+            self.daq.prepare()
+        buffer_size = self._processed_rate() * self.DISPLAY_TIME
+        if buffer_size != self.display_buffer.maxlen:
+            self.display_buffer = RollingBuffer(maxlen=buffer_size)
+
         # Clear previous data
         self.display_buffer.clear()
-        self.session_time = []
-        self.session_ch0 = []
-        self.session_ch1 = []
-        self.session_force = []
-        self.session_displacement = []
-        self.session_stress = []
-        self.session_strain = []
-        self.session_youngs = []
+        self.session.clear(release=True)
+        self.pipeline.reset()
+        self.session_breaks = []  # Session index of the first sample after each gap
+        self.plot_history.clear(release=True)
+        self.plot_step = 1
+        self.plot_read = 0
 
         # Clear plots
         self.force_plot.clear()
@@ -166,9 +207,9 @@ class MainWindow(QMainWindow):
             'material': self.config['specimen'].get('material', 'Unknown'),
             'cross_section_area_mm2': self.config['specimen']['cross_section_area'],
             'gauge_length_mm': self.config['specimen']['gauge_length'],
-            'sample_rate_Hz': self.config['acquisition']['sample_rate']
+            'sample_rate_Hz': self.daq.sample_rate
         }
-        self.logger.start_session(metadata)
+        self.logger.start_session(metadata, raw_scale=self.daq.raw_scale)
 
         # Start acquisition
         self.daq.start()
@@ -181,23 +222,26 @@ class MainWindow(QMainWindow):
         self.daq.stop()
         self.control_panel.set_running_state(False)
 
+        for name, stats in self.pipeline.get_statistics().items():
+            print(f"  {name:<12s} {stats['mean_us']:8.1f} us/block (max {stats['max_us']:.1f}), "
+                  f"{stats['allocations']} allocations")
+
         # End logger session (will be analyzed later if user clicks analyze)
         self.logger.end_session()
 
     def _on_analyze(self):
         """Handle analyze button click - perform post-test analysis."""
         print("\n>>> ANALYZE button clicked <<<")
-        if len(self.session_stress) < 50:
+        if len(self.session) < 50:
             self.metrics_display.analysis_text.setText("Insufficient data for analysis")
             return
 
-        # Convert to numpy arrays
-        stress = np.array(self.session_stress)
-        strain = np.array(self.session_strain)
-        force = np.array(self.session_force)
+        stress, strain, force = (
+            np.asarray(column) for column in self.session.columns('stress', 'strain', 'force')
+        )
 
         # Perform analysis
-        results = self.analysis.analyze(stress, strain, force)
+        results = self.analysis.analyze(stress, strain, force, breaks=self.session_breaks)
 
         # Display results
         self.metrics_display.update_analysis_results(results)
@@ -206,56 +250,47 @@ class MainWindow(QMainWindow):
         if 'error' not in results:
             self.stress_strain_plot.add_region_markers(results, strain)
 
-    def _on_new_data(self, time: np.ndarray, ch0: np.ndarray, ch1: np.ndarray):
+    def _on_processed(self, data: PipelineData):
         """
-        Callback for new data from DAQ.
+        Display sink of the processing pipeline (processing thread).
 
         Args:
-            time: Time array
-            ch0: Channel 0 voltage (load cell)
-            ch1: Channel 1 voltage (displacement)
+            data: Raw block and its engineering, mechanics and modulus products
         """
-        # Convert to engineering units
-        force = self.calibration.convert_load(ch0)
-        displacement = self.calibration.convert_displacement(ch1)
-
-        # Calculate stress and strain
-        stress = self.mechanics.calculate_stress(force)
-        strain = self.mechanics.calculate_strain(displacement)
-
-        # Calculate Young's modulus (rolling)
-        if len(self.session_stress) > 0:
-            combined_stress = np.concatenate([self.session_stress, stress])
-            combined_strain = np.concatenate([self.session_strain, strain])
-            youngs = self.mechanics.calculate_youngs_modulus(
-                combined_stress, combined_strain, window_size=100
-            )
-            # Only keep the new values
-            youngs = youngs[-len(stress):]
-        else:
-            youngs = np.full(len(stress), np.nan)
-
-        # Store in session data
-        self.session_time.extend(time)
-        self.session_ch0.extend(ch0)
-        self.session_ch1.extend(ch1)
-        self.session_force.extend(force)
-        self.session_displacement.extend(displacement)
-        self.session_stress.extend(stress)
-        self.session_strain.extend(strain)
-        self.session_youngs.extend(youngs)
+        block = data.raw
+        force, displacement = data.engineering.data
+        stress, strain = data.mechanics.data
+        youngs = data.youngs if data.youngs is not None else np.full(len(force), np.nan)
+        time = data.engineering.time
+
+        if block.gap:
+            print(f"WARNING: {block.gap} samples lost before t = {block.t0:.3f} s")
+            self.session_breaks.append(len(self.session))
+        for kind, sample_index, value in data.events:
+            if kind == 'fracture':
+                t = block.t0 + (sample_index - block.start_index) / block.sample_rate
+                print(f"Fracture detected at t = {t:.3f} s (force {value:.1f} N)")
+
+        # Store in session data (at the processed rate, so decimated volts if decimating)
+        sensors = block if data.sensors.sample_rate == block.sample_rate else data.sensors
+        volts = sensors.volts()
+        self.session.extend(
+            time=time,
+            ch0=volts[self.calibration.load_row],
+            ch1=volts[self.calibration.displacement_row],
+            force=force,
+            displacement=displacement,
+            stress=stress,
+            strain=strain,
+            youngs=youngs
+        )
 
         # Update display buffer
         self.display_buffer.extend(time, force, displacement)
 
-        # Log data
-        self.logger.append_data(
-            time, ch0, ch1, force, displacement, stress, strain
-        )
-
     def _update_plots(self):
         """Update all plots with current data (called by timer)."""
-        if len(self.session_time) == 0:
+        if len(self.session) == 0:
             return
 
         # Get display buffer data
@@ -266,35 +301,64 @@ class MainWindow(QMainWindow):
             self.force_plot.update(time, force)
             self.displacement_plot.update(time, displacement)
 
-        # Update stress-strain and Young's modulus with session data
-        if len(self.session_stress) > 0:
-            stress_arr = np.array(self.session_stress)
-            strain_arr = np.array(self.session_strain)
-            time_arr = np.array(self.session_time)
-            youngs_arr = np.array(self.session_youngs)
-
-            self.stress_strain_plot.update(strain_arr, stress_arr)
-            self.youngs_plot.update(time_arr, youngs_arr)
-
-            # Update real-time metrics
-            current_idx = -1
-            youngs_val = youngs_arr[current_idx] if not np.isnan(youngs_arr[current_idx]) else None
-
-            self.metrics_display.update_realtime_metrics(
-                current_force=self.session_force[current_idx],
-                current_displacement=self.session_displacement[current_idx],
-                current_stress=stress_arr[current_idx],
-                current_strain=strain_arr[current_idx],
-                youngs_modulus=youngs_val
-            )
+        # Read only the session samples appended since the previous refresh
+        columns = self.session.columns('time', 'force', 'displacement', 'stress', 'strain', 'youngs')
+        start, end = self.plot_read, len(columns[0])
+        if end <= start:
+            return
+        new = tuple(column[start:end] for column in columns)
+        time_new, _, _, stress_new, strain_new, youngs_new = new
+        self.plot_read = end
+
+        # Update stress-strain and Young's modulus from the decimated history
+        self._extend_plot_history(start, time=time_new, stress=stress_new,
+                                  strain=strain_new, youngs=youngs_new)
+        time_arr, stress_arr, strain_arr, youngs_arr = self.plot_history.columns()
+        self.stress_strain_plot.update(strain_arr, stress_arr)
+        self.youngs_plot.update(time_arr, youngs_arr)
+
+        # Update real-time metrics from the newest sample
+        _, force, displacement, stress, strain, youngs = (column[-1] for column in new)
+        youngs_val = youngs if not np.isnan(youngs) else None
+
+        self.metrics_display.update_realtime_metrics(
+            current_force=force,
+            current_displacement=displacement,
+            current_stress=stress,
+            current_strain=strain,
+            youngs_modulus=youngs_val
+        )
+
+    def _extend_plot_history(self, start: int, **values: np.ndarray):
+        """
+        Append new session samples to the plot history on its stride.
+
+        The history holds session samples 0, step, 2*step, ...; when it
+        exceeds MAX_PLOT_POINTS every other point is dropped and the step
+        doubles, so each sample is decimated once rather than on every refresh.
+
+        Args:
+            start: Session index of the first new sample
+            **values: New samples of each plot column
+        """
+        offset = -start % self.plot_step  # First new sample on the stride
+        self.plot_history.extend(**{name: array[offset::self.plot_step] for name, array in values.items()})
+        if len(self.plot_history) > self.MAX_PLOT_POINTS:
+            kept = {name: column[::2].copy() for name, column in zip(
+                self.plot_history.names, self.plot_history.columns())}
+            self.plot_history.clear()
+            self.plot_history.extend(**kept)
+            self.plot_step *= 2
 
     def closeEvent(self, event):
         """Handle window close event."""
-        # Stop acquisition if running
-        if self.daq.is_running():
-            self.daq.stop()
+        # Stop acquisition and release the scan buffer
+        self.daq.close()
 
-        # Close logger
+        # Close logger, live tap and session storage
         self.logger.close()
+        if self.live_tap:
+            self.live_tap.close()
+        self.session.close()
 
         event.accept()
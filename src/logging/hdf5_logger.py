@@ -3,38 +3,180 @@
 import h5py
 import numpy as np
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 import os
 
+from ..acquisition.clock import ClockModel
+from ..acquisition.sample_block import SampleBlock
+
+
+def read_raw_voltage(session: h5py.Group, channel: int) -> np.ndarray:
+    """
+    Read a raw channel of a session in volts.
+
+    Args:
+        session: Session group
+        channel: Raw channel number (0 or 1)
+
+    Returns:
+        Voltage array (scaled from counts if the session stored raw counts)
+    """
+    raw_group = session['raw_data']
+    if f'ch{channel}_counts' in raw_group:
+        dataset = raw_group[f'ch{channel}_counts']
+        return dataset[:] * dataset.attrs['scale_V_per_count'] + dataset.attrs['offset_V']
+    return raw_group[f'ch{channel}_voltage'][:]
+
+
+def read_gaps(session: h5py.Group) -> np.ndarray:
+    """
+    Read the gap index of a session.
+
+    Args:
+        session: Session group
+
+    Returns:
+        Array of shape (n, 3) with rows (row, start_sample, length): the
+        dataset row of the first sample after the gap, the sample index of
+        the first lost sample and the number of lost samples
+    """
+    if 'gaps' not in session:
+        return np.empty((0, 3), dtype=np.int64)
+    return session['gaps'][:]
+
+
+def read_processed_rows(session: h5py.Group):
+    """
+    Get the raw data rows matching the processed data rows.
+
+    Processed data of a decimated session holds the (filtered) samples whose
+    raw sample index is a multiple of the decimation factor.
+
+    Args:
+        session: Session group
+
+    Returns:
+        Index array of raw rows, or slice(None) if both have the same rate
+    """
+    factor = int(session.attrs.get('decimation_factor', 1))
+    if factor == 1:
+        return slice(None)
+    index = read_sample_index(session)
+    return np.flatnonzero(index % factor == 0)[:len(session['processed_data/force_N'])]
+
+
+def read_sample_index(session: h5py.Group, processed: bool = False) -> np.ndarray:
+    """
+    Reconstruct the hardware sample index of each stored row.
+
+    Args:
+        session: Session group
+        processed: Rows of the processed data (default: raw data)
+
+    Returns:
+        int64 array of sample indices (rows are contiguous except at gaps),
+        at the raw sample rate
+    """
+    raw_group = session['raw_data']
+    count = len(raw_group[next(iter(raw_group))])
+    index = np.arange(count, dtype=np.int64) + int(session.attrs.get('first_sample_index', 0))
+
+    gaps = read_gaps(session)
+    if len(gaps):
+        increments = np.zeros(count + 1, dtype=np.int64)
+        np.add.at(increments, gaps[:, 0], gaps[:, 2])
+        index += np.cumsum(increments[:count])
+    if processed:
+        return index[read_processed_rows(session)]
+    return index
+
+
+def read_time(session: h5py.Group, clock: str = 'nominal', processed: bool = False) -> np.ndarray:
+    """
+    Read or reconstruct the time of each stored row.
+
+    Args:
+        session: Session group
+        clock: 'nominal' (sample index / sample rate, as logged live),
+            'monotonic' (drift-corrected seconds on the host monotonic clock,
+            same origin as nominal) or 'wall' (seconds since the Unix epoch)
+        processed: Rows of the processed data (default: raw data)
+
+    Returns:
+        Time array in seconds
+    """
+    if clock == 'nominal' and 'time' in session:
+        time = session['time'][:]
+        return time[read_processed_rows(session)] if processed else time
+
+    index = read_sample_index(session, processed)
+    sample_rate = float(session.attrs['sample_rate_Hz'])
+    time_offset = float(session.attrs.get('time_offset_s', 0.0))
+    if clock == 'nominal':
+        return time_offset + index / sample_rate
+
+    anchors = session['clock_anchors'][:] if 'clock_anchors' in session else []
+    if len(anchors) == 0:
+        raise ValueError("Session has no clock anchors")
+    model = ClockModel(anchors, sample_rate)
+    if clock == 'monotonic':
+        return time_offset + model.to_seconds(index)
+    if clock == 'wall':
+        return model.to_wall_ns(index) * 1e-9
+    raise ValueError(f"Unknown clock '{clock}', expected 'nominal', 'monotonic' or 'wall'")
 
-class HDF5Logger:
-    """Manages HDF5 file logging for tensile test data."""
 
-    def __init__(self, base_dir: str = "data"):
+class HDF5Logger:
+    """
+    Manages HDF5 file logging for tensile test data.
+
+    Time and raw data are stored at the acquisition rate. Processed data
+    has the rate of the processed blocks, lower when the pipeline decimates;
+    the session attributes sample_rate_Hz, processed_sample_rate_Hz and
+    decimation_factor record both (see read_processed_rows()).
+    """
+
+    # Dataset paths within a session, in buffer row order: raw rows, then processed
+    DATASETS = (
+        'time',
+        'raw_data/ch0_voltage',
+        'raw_data/ch1_voltage',
+        'processed_data/force_N',
+        'processed_data/displacement_mm',
+        'processed_data/stress_MPa',
+        'processed_data/strain',
+    )
+
+    def __init__(self, base_dir: str = "data", store_time: bool = True):
         """
         Initialize logger.
 
         Args:
             base_dir: Base directory for data files
+            store_time: Store the time dataset; if False it is reconstructed
+                on read from the sample index (see read_time())
         """
         self.base_dir = base_dir
+        self.store_time = store_time
         self.file_path: Optional[str] = None
         self.file: Optional[h5py.File] = None
         self.session_group: Optional[h5py.Group] = None
         self.session_num = 0
         self.session_active = False
+        self.stored_samples = 0
+        self.datasets = self.DATASETS
+        self.raw_scale: Optional[Tuple[float, float]] = None
 
         # Create data directory if needed
         os.makedirs(base_dir, exist_ok=True)
 
-        # Data buffers
-        self.time_buffer = []
-        self.ch0_voltage_buffer = []
-        self.ch1_voltage_buffer = []
-        self.force_buffer = []
-        self.displacement_buffer = []
-        self.stress_buffer = []
-        self.strain_buffer = []
+        # Data buffers: lists of (3, n) raw and (4, m) processed arrays in dataset order
+        self.stored_processed = 0
+        self.pending_raw = []
+        self.pending_processed = []
+        self.pending_samples = 0
+        self.pending_gaps = []  # (row, start sample, length) of gaps in pending data
+        self.pending_anchors = []  # (sample_index, monotonic_ns, wall_ns)
 
     def create_file(self, metadata: Optional[Dict] = None):
         """
@@ -58,12 +200,18 @@ class HDF5Logger:
 
         print(f"Created HDF5 file: {self.file_path}")
 
-    def start_session(self, metadata: Optional[Dict] = None):
+    def start_session(
+        self,
+        metadata: Optional[Dict] = None,
+        raw_scale: Optional[Tuple[float, float]] = None
+    ):
         """
         Start new session within the file.
 
         Args:
             metadata: Optional session metadata
+            raw_scale: If set, (volts per count, volts at count zero) and raw
+                channels are stored as 16-bit counts instead of float64 volts
         """
         if self.file is None:
             self.create_file()
@@ -79,14 +227,39 @@ class HDF5Logger:
                 self.session_group.attrs[key] = value
 
         # Create datasets (will be resizable)
-        self.session_group.create_dataset(
-            'time', (0,), maxshape=(None,), dtype='f8', chunks=True
-        )
+        if self.store_time:
+            self.session_group.create_dataset(
+                'time', (0,), maxshape=(None,), dtype='f8', chunks=True
+            )
 
         # Raw data group
         raw_group = self.session_group.create_group('raw_data')
-        raw_group.create_dataset('ch0_voltage', (0,), maxshape=(None,), dtype='f8', chunks=True)
-        raw_group.create_dataset('ch1_voltage', (0,), maxshape=(None,), dtype='f8', chunks=True)
+        self.raw_scale = raw_scale
+        if raw_scale is None:
+            self.datasets = self.DATASETS
+            raw_group.create_dataset('ch0_voltage', (0,), maxshape=(None,), dtype='f8', chunks=True)
+            raw_group.create_dataset('ch1_voltage', (0,), maxshape=(None,), dtype='f8', chunks=True)
+        else:
+            self.datasets = ('time', 'raw_data/ch0_counts', 'raw_data/ch1_counts') + self.DATASETS[3:]
+            for name in ('ch0_counts', 'ch1_counts'):
+                dataset = raw_group.create_dataset(name, (0,), maxshape=(None,), dtype='u2', chunks=True)
+                dataset.attrs['scale_V_per_count'] = raw_scale[0]
+                dataset.attrs['offset_V'] = raw_scale[1]
+                dataset.attrs['range_V'] = -raw_scale[1]
+        if not self.store_time:
+            self.datasets = (None,) + self.datasets[1:]
+
+        # Samples lost to DAQ buffer overruns
+        gaps = self.session_group.create_dataset(
+            'gaps', (0, 3), maxshape=(None, 3), dtype='i8', chunks=True
+        )
+        gaps.attrs['columns'] = 'row,start_sample,length'
+
+        # Periodic pairs of sample index and host clocks
+        anchors = self.session_group.create_dataset(
+            'clock_anchors', (0, 3), maxshape=(None, 3), dtype='i8', chunks=True
+        )
+        anchors.attrs['columns'] = 'sample_index,monotonic_ns,wall_ns'
 
         # Processed data group
         proc_group = self.session_group.create_group('processed_data')
@@ -97,6 +270,8 @@ class HDF5Logger:
 
         # Clear buffers
         self._clear_buffers()
+        self.stored_samples = 0
+        self.stored_processed = 0
         self.session_active = True
 
         print(f"Started session: {session_name}")
@@ -125,55 +300,103 @@ class HDF5Logger:
         """
         if not self.session_active or self.session_group is None:
             return
+        if not self.store_time:
+            raise ValueError("append_data() requires store_time; use append_block()")
 
-        # Add to buffers
-        self.time_buffer.extend(time)
-        self.ch0_voltage_buffer.extend(ch0_voltage)
-        self.ch1_voltage_buffer.extend(ch1_voltage)
-        self.force_buffer.extend(force)
-        self.displacement_buffer.extend(displacement)
-        self.stress_buffer.extend(stress)
-        self.strain_buffer.extend(strain)
+        raw_rows = np.vstack((time, ch0_voltage, ch1_voltage))
+        if self.raw_scale is not None:
+            raw_rows[1:3] = self._to_counts(raw_rows[1:3])
+        self._buffer(raw_rows, np.vstack((force, displacement, stress, strain)))
+
+    def append_block(
+        self,
+        raw: SampleBlock,
+        engineering: SampleBlock,
+        mechanics: SampleBlock
+    ):
+        """
+        Append one acquisition block to current session.
+
+        Args:
+            raw: Voltage or ADC counts block (ch0, ch1)
+            engineering: Block with rows (force, displacement), at the raw
+                rate or decimated
+            mechanics: Block with rows (stress, strain), same rate
+        """
+        if not self.session_active or self.session_group is None:
+            return
+
+        if self.stored_samples + self.pending_samples == 0:
+            # Time base for reconstructing time from the sample index. A gap
+            # before the first block is recorded below like any other, so
+            # the index starts where it begins
+            attrs = self.session_group.attrs
+            attrs['first_sample_index'] = raw.gap_start
+            attrs['sample_rate_Hz'] = raw.sample_rate
+            attrs['time_offset_s'] = raw.t0 - raw.start_index / raw.sample_rate
+            attrs['processed_sample_rate_Hz'] = engineering.sample_rate
+            attrs['decimation_factor'] = round(raw.sample_rate / engineering.sample_rate)
+        if raw.gap:
+            row = self.stored_samples + self.pending_samples
+            self.pending_gaps.append((row, raw.gap_start, raw.gap))
+        if raw.anchor is not None:
+            self.pending_anchors.append(raw.anchor)
+
+        raw_rows = np.empty((3, raw.num_samples))
+        raw_rows[0] = raw.time
+        if self.raw_scale is None:
+            raw_rows[1:3] = raw.volts()[:2]
+        elif raw.is_counts:
+            raw_rows[1:3] = raw.data[:2]
+        else:
+            raw_rows[1:3] = self._to_counts(raw.data[:2])
+        processed_rows = np.empty((4, engineering.num_samples))
+        processed_rows[0:2] = engineering.data
+        processed_rows[2:4] = mechanics.data
+        self._buffer(raw_rows, processed_rows)
+
+    def _buffer(self, raw_rows: np.ndarray, processed_rows: np.ndarray):
+        """Queue (3, n) raw and (4, m) processed arrays of rows for writing."""
+        self.pending_raw.append(raw_rows)
+        self.pending_processed.append(processed_rows)
+        self.pending_samples += raw_rows.shape[1]
 
         # Write to file every 100 samples
-        if len(self.time_buffer) >= 100:
+        if self.pending_samples >= 100:
             self._flush_buffers()
 
     def _flush_buffers(self):
         """Write buffered data to HDF5 file."""
-        if len(self.time_buffer) == 0:
+        if self.pending_samples == 0:
             return
 
-        # Convert buffers to arrays
-        time_arr = np.array(self.time_buffer)
-        ch0_arr = np.array(self.ch0_voltage_buffer)
-        ch1_arr = np.array(self.ch1_voltage_buffer)
-        force_arr = np.array(self.force_buffer)
-        disp_arr = np.array(self.displacement_buffer)
-        stress_arr = np.array(self.stress_buffer)
-        strain_arr = np.array(self.strain_buffer)
-
-        # Get current dataset sizes
-        current_size = len(self.session_group['time'])
-        new_size = current_size + len(time_arr)
-
-        # Resize datasets
-        self.session_group['time'].resize((new_size,))
-        self.session_group['raw_data/ch0_voltage'].resize((new_size,))
-        self.session_group['raw_data/ch1_voltage'].resize((new_size,))
-        self.session_group['processed_data/force_N'].resize((new_size,))
-        self.session_group['processed_data/displacement_mm'].resize((new_size,))
-        self.session_group['processed_data/stress_MPa'].resize((new_size,))
-        self.session_group['processed_data/strain'].resize((new_size,))
-
-        # Append data
-        self.session_group['time'][current_size:new_size] = time_arr
-        self.session_group['raw_data/ch0_voltage'][current_size:new_size] = ch0_arr
-        self.session_group['raw_data/ch1_voltage'][current_size:new_size] = ch1_arr
-        self.session_group['processed_data/force_N'][current_size:new_size] = force_arr
-        self.session_group['processed_data/displacement_mm'][current_size:new_size] = disp_arr
-        self.session_group['processed_data/stress_MPa'][current_size:new_size] = stress_arr
-        self.session_group['processed_data/strain'][current_size:new_size] = strain_arr
+        # Resize datasets and append data
+        for names, pending, current_size in (
+            (self.datasets[:3], self.pending_raw, self.stored_samples),
+            (self.datasets[3:], self.pending_processed, self.stored_processed),
+        ):
+            data = np.concatenate(pending, axis=1)
+            new_size = current_size + data.shape[1]
+            for name, row in zip(names, data):
+                if name is None:
+                    continue  # Not stored
+                dataset = self.session_group[name]
+                dataset.resize((new_size,))
+                dataset[current_size:new_size] = row
+
+        if self.pending_gaps:
+            gaps = self.session_group['gaps']
+            count = len(gaps)
+            gaps.resize((count + len(self.pending_gaps), 3))
+            gaps[count:] = self.pending_gaps
+
+        if self.pending_anchors:
+            anchors = self.session_group['clock_anchors']
+            count = len(anchors)
+            anchors.resize((count + len(self.pending_anchors), 3))
+            anchors[count:] = self.pending_anchors
+        self.stored_samples += self.pending_samples
+        self.stored_processed += sum(rows.shape[1] for rows in self.pending_processed)
 
         # Flush to disk
         self.file.flush()
@@ -216,12 +439,15 @@ class HDF5Logger:
             self.file = None
             print("Closed HDF5 file")
 
+    def _to_counts(self, voltage: np.ndarray) -> np.ndarray:
+        """Quantize volts to counts on the session's raw scale."""
+        scale, offset = self.raw_scale
+        return np.clip(np.rint((voltage - offset) / scale), 0, 65535)
+
     def _clear_buffers(self):
         """Clear all data buffers."""
-        self.time_buffer = []
-        self.ch0_voltage_buffer = []
-        self.ch1_voltage_buffer = []
-        self.force_buffer = []
-        self.displacement_buffer = []
-        self.stress_buffer = []
-        self.strain_buffer = []
+        self.pending_raw = []
+        self.pending_processed = []
+        self.pending_samples = 0
+        self.pending_gaps = []
+        self.pending_anchors = []
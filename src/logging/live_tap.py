@@ -0,0 +1,296 @@
+"""Live stream of processed blocks for external consumers over a local socket."""
+
+import json
+import os
+import socket
+import struct
+from collections import deque
+from typing import Iterator, Optional, Tuple, Union
+import numpy as np
+
+from ..acquisition.sample_block import SampleBlock
+
+
+# Frame header: magic, version, kind, num_channels, num_samples, sequence,
+# start_index, t0, sample_rate, gap. The payload follows the header: a
+# (num_channels, num_samples) row-major array for data frames, UTF-8 JSON
+# for the hello frame sent on connect.
+HEADER = struct.Struct('<4sBBHIqqddq')
+MAGIC = b'TTAP'
+VERSION = 1
+HELLO = 0
+DATA = 1
+
+CHANNELS = ('force_N', 'displacement_mm', 'stress_MPa', 'strain')
+
+Address = Union[str, Tuple[str, int]]
+
+
+class Subscriber:
+    """Connected consumer with its queue of unsent bytes."""
+
+    def __init__(self, sock: socket.socket, address):
+        self.sock = sock
+        self.address = address
+        self.pending = deque()  # memoryviews of unsent frame data
+        self.pending_bytes = 0
+        self.decimation = 1     # Send every n-th data frame
+        self.frames_seen = 0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+
+    def queue(self, frame: bytes):
+        self.pending.append(memoryview(frame))
+        self.pending_bytes += len(frame)
+
+    def flush(self):
+        """Send as much pending data as the socket takes without blocking."""
+        while self.pending:
+            chunk = self.pending[0]
+            try:
+                sent = self.sock.send(chunk)
+            except BlockingIOError:
+                return
+            self.pending_bytes -= sent
+            if sent < len(chunk):
+                self.pending[0] = chunk[sent:]
+                return
+            self.pending.popleft()
+
+
+class LiveTap:
+    """
+    Publishes processed blocks to any number of local subscribers.
+
+    Subscribers connect to a Unix domain socket (or a loopback TCP port where
+    Unix sockets are unavailable), receive a hello frame describing the
+    channels and then one data frame per block. All sockets are
+    non-blocking: publish() queues each frame and sends what the sockets
+    take, so a slow subscriber never delays the caller. A subscriber whose
+    backlog still exceeds max_backlog when its next frame is due is
+    decimated (only every 2nd, 4th, ... frame is sent, up to max_decimation,
+    recovering as the backlog drains) or, with policy 'drop', disconnected.
+    Receivers detect skipped frames from the block sequence numbers.
+    """
+
+    POLICIES = ('decimate', 'drop')
+
+    def __init__(
+        self,
+        address: Address,
+        dtype: str = 'float32',
+        max_backlog: int = 2**20,
+        policy: str = 'decimate',
+        max_decimation: int = 64
+    ):
+        """
+        Initialize tap.
+
+        Args:
+            address: Unix socket path, or (host, port) for TCP
+            dtype: Payload data type ('float32' or 'float64')
+            max_backlog: Unsent bytes per subscriber before it is decimated or dropped
+            policy: 'decimate' or 'drop' for slow subscribers
+            max_decimation: Subscribers still too slow at this decimation are dropped
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(
+                f"Unknown slow subscriber policy '{policy}', expected one of {self.POLICIES}"
+            )
+
+        self.address = tuple(address) if isinstance(address, (list, tuple)) else address
+        self.dtype = np.dtype(dtype)
+        self.max_backlog = max_backlog
+        self.policy = policy
+        self.max_decimation = max_decimation
+        self.server: Optional[socket.socket] = None
+        self.subscribers = []
+        self.frames_published = 0
+        self.subscribers_dropped = 0
+
+    @property
+    def hello(self) -> bytes:
+        """Hello frame describing the stream."""
+        payload = json.dumps({'channels': CHANNELS, 'dtype': self.dtype.str}).encode()
+        return HEADER.pack(MAGIC, VERSION, HELLO, 0, len(payload), 0, 0, 0.0, 0.0, 0) + payload
+
+    def start(self):
+        """Open the listening socket."""
+        if self.server is not None:
+            return
+
+        if isinstance(self.address, tuple):
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        else:
+            if os.path.exists(self.address):
+                os.unlink(self.address)  # Stale socket from a previous run
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.address)
+        server.listen()
+        server.setblocking(False)
+        self.server = server
+        print(f"Live tap listening on {self.address}")
+
+    def close(self):
+        """Disconnect all subscribers and close the listening socket."""
+        for subscriber in self.subscribers:
+            subscriber.sock.close()
+        self.subscribers = []
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+            if not isinstance(self.address, tuple) and os.path.exists(self.address):
+                os.unlink(self.address)
+
+    def publish(self, raw: SampleBlock, engineering: SampleBlock, mechanics: SampleBlock):
+        """
+        Send one processed block to all subscribers without blocking.
+
+        Args:
+            raw: Voltage block
+            engineering: Block with rows (force in N, displacement in mm);
+                its timing (possibly decimated) goes in the frame header
+            mechanics: Block with rows (stress in MPa, strain)
+        """
+        if self.server is None:
+            return
+        self._accept()
+        if not self.subscribers:
+            return
+
+        frame = self.frame(raw, engineering, mechanics)
+        self.frames_published += 1
+        for subscriber in list(self.subscribers):
+            subscriber.frames_seen += 1
+            if subscriber.frames_seen % subscriber.decimation:
+                subscriber.frames_skipped += 1
+            elif subscriber.pending_bytes > self.max_backlog:
+                # Still behind when its next frame is due
+                if self.policy == 'drop' or subscriber.decimation >= self.max_decimation:
+                    self._drop(subscriber, "too slow")
+                    continue
+                subscriber.decimation *= 2
+                subscriber.frames_skipped += 1
+            else:
+                if subscriber.decimation > 1 and subscriber.pending_bytes < self.max_backlog // 4:
+                    subscriber.decimation //= 2
+                subscriber.queue(frame)
+                subscriber.frames_sent += 1
+            self._send(subscriber)
+
+    # Same interface as HDF5Logger
+    append_block = publish
+
+    def frame(self, raw: SampleBlock, engineering: SampleBlock, mechanics: SampleBlock) -> bytes:
+        """Encode a data frame."""
+        block = engineering
+        payload = np.empty((len(CHANNELS), block.num_samples), dtype=self.dtype)
+        payload[:2] = engineering.data
+        payload[2:] = mechanics.data
+        header = HEADER.pack(
+            MAGIC, VERSION, DATA, len(CHANNELS), block.num_samples, block.sequence,
+            block.start_index, block.t0, block.sample_rate, block.gap
+        )
+        return header + payload.tobytes()
+
+    def get_statistics(self) -> dict:
+        """Get subscriber and frame counts."""
+        return {
+            'subscribers': len(self.subscribers),
+            'frames_published': self.frames_published,
+            'subscribers_dropped': self.subscribers_dropped,
+            'decimation': [subscriber.decimation for subscriber in self.subscribers],
+        }
+
+    def _accept(self):
+        """Accept pending connections and greet them."""
+        while True:
+            try:
+                sock, address = self.server.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            sock.setblocking(False)
+            subscriber = Subscriber(sock, address)
+            subscriber.queue(self.hello)
+            self.subscribers.append(subscriber)
+            self._send(subscriber)
+
+    def _send(self, subscriber: Subscriber):
+        """Send what a subscriber's socket takes; drop it if it disconnected."""
+        try:
+            subscriber.flush()
+        except OSError:
+            self._drop(subscriber, "disconnected")
+
+    def _drop(self, subscriber: Subscriber, reason: str):
+        subscriber.sock.close()
+        self.subscribers.remove(subscriber)
+        self.subscribers_dropped += 1
+        print(f"Live tap subscriber {subscriber.address or 'local'} dropped: {reason}")
+
+
+def live_tap_from_config(config: dict) -> Optional[LiveTap]:
+    """
+    Create a live tap from the 'live_tap' configuration section.
+
+    Args:
+        config: Full configuration dict
+
+    Returns:
+        LiveTap, or None if no address is configured
+    """
+    tap_config = config.get('live_tap') or {}
+    if not tap_config.get('address'):
+        return None
+    return LiveTap(
+        tap_config['address'],
+        dtype=tap_config.get('dtype', 'float32'),
+        max_backlog=int(tap_config.get('max_backlog_kb', 1024) * 1024),
+        policy=tap_config.get('policy', 'decimate')
+    )
+
+
+def subscribe(address: Address, timeout: Optional[float] = None) -> Iterator[Tuple[dict, np.ndarray]]:
+    """
+    Connect to a live tap and iterate over its data frames.
+
+    Args:
+        address: Unix socket path, or (host, port) for TCP
+        timeout: Socket timeout in seconds (default: wait indefinitely)
+
+    Yields:
+        (header, data): header fields as a dict (sequence, start_index, t0,
+        sample_rate, gap, channels) and a (num_channels, num_samples) array
+    """
+    family = socket.AF_INET if isinstance(address, (list, tuple)) else socket.AF_UNIX
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(tuple(address) if family == socket.AF_INET else address)
+        stream = sock.makefile('rb')
+
+        channels, dtype = CHANNELS, np.dtype(np.float32)
+        while True:
+            header = stream.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return  # Publisher closed the connection
+            (magic, version, kind, num_channels, num_samples, sequence,
+             start_index, t0, sample_rate, gap) = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Not a live tap stream (magic {magic!r}, version {version})")
+
+            if kind == HELLO:
+                hello = json.loads(stream.read(num_samples))
+                channels, dtype = tuple(hello['channels']), np.dtype(hello['dtype'])
+                continue
+
+            payload = stream.read(num_channels * num_samples * dtype.itemsize)
+            data = np.frombuffer(payload, dtype=dtype).reshape(num_channels, num_samples)
+            yield {
+                'sequence': sequence,
+                'start_index': start_index,
+                't0': t0,
+                'sample_rate': sample_rate,
+                'gap': gap,
+                'channels': channels,
+            }, data
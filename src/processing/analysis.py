@@ -3,7 +3,7 @@
 import numpy as np
 from scipy import stats
 from scipy.signal import find_peaks
-from typing import Dict, Optional, Tuple
+from typing import Dict, Optional, Sequence, Tuple
 
 
 class RegionAnalysis:
@@ -17,16 +17,23 @@ class RegionAnalysis:
         stress: np.ndarray,
         strain: np.ndarray,
         force: np.ndarray,
-        offset_strain: float = 0.002  # 0.2% offset for yield
+        offset_strain: float = 0.002,  # 0.2% offset for yield
+        breaks: Optional[Sequence[int]] = None
     ) -> Dict:
         """
         Perform complete region analysis on test data.
 
+        The elastic fit regresses stress on strain, so it does not depend on
+        samples being contiguous. Points detected on the first sample after
+        an acquisition gap are flagged with 'after_gap', since the event may
+        have happened within the gap.
+
         Args:
             stress: Stress array in MPa
             strain: Strain array (dimensionless)
             force: Force array in N
             offset_strain: Strain offset for yield point detection (default 0.2%)
+            breaks: Indices of the first sample after each acquisition gap
 
         Returns:
             Dictionary with region information and metrics
@@ -51,7 +58,8 @@ class RegionAnalysis:
         results['yield'] = {
             'index': yield_idx,
             'stress_MPa': yield_stress,
-            'strain': yield_strain
+            'strain': yield_strain,
+            'after_gap': self._after_gap(yield_idx, breaks)
         }
 
         # Find ultimate tensile strength
@@ -68,7 +76,8 @@ class RegionAnalysis:
             results['fracture'] = {
                 'index': fracture_idx,
                 'stress_MPa': stress[fracture_idx],
-                'strain': strain[fracture_idx]
+                'strain': strain[fracture_idx],
+                'after_gap': self._after_gap(fracture_idx, breaks)
             }
 
         # Calculate plastic region if exists
@@ -183,6 +192,10 @@ class RegionAnalysis:
 
         return None
 
+    def _after_gap(self, index: Optional[int], breaks: Optional[Sequence[int]]) -> bool:
+        """Check whether index is the first sample after an acquisition gap."""
+        return index is not None and breaks is not None and index in set(breaks)
+
     def get_region_masks(
         self,
         data_length: int,
@@ -1,11 +1,19 @@
 """Calibration and unit conversion for sensors."""
 
 import numpy as np
+from typing import Optional, Sequence, Tuple, Union
+
+from ..acquisition.sample_block import SampleBlock
+
+
+CALIBRATION_TYPES = ('linear', 'polynomial', 'table')
 
 
 class SensorCalibration:
     """Handles voltage to engineering unit conversions."""
 
+    is_linear = True
+
     def __init__(self, slope: float, offset: float, unit: str = ""):
         """
         Initialize calibration.
@@ -19,14 +27,338 @@ class SensorCalibration:
         self.offset = offset
         self.unit = unit
 
-    def convert(self, voltage: np.ndarray) -> np.ndarray:
-        """Convert voltage to engineering units."""
-        return voltage * self.slope + self.offset
+    def convert(self, voltage: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Convert voltage to engineering units, optionally into an existing array."""
+        if out is None:
+            return voltage * self.slope + self.offset
+        np.multiply(voltage, self.slope, out=out)
+        out += self.offset
+        return out
 
     def inverse(self, value: np.ndarray) -> np.ndarray:
         """Convert engineering units back to voltage."""
         return (value - self.offset) / self.slope
 
+    def for_counts(self, scale: float, offset: float) -> 'SensorCalibration':
+        """
+        Get the equivalent calibration for raw ADC counts.
+
+        Folds the counts-to-volts conversion into slope and offset so counts
+        are converted to engineering units in a single pass.
+
+        Args:
+            scale: Volts per count
+            offset: Volts at count zero
+
+        Returns:
+            Calibration from counts to engineering units
+        """
+        return SensorCalibration(self.slope * scale, self.slope * offset + self.offset, self.unit)
+
+    @property
+    def parameters(self) -> tuple:
+        """Values defining the calibration (changes when it is edited)."""
+        return ('linear', self.slope, self.offset)
+
+
+class PolynomialCalibration:
+    """
+    Polynomial voltage to engineering unit conversion, evaluated with Horner's scheme.
+
+    value = c0 + c1 * V + c2 * V**2 + ...
+    """
+
+    is_linear = False
+
+    def __init__(
+        self,
+        coefficients: Sequence[float],
+        unit: str = "",
+        voltage_range: Tuple[float, float] = (-10.0, 10.0)
+    ):
+        """
+        Initialize calibration.
+
+        Args:
+            coefficients: Polynomial coefficients, lowest order first
+            unit: Unit name (e.g., "N", "mm")
+            voltage_range: Input range over which the polynomial must be
+                monotonic for inverse()
+        """
+        self.coefficients = np.array(coefficients, dtype=np.float64)
+        if self.coefficients.ndim != 1 or len(self.coefficients) == 0:
+            raise ValueError("Polynomial calibration needs at least one coefficient")
+        self.unit = unit
+        self.voltage_range = (float(min(voltage_range)), float(max(voltage_range)))
+        self.counts_calibrations = {}
+        self.inverse_table: Optional[TableCalibration] = None
+
+    def convert(self, voltage: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Convert voltage to engineering units, optionally into an existing array."""
+        voltage = np.asarray(voltage)
+        if out is None:
+            out = np.empty(voltage.shape, np.result_type(voltage, 1.0))
+        coefficients = self.coefficients
+        if len(coefficients) == 1:
+            out[...] = coefficients[0]
+            return out
+        np.multiply(voltage, coefficients[-1], out=out)
+        out += coefficients[-2]
+        for coefficient in coefficients[-3::-1]:
+            out *= voltage
+            out += coefficient
+        return out
+
+    def inverse(self, value: np.ndarray) -> np.ndarray:
+        """
+        Convert engineering units back to voltage.
+
+        Interpolates a table of the polynomial over voltage_range, then
+        refines with two Newton steps.
+        """
+        if self.inverse_table is None:
+            voltage = np.linspace(*self.voltage_range, 4097)
+            values = self.convert(voltage)
+            steps = np.diff(values)
+            if not (np.all(steps > 0) or np.all(steps < 0)):
+                raise ValueError(
+                    f"Polynomial calibration is not monotonic over {self.voltage_range} V "
+                    "and has no inverse"
+                )
+            self.inverse_table = TableCalibration(values, voltage, self.unit)
+
+        derivative = self.coefficients[1:] * np.arange(1, len(self.coefficients))
+        voltage = self.inverse_table.convert(np.asarray(value, dtype=np.float64))
+        for _ in range(2):
+            voltage -= (self.convert(voltage) - value) / np.polyval(derivative[::-1], voltage)
+        return voltage
+
+    def for_counts(self, scale: float, offset: float) -> 'PolynomialCalibration':
+        """
+        Get the equivalent calibration for raw ADC counts.
+
+        Substitutes V = scale * counts + offset into the polynomial.
+
+        Args:
+            scale: Volts per count
+            offset: Volts at count zero
+
+        Returns:
+            Calibration from counts to engineering units
+        """
+        calibration = self.counts_calibrations.get((scale, offset))
+        if calibration is None:
+            polynomial = np.polynomial.Polynomial(self.coefficients)
+            counts = polynomial(np.polynomial.Polynomial([offset, scale]))
+            coefficients = np.zeros(len(self.coefficients))
+            coefficients[:len(counts.coef)] = counts.coef
+            counts_range = tuple((v - offset) / scale for v in self.voltage_range)
+            calibration = PolynomialCalibration(coefficients, self.unit, counts_range)
+            self.counts_calibrations[(scale, offset)] = calibration
+        return calibration
+
+    @property
+    def parameters(self) -> tuple:
+        """Values defining the calibration (changes when it is edited)."""
+        return ('polynomial', tuple(self.coefficients), self.voltage_range)
+
+
+class TableCalibration:
+    """
+    Piecewise-linear voltage to engineering unit conversion through calibration points.
+
+    Values outside the table are extrapolated from the first and last
+    segments. Segments are found through a uniform grid over the table
+    range: each grid cell stores the segment at its lower edge, so a sample
+    needs one multiply to find its cell, one lookup and one comparison with
+    the next breakpoint. The grid is made fine enough for at most one
+    breakpoint per cell (up to max_cells), so unlike a binary search the
+    cost per sample does not grow with the table size. Intermediate arrays
+    are reused between calls, so an instance must not convert on two
+    threads at once.
+    """
+
+    is_linear = False
+
+    def __init__(
+        self,
+        voltages: Sequence[float],
+        values: Sequence[float],
+        unit: str = "",
+        max_cells: int = 65536
+    ):
+        """
+        Initialize calibration.
+
+        Args:
+            voltages: Calibration point inputs, strictly increasing (at least two)
+            values: Engineering values at those inputs
+            unit: Unit name (e.g., "N", "mm")
+            max_cells: Largest lookup grid
+        """
+        voltages = np.array(voltages, dtype=np.float64)
+        values = np.array(values, dtype=np.float64)
+        if voltages.ndim != 1 or len(voltages) < 2 or voltages.shape != values.shape:
+            raise ValueError("Table calibration needs at least two (voltage, value) points")
+        if np.any(np.diff(voltages) <= 0):
+            raise ValueError("Table calibration voltages must be strictly increasing")
+
+        self.voltages = voltages
+        self.values = values
+        self.unit = unit
+        self.max_cells = max_cells
+        self.counts_calibrations = {}
+        self.inverse_table: Optional[TableCalibration] = None
+        self.scratch = (np.empty(0), np.empty(0, np.intp), np.empty(0, bool))
+
+        # Segment i runs from voltages[i] up to (not including) upper[i]
+        self.slopes = np.diff(values) / np.diff(voltages)
+        self.intercepts = values[:-1] - self.slopes * voltages[:-1]
+        self.upper = np.append(voltages[1:-1], np.inf)
+
+        # Uniform grid: cell -> segment containing the cell's lower edge
+        span = voltages[-1] - voltages[0]
+        num_cells = int(np.ceil(span / np.diff(voltages).min())) + 1
+        self.capped = num_cells > max_cells
+        num_cells = min(num_cells, max_cells)
+        self.start = voltages[0]
+        self.cells_per_volt = num_cells / span
+        edges = self.start + np.arange(num_cells) / self.cells_per_volt
+        self.cell_segment = np.clip(
+            np.searchsorted(voltages, edges, side='right') - 1, 0, len(self.slopes) - 1
+        )
+
+    def segments(self, voltage: np.ndarray) -> np.ndarray:
+        """
+        Get the segment index of each voltage.
+
+        Returns:
+            Array of the voltage's shape, reused by the next call
+        """
+        cell, segment, past = self._scratch(voltage.shape)
+        np.subtract(voltage, self.start, out=cell)
+        cell *= self.cells_per_volt
+        np.clip(cell, 0, len(self.cell_segment) - 1, out=cell)
+        segment[...] = cell
+        np.take(self.cell_segment, segment, out=segment, mode='clip')
+
+        # Voltages past a breakpoint inside their cell
+        np.take(self.upper, segment, out=cell, mode='clip')
+        np.greater_equal(voltage, cell, out=past)
+        segment += past
+        while self.capped:
+            # Cells may hold several breakpoints
+            np.take(self.upper, segment, out=cell, mode='clip')
+            np.greater_equal(voltage, cell, out=past)
+            if not past.any():
+                break
+            segment += past
+        return segment
+
+    def convert(self, voltage: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Convert voltage to engineering units, optionally into an existing array."""
+        voltage = np.asarray(voltage)
+        if out is None:
+            out = np.empty(voltage.shape, np.result_type(voltage, 1.0))
+        segment = self.segments(voltage)
+        coefficient = self._scratch(segment.shape)[0]
+        np.take(self.slopes, segment, out=coefficient, mode='clip')
+        np.multiply(coefficient, voltage, out=out)
+        np.take(self.intercepts, segment, out=coefficient, mode='clip')
+        out += coefficient
+        return out
+
+    def _scratch(self, shape: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get reusable float, index and flag arrays of a shape (grown as needed)."""
+        size = int(np.prod(shape))
+        if len(self.scratch[0]) < size:
+            self.scratch = (np.empty(size), np.empty(size, np.intp), np.empty(size, bool))
+        return tuple(array[:size].reshape(shape) for array in self.scratch)
+
+    def inverse(self, value: np.ndarray) -> np.ndarray:
+        """Convert engineering units back to voltage (values must be strictly monotonic)."""
+        if self.inverse_table is None:
+            steps = np.diff(self.values)
+            if np.all(steps > 0):
+                self.inverse_table = TableCalibration(
+                    self.values, self.voltages, max_cells=self.max_cells
+                )
+            elif np.all(steps < 0):
+                self.inverse_table = TableCalibration(
+                    self.values[::-1], self.voltages[::-1], max_cells=self.max_cells
+                )
+            else:
+                raise ValueError("Table calibration is not monotonic and has no inverse")
+        return self.inverse_table.convert(np.asarray(value, dtype=np.float64))
+
+    def for_counts(self, scale: float, offset: float) -> 'TableCalibration':
+        """
+        Get the equivalent calibration for raw ADC counts.
+
+        Maps the table's voltages to counts, so counts are converted to
+        engineering units in a single pass.
+
+        Args:
+            scale: Volts per count
+            offset: Volts at count zero
+
+        Returns:
+            Calibration from counts to engineering units
+        """
+        calibration = self.counts_calibrations.get((scale, offset))
+        if calibration is None:
+            counts = (self.voltages - offset) / scale
+            values = self.values
+            if scale < 0:
+                counts, values = counts[::-1], values[::-1]
+            calibration = TableCalibration(counts, values, self.unit, self.max_cells)
+            self.counts_calibrations[(scale, offset)] = calibration
+        return calibration
+
+    @property
+    def parameters(self) -> tuple:
+        """Values defining the calibration (changes when it is edited)."""
+        return ('table', tuple(self.voltages), tuple(self.values))
+
+
+Calibration = Union[SensorCalibration, PolynomialCalibration, TableCalibration]
+
+
+def calibration_from_config(sensor_config: dict, unit: str = "") -> Calibration:
+    """
+    Create a sensor calibration from its configuration section.
+
+    Args:
+        sensor_config: Section with 'type' (linear, polynomial or table;
+            default linear) and its parameters: slope and offset;
+            coefficients (lowest order first) and optional range (volts);
+            or points, a list of [volts, value] pairs
+        unit: Unit name (e.g., "N", "mm")
+
+    Returns:
+        Calibration
+    """
+    kind = sensor_config.get('type', 'linear')
+    if kind == 'linear':
+        return SensorCalibration(
+            slope=sensor_config['slope'],
+            offset=sensor_config['offset'],
+            unit=unit
+        )
+    if kind == 'polynomial':
+        return PolynomialCalibration(
+            sensor_config['coefficients'],
+            unit=unit,
+            voltage_range=tuple(sensor_config.get('range', (-10.0, 10.0)))
+        )
+    if kind == 'table':
+        points = np.array(sensor_config['points'], dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] != 2:
+            raise ValueError("Table calibration points must be [voltage, value] pairs")
+        points = points[np.argsort(points[:, 0])]
+        return TableCalibration(points[:, 0], points[:, 1], unit=unit)
+    raise ValueError(f"Unknown calibration type '{kind}', expected one of {CALIBRATION_TYPES}")
+
 
 class CalibrationManager:
     """Manages all sensor calibrations."""
@@ -39,20 +371,21 @@ class CalibrationManager:
             config: Configuration dict with calibration parameters
         """
         # Load cell calibration (voltage -> force in N)
-        load_config = config['calibration']['load_cell']
-        self.load_cell = SensorCalibration(
-            slope=load_config['slope'],
-            offset=load_config['offset'],
-            unit='N'
-        )
+        self.load_cell = calibration_from_config(config['calibration']['load_cell'], unit='N')
 
         # Displacement calibration (voltage -> displacement in mm)
-        disp_config = config['calibration']['displacement']
-        self.displacement = SensorCalibration(
-            slope=disp_config['slope'],
-            offset=disp_config['offset'],
-            unit='mm'
-        )
+        self.displacement = calibration_from_config(config['calibration']['displacement'], unit='mm')
+
+        # Block rows of each sensor (the DAQ scans a contiguous channel range)
+        channels = config.get('acquisition', {}).get('channels', {'load': 0, 'displacement': 1})
+        low_chan = min(channels.values())
+        self.load_row = channels['load'] - low_chan
+        self.displacement_row = channels['displacement'] - low_chan
+
+    @property
+    def is_linear(self) -> bool:
+        """Whether both sensors have linear calibrations."""
+        return self.load_cell.is_linear and self.displacement.is_linear
 
     def convert_load(self, voltage: np.ndarray) -> np.ndarray:
         """Convert load cell voltage to force (N)."""
@@ -61,3 +394,24 @@ class CalibrationManager:
     def convert_displacement(self, voltage: np.ndarray) -> np.ndarray:
         """Convert displacement sensor voltage to displacement (mm)."""
         return self.displacement.convert(voltage)
+
+    def convert_block(self, block: SampleBlock, out: Optional[np.ndarray] = None) -> SampleBlock:
+        """
+        Convert a voltage block to engineering units.
+
+        Args:
+            block: Raw voltage (or ADC counts) block from the DAQ
+            out: Optional (2, num_samples) array to write the result into
+
+        Returns:
+            Block with rows (force in N, displacement in mm)
+        """
+        load_cell, displacement = self.load_cell, self.displacement
+        if block.is_counts:
+            load_cell = load_cell.for_counts(block.scale, block.offset)
+            displacement = displacement.for_counts(block.scale, block.offset)
+
+        data = np.empty((2, block.num_samples)) if out is None else out
+        load_cell.convert(block.data[self.load_row], out=data[0])
+        displacement.convert(block.data[self.displacement_row], out=data[1])
+        return block.with_data(data)
@@ -0,0 +1,134 @@
+"""Fused conversion of raw blocks to engineering units, stress and strain."""
+
+import numpy as np
+from typing import Optional, Tuple
+
+from ..acquisition.sample_block import SampleBlock
+from .calibration import CalibrationManager
+from .mechanics import MechanicsCalculator
+
+
+class FusedConversion:
+    """
+    Computes force, displacement, stress and strain in one vectorized pass.
+
+    The counts-to-volts scale of raw blocks is folded into the calibration
+    gains and offsets, and the geometry into reciprocal factors, so the four
+    output rows take three ufunc calls over (2, n) arrays with no
+    temporaries:
+
+        (force, displacement) = sensors * gains + offsets
+        (stress, strain) = (force, displacement) * (1 / area, 1 / gauge_length)
+
+    With a polynomial or table calibration on either sensor, force and
+    displacement come from the calibrations instead of the first two calls.
+    The coefficients are cached and recomputed when a linear calibration,
+    the geometry or the block scale changes. Output is float32 for float32
+    blocks and float64 otherwise. Both sensors may be on the same channel.
+    """
+
+    def __init__(self, calibration: CalibrationManager, mechanics: MechanicsCalculator):
+        """
+        Initialize converter.
+
+        Args:
+            calibration: Sensor calibrations
+            mechanics: Specimen geometry
+        """
+        self.calibration = calibration
+        self.mechanics = mechanics
+        self.key = None
+        self.coefficients = {}  # dtype -> (gains, offsets, reciprocals), each of shape (2, 1)
+
+    def coefficients_for(
+        self,
+        block: SampleBlock,
+        dtype: np.dtype
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the coefficients for a block, recomputing them if anything changed.
+
+        Args:
+            block: Raw block (for its counts scale, if any)
+            dtype: Output data type
+
+        Returns:
+            (gains, offsets, reciprocals) columns of shape (2, 1): sensor
+            value to (force, displacement) (NaN for non-linear calibrations),
+            and those to (stress, strain)
+        """
+        load_cell, displacement = self.calibration.load_cell, self.calibration.displacement
+        # Gains and offsets only depend on linear calibrations (a few numbers);
+        # non-linear ones convert the block themselves
+        linear = self.calibration.is_linear
+        key = (
+            load_cell.parameters if linear else None,
+            displacement.parameters if linear else None,
+            self.mechanics.area, self.mechanics.gauge_length, block.scale, block.offset
+        )
+        if key != self.key:
+            self.key = key
+            self.coefficients = {}
+
+        coefficients = self.coefficients.get(dtype)
+        if coefficients is None:
+            reciprocals = (1.0 / self.mechanics.area, 1.0 / self.mechanics.gauge_length)
+            if linear:
+                if block.is_counts:
+                    load_cell = load_cell.for_counts(block.scale, block.offset)
+                    displacement = displacement.for_counts(block.scale, block.offset)
+                gains = (load_cell.slope, displacement.slope)
+                offsets = (load_cell.offset, displacement.offset)
+            else:
+                gains = offsets = (np.nan, np.nan)  # Not used
+            coefficients = tuple(
+                np.array(values, dtype=dtype).reshape(2, 1)
+                for values in (gains, offsets, reciprocals)
+            )
+            self.coefficients[dtype] = coefficients
+        return coefficients
+
+    def output_dtype(self, block: SampleBlock) -> np.dtype:
+        """Output data type for a block (float32 stays float32)."""
+        return np.dtype(np.float32) if block.data.dtype == np.float32 else np.dtype(np.float64)
+
+    def convert(
+        self,
+        block: SampleBlock,
+        out: Optional[np.ndarray] = None
+    ) -> Tuple[SampleBlock, SampleBlock]:
+        """
+        Convert a raw block.
+
+        Args:
+            block: Raw voltage (or ADC counts) block from the DAQ
+            out: Optional (4, num_samples) array of the output dtype for
+                force, displacement, stress and strain
+
+        Returns:
+            (engineering, mechanics) blocks: rows (force in N, displacement
+            in mm) and (stress in MPa, strain), views into out
+        """
+        dtype = self.output_dtype(block)
+        if out is None:
+            out = np.empty((4, block.num_samples), dtype)
+        gains, offsets, reciprocals = self.coefficients_for(block, dtype)
+
+        # Load and displacement rows as one strided view of the block
+        load_row, displacement_row = self.calibration.load_row, self.calibration.displacement_row
+        step = displacement_row - load_row
+        if step == 0:
+            # Both sensors on one channel: the same row twice
+            sensors = np.broadcast_to(block.data[load_row], (2, block.num_samples))
+        else:
+            stop = displacement_row + (1 if step > 0 else -1)
+            sensors = block.data[load_row:stop if stop >= 0 else None:step]
+
+        engineering, mechanics = out[:2], out[2:]
+        if self.calibration.is_linear:
+            np.multiply(sensors, gains, out=engineering)
+            engineering += offsets
+        else:
+            self.calibration.convert_block(block, out=engineering)
+        np.multiply(engineering, reciprocals, out=mechanics)
+        return block.with_data(engineering), block.with_data(mechanics)
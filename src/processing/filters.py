@@ -0,0 +1,224 @@
+"""Streaming digital filters applied block by block."""
+
+import numpy as np
+from scipy import ndimage, signal
+from typing import Union
+
+from ..acquisition.sample_block import SampleBlock
+
+
+FILTER_TYPES = ('butterworth', 'moving_average', 'median')
+
+
+class ButterworthFilter:
+    """
+    Butterworth IIR filter in second-order sections.
+
+    The section states are kept between blocks, so filtering a signal block
+    by block gives the same output as scipy.signal.sosfilt() on the whole
+    signal (starting from rest).
+    """
+
+    def __init__(self, sample_rate: float, cutoff, order: int = 4, btype: str = 'lowpass'):
+        """
+        Initialize filter.
+
+        Args:
+            sample_rate: Sampling rate in Hz
+            cutoff: Cutoff frequency in Hz ([low, high] for bandpass/bandstop)
+            order: Filter order
+            btype: 'lowpass', 'highpass', 'bandpass' or 'bandstop'
+        """
+        self.sos = signal.butter(order, cutoff, btype=btype, fs=sample_rate, output='sos')
+        self.reset()
+
+    def reset(self):
+        """Return to rest (start of a new session)."""
+        self.zi = np.zeros((len(self.sos), 2))
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Filter the next samples."""
+        y, self.zi = signal.sosfilt(self.sos, x, zi=self.zi)
+        return y
+
+
+class MovingAverageFilter:
+    """
+    Causal moving average over the last length samples.
+
+    Equivalent to scipy.signal.lfilter(np.ones(length) / length, 1, x) on the
+    whole signal: samples before the first are zero.
+    """
+
+    def __init__(self, length: int):
+        """
+        Initialize filter.
+
+        Args:
+            length: Samples averaged
+        """
+        if length < 1:
+            raise ValueError("Moving average length must be at least 1")
+        self.length = length
+        self.reset()
+
+    def reset(self):
+        """Return to rest (start of a new session)."""
+        self.history = np.zeros(self.length - 1)
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Filter the next samples."""
+        extended = np.concatenate([self.history, x])
+        self.history = extended[len(extended) - len(self.history):].copy()
+
+        # Window sums from prefix sums, about the mean to keep precision
+        mean = extended.mean() if len(extended) else 0.0
+        extended -= mean
+        sums = np.empty(len(extended) + 1)
+        sums[0] = 0.0
+        np.cumsum(extended, out=sums[1:])
+        y = sums[self.length:] - sums[:-self.length]
+        y /= self.length
+        y += mean
+        return y
+
+
+class MedianFilter:
+    """
+    Causal running median over the last length samples (length odd).
+
+    Samples before the first are zero, as for the other filters.
+    """
+
+    def __init__(self, length: int):
+        """
+        Initialize filter.
+
+        Args:
+            length: Samples in the window (odd)
+        """
+        if length < 1 or length % 2 == 0:
+            raise ValueError("Median filter length must be odd")
+        self.length = length
+        self.reset()
+
+    def reset(self):
+        """Return to rest (start of a new session)."""
+        self.history = np.zeros(self.length - 1)
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Filter the next samples."""
+        extended = np.concatenate([self.history, x])
+        self.history = extended[len(extended) - len(self.history):].copy()
+        # Centered median; the window centered at h + i ends at sample i
+        h = self.length // 2
+        return ndimage.median_filter(extended, size=self.length, mode='nearest')[h:h + len(x)]
+
+
+class Decimator:
+    """
+    Anti-aliased polyphase decimation of sample blocks by an integer factor.
+
+    A causal lowpass FIR filter (Kaiser window, cutoff at the new Nyquist
+    frequency) is only evaluated at the kept samples: those whose sample
+    index is a multiple of the factor, so the output sample index is the
+    input index divided by the factor whatever the block boundaries. The
+    last taps - 1 samples are kept between blocks, so block-by-block output
+    equals scipy.signal.upfirdn(taps, x, down=factor) on the whole signal
+    (starting from zero at sample index 0). The filter delays the output by
+    (len(taps) - 1) / 2 input samples.
+    """
+
+    def __init__(self, factor: int, taps_per_phase: int = 16):
+        """
+        Initialize decimator.
+
+        Args:
+            factor: Keep one sample in factor
+            taps_per_phase: Filter taps per polyphase branch (the filter has
+                factor * taps_per_phase taps; more give a sharper cutoff)
+        """
+        if factor < 1:
+            raise ValueError("Decimation factor must be at least 1")
+        self.factor = factor
+        if factor == 1:
+            self.taps = np.ones(1)
+        else:
+            self.taps = signal.firwin(factor * taps_per_phase, 1.0 / factor, window=('kaiser', 5.0))
+        self.reversed_taps = self.taps[::-1].copy()
+        self.reset()
+
+    def reset(self):
+        """Return to rest (start of a new session)."""
+        self.history = None
+
+    def process(self, block: SampleBlock) -> SampleBlock:
+        """
+        Decimate the next block.
+
+        Args:
+            block: Block of volts (or counts, converted to volts)
+
+        Returns:
+            Block at sample_rate / factor with sample indices at that rate;
+            its gap counts the output samples lost
+        """
+        data = block.volts()
+        if self.history is None:
+            self.history = np.zeros((block.num_channels, len(self.taps) - 1))
+        extended = np.concatenate([self.history, data], axis=1)
+        self.history = extended[:, extended.shape[1] - self.history.shape[1]:].copy()
+
+        # Output k is the window of taps samples ending at block sample first + k * factor
+        q = self.factor
+        start = int(block.start_index)
+        first = -start % q
+        if block.num_samples:
+            windows = np.lib.stride_tricks.sliding_window_view(extended, len(self.taps), axis=1)
+            decimated = windows[:, first::q] @ self.reversed_taps
+        else:
+            decimated = np.empty((block.num_channels, 0))
+        if block.data.dtype == np.float32:
+            decimated = decimated.astype(np.float32)
+
+        # Multiples of factor among the lost sample indices
+        gap = (start - 1) // q - (block.gap_start - 1) // q
+        return SampleBlock(
+            decimated,
+            t0=block.t0 + first / block.sample_rate,
+            sample_rate=block.sample_rate / q,
+            start_index=(start + first) // q,
+            sequence=block.sequence,
+            gap=gap
+        )
+
+
+Filter = Union[ButterworthFilter, MovingAverageFilter, MedianFilter]
+
+
+def filter_from_config(filter_config: dict, sample_rate: float) -> Filter:
+    """
+    Create a filter from its configuration.
+
+    Args:
+        filter_config: Dict with 'type' (butterworth, moving_average or
+            median) and its parameters: cutoff (Hz), order and btype; or
+            length (samples)
+        sample_rate: Sampling rate in Hz
+
+    Returns:
+        Filter
+    """
+    kind = filter_config.get('type')
+    if kind == 'butterworth':
+        return ButterworthFilter(
+            sample_rate,
+            filter_config['cutoff'],
+            order=filter_config.get('order', 4),
+            btype=filter_config.get('btype', 'lowpass')
+        )
+    if kind == 'moving_average':
+        return MovingAverageFilter(filter_config['length'])
+    if kind == 'median':
+        return MedianFilter(filter_config['length'])
+    raise ValueError(f"Unknown filter type '{kind}', expected one of {FILTER_TYPES}")
@@ -2,6 +2,82 @@
 
 import numpy as np
 from scipy import stats
+from typing import Optional, Sequence, Tuple
+
+from ..acquisition.sample_block import SampleBlock
+
+
+def rolling_regression(
+    x,
+    y,
+    window_size: int,
+    stride: int = 1,
+    dtype=np.float64,
+    chunk_size: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Least-squares line of y against x for every window, vectorized.
+
+    Window k covers samples [k * stride, k * stride + window_size). Window
+    sums are differences of prefix sums, taken about the mean of each chunk
+    so that slowly varying data keeps its precision.
+
+    Args:
+        x: Independent variable (any sliceable array: ndarray, memmap, HDF5 dataset)
+        y: Dependent variable, same length
+        window_size: Samples per window
+        stride: Samples between window starts
+        dtype: Output data type (np.float32 halves the output memory;
+            sums are always accumulated in float64)
+        chunk_size: Samples read and processed at a time (default:
+            64 windows); bounds memory for arrays larger than RAM
+
+    Returns:
+        (slope, intercept, r_squared) arrays with one value per window; NaN
+        where x is constant over the window
+    """
+    n = len(x)
+    w = window_size
+    count = (n - w) // stride + 1 if n >= w else 0
+    slope = np.empty(count, dtype)
+    intercept = np.empty(count, dtype)
+    r_squared = np.empty(count, dtype)
+
+    chunk_size = chunk_size or 64 * w
+    windows_per_chunk = max((chunk_size - w) // stride + 1, 1)
+    for first in range(0, count, windows_per_chunk):
+        last = min(first + windows_per_chunk, count)
+        start = first * stride
+        xs = np.asarray(x[start:(last - 1) * stride + w], dtype=np.float64)
+        ys = np.asarray(y[start:(last - 1) * stride + w], dtype=np.float64)
+
+        x0, y0 = xs.mean(), ys.mean()
+        dx = xs - x0
+        dy = ys - y0
+        sums = np.zeros((5, len(xs) + 1))
+        np.cumsum(dx, out=sums[0, 1:])
+        np.cumsum(dy, out=sums[1, 1:])
+        np.cumsum(dx * dx, out=sums[2, 1:])
+        np.cumsum(dy * dy, out=sums[3, 1:])
+        np.cumsum(dx * dy, out=sums[4, 1:])
+
+        begin = np.arange(last - first) * stride
+        sx, sy, sxx, syy, sxy = sums[:, begin + w] - sums[:, begin]
+        cxx = sxx - sx * sx / w
+        cyy = syy - sy * sy / w
+        cxy = sxy - sx * sy / w
+
+        # Constant x (up to rounding) has no slope; constant y has r = 0
+        x_varies = cxx > 1e-12 * sxx
+        y_varies = cyy > 1e-12 * syy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            b = np.where(x_varies, cxy / cxx, np.nan)
+            r2 = np.where(y_varies, cxy * cxy / (cxx * cyy), 0.0)
+        slope[first:last] = b
+        intercept[first:last] = y0 + sy / w - b * (x0 + sx / w)
+        r_squared[first:last] = np.where(x_varies, np.minimum(r2, 1.0), np.nan)
+
+    return slope, intercept, r_squared
 
 
 class MechanicsCalculator:
@@ -42,11 +118,28 @@ class MechanicsCalculator:
         """
         return displacement / self.gauge_length
 
+    def calculate_block(self, block: SampleBlock, out: Optional[np.ndarray] = None) -> SampleBlock:
+        """
+        Calculate stress and strain for a block in engineering units.
+
+        Args:
+            block: Block with rows (force in N, displacement in mm)
+            out: Optional (2, num_samples) array to write the result into
+
+        Returns:
+            Block with rows (stress in MPa, strain)
+        """
+        data = np.empty_like(block.data) if out is None else out
+        np.divide(block.data[0], self.area, out=data[0])
+        np.divide(block.data[1], self.gauge_length, out=data[1])
+        return block.with_data(data)
+
     def calculate_youngs_modulus(
         self,
         stress: np.ndarray,
         strain: np.ndarray,
-        window_size: int = 100
+        window_size: int = 100,
+        breaks: Optional[Sequence[int]] = None
     ) -> np.ndarray:
         """
         Calculate Young's modulus using rolling linear regression.
@@ -55,6 +148,9 @@ class MechanicsCalculator:
             stress: Stress array in MPa
             strain: Strain array (dimensionless)
             window_size: Number of points for rolling window
+            breaks: Indices of the first sample after each acquisition gap
+                (may be negative for gaps before the start of the arrays);
+                windows spanning a gap are skipped (NaN)
 
         Returns:
             Array of Young's modulus values in GPa
@@ -63,18 +159,14 @@ class MechanicsCalculator:
             # Not enough data yet
             return np.array([np.nan] * len(stress))
 
+        # Value i is the slope of the window [i - window_size, i)
         youngs = np.full(len(stress), np.nan)
+        slope, _, _ = rolling_regression(strain, stress, window_size)
+        youngs[window_size:] = slope[:-1] / 1000.0  # Convert MPa to GPa
 
-        for i in range(window_size, len(stress)):
-            # Get window of data
-            strain_window = strain[i - window_size:i]
-            stress_window = stress[i - window_size:i]
-
-            # Linear regression
-            slope, _, r_value, _, _ = stats.linregress(strain_window, stress_window)
-
-            # Young's modulus in GPa (stress in MPa, strain dimensionless)
-            youngs[i] = slope / 1000.0  # Convert MPa to GPa
+        # Windows containing samples on both sides of a gap
+        for b in breaks if breaks is not None else ():
+            youngs[max(b + 1, 0):max(b + window_size, 0)] = np.nan
 
         return youngs
 
@@ -101,3 +193,128 @@ class MechanicsCalculator:
 
         # Convert to GPa
         return slope / 1000.0
+
+
+class RollingModulus:
+    """
+    Streaming rolling Young's modulus.
+
+    Produces the same values as MechanicsCalculator.calculate_youngs_modulus()
+    over the whole session (the slope of the window of window_size samples
+    before each sample, NaN for windows spanning a gap), one block at a time.
+    The window sums (Σx, Σy, Σx², Σxy) are updated incrementally: each new
+    sample adds its terms and removes those of the sample leaving the window,
+    vectorized over the block, so each sample costs O(1) regardless of the
+    window size. The sums are taken about a reference point and recomputed
+    from the kept window every RESUM_WINDOWS windows of samples, re-centered
+    on the window mean, so rounding errors do not accumulate.
+    """
+
+    RESUM_WINDOWS = 8
+
+    def __init__(self, window_size: int = 100):
+        """
+        Initialize estimator.
+
+        Args:
+            window_size: Number of points for rolling window
+        """
+        self.window_size = window_size
+        self.reset()
+
+    def reset(self):
+        """Forget all samples (start of a new session)."""
+        # Last window_size samples; sample k is in slot k % window_size
+        self.strain_window = np.zeros(self.window_size)
+        self.stress_window = np.zeros(self.window_size)
+        self.count = 0     # Samples seen
+        self.breaks = []   # Sample counts at recent gaps
+        self.origin = (0.0, 0.0)  # (strain, stress) the sums are taken about
+        self.sums = np.zeros(4)   # Σdx, Σdy, Σdx², Σdxdy over the window before sample count
+        self.since_resum = 0
+
+    def update(self, stress: np.ndarray, strain: np.ndarray, gap: bool = False) -> np.ndarray:
+        """
+        Add a block and get the modulus at each of its samples.
+
+        Args:
+            stress: Stress array in MPa
+            strain: Strain array (dimensionless)
+            gap: Samples were lost before this block
+
+        Returns:
+            Array of Young's modulus values in GPa
+        """
+        stress = np.asarray(stress, dtype=np.float64)
+        strain = np.asarray(strain, dtype=np.float64)
+        n = len(stress)
+        w = self.window_size
+        c = self.count
+        if gap and c > 0:
+            self.breaks.append(c)
+        self.breaks = [b for b in self.breaks if b + w > c]
+        if n == 0:
+            return np.empty(0)
+
+        if c == 0:
+            self.origin = (strain[0], stress[0])
+        elif c >= w and self.since_resum >= self.RESUM_WINDOWS * w:
+            self._resum()
+        x0, y0 = self.origin
+
+        # Samples leaving the window as each block sample enters it: sample
+        # c + j - w, from the kept window for j < w and the block after that
+        m = min(n, w)
+        leaving = c - w + np.arange(m)
+        slots = leaving % w
+        leave_x = np.concatenate([self.strain_window[slots], strain[:n - m]]) - x0
+        leave_y = np.concatenate([self.stress_window[slots], stress[:n - m]]) - y0
+        if c < w:
+            # No sample leaves before the window is full
+            valid = np.concatenate([leaving >= 0, np.ones(n - m, dtype=bool)])
+            leave_x *= valid
+            leave_y *= valid
+        enter_x = strain - x0
+        enter_y = stress - y0
+
+        # Window sums before each block sample, then before the next block
+        sums = np.empty((4, n + 1))
+        sums[:, 0] = self.sums
+        np.cumsum(enter_x - leave_x, out=sums[0, 1:])
+        np.cumsum(enter_y - leave_y, out=sums[1, 1:])
+        np.cumsum(enter_x * enter_x - leave_x * leave_x, out=sums[2, 1:])
+        np.cumsum(enter_x * enter_y - leave_x * leave_y, out=sums[3, 1:])
+        sums[:, 1:] += self.sums[:, None]
+        self.sums = sums[:, n].copy()
+
+        # Sample i of the block has session index c + i and a full window from index w
+        youngs = np.full(n, np.nan)
+        first = max(w - c, 0)
+        if first < n:
+            sx, sy, sxx, sxy = sums[:, first:n]
+            cxx = sxx - sx * sx / w
+            cxy = sxy - sx * sy / w
+            # Constant x (up to rounding) has no slope, as in rolling_regression()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                youngs[first:] = np.where(cxx > 1e-12 * sxx, cxy / cxx, np.nan) / 1000.0
+
+        # Windows containing samples on both sides of a gap
+        index = c + np.arange(n)
+        for b in self.breaks:
+            youngs[(index > b) & (index < b + w)] = np.nan
+
+        slots = (c + n - m + np.arange(m)) % w
+        self.strain_window[slots] = strain[n - m:]
+        self.stress_window[slots] = stress[n - m:]
+        self.count += n
+        self.since_resum += n
+        return youngs
+
+    def _resum(self):
+        """Recompute the window sums about the window mean (window full)."""
+        x0, y0 = self.strain_window.mean(), self.stress_window.mean()
+        dx = self.strain_window - x0
+        dy = self.stress_window - y0
+        self.origin = (x0, y0)
+        self.sums = np.array([dx.sum(), dy.sum(), dx @ dx, dx @ dy])
+        self.since_resum = 0
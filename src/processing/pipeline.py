@@ -0,0 +1,470 @@
+"""Composable block processing pipeline with per-stage statistics."""
+
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from ..acquisition.sample_block import SampleBlock
+from .calibration import CalibrationManager
+from .conversion import FusedConversion
+from .filters import FILTER_TYPES, Decimator, filter_from_config
+from .mechanics import MechanicsCalculator, RollingModulus
+
+
+# Known stages; a configuration lists the stages to run, in order
+PIPELINE_STAGES = (
+    'filter', 'decimate', 'conversion', 'calibration', 'mechanics', 'modulus', 'events', 'logger',
+    'live_tap', 'display'
+)
+DEFAULT_STAGES = (
+    'filter', 'decimate', 'conversion', 'modulus', 'events', 'logger', 'live_tap', 'display'
+)
+
+
+class PipelineData:
+    """Products of one block as it moves through the pipeline."""
+
+    __slots__ = ('raw', 'sensors', 'engineering', 'mechanics', 'youngs', 'events')
+
+    def __init__(self, raw: SampleBlock):
+        self.raw = raw
+        self.sensors = raw                              # Sensor signals to convert (raw, filtered or decimated)
+        self.engineering: Optional[SampleBlock] = None  # Rows (force in N, displacement in mm)
+        self.mechanics: Optional[SampleBlock] = None    # Rows (stress in MPa, strain)
+        self.youngs: Optional[np.ndarray] = None        # Rolling Young's modulus in GPa
+        self.events: List[Tuple[str, int, float]] = []  # (kind, sample_index, value)
+
+
+class Stage:
+    """
+    Base class of pipeline stages.
+
+    A stage reads products of earlier stages from PipelineData and adds its
+    own. Outputs are written into buffers the stage reuses for the next
+    block, so they are only valid until then: sinks that keep data must copy
+    it (the logger, session store and display buffer all do).
+    """
+
+    name = ''
+    requires: Tuple[str, ...] = ()  # PipelineData products used
+    provides: Tuple[str, ...] = ()  # PipelineData products set
+
+    def __init__(self):
+        self.buffers: Dict[str, np.ndarray] = {}
+        self.calls = 0
+        self.samples = 0
+        self.time_ns = 0
+        self.max_time_ns = 0
+        self.allocations = 0
+
+    def process(self, data: PipelineData):
+        """Process one block."""
+        raise NotImplementedError
+
+    def reset(self):
+        """Forget state carried between blocks (start of a new session)."""
+
+    def buffer(self, key: str, rows: int, num_samples: int, dtype=np.float64) -> np.ndarray:
+        """
+        Get a reusable C-contiguous (rows, num_samples) output array.
+
+        The underlying buffer is only reallocated when a block is larger
+        than any before it (or the dtype changes); each reallocation is
+        counted.
+        """
+        size = rows * num_samples
+        buffer = self.buffers.get(key)
+        if buffer is None or len(buffer) < size or buffer.dtype != dtype:
+            capacity = max(size, 2 * len(buffer) if buffer is not None else 0)
+            buffer = np.empty(capacity, dtype)
+            self.buffers[key] = buffer
+            self.allocations += 1
+        return buffer[:size].reshape(rows, num_samples)
+
+    def get_statistics(self) -> dict:
+        """Get call count, timing and allocation count."""
+        return {
+            'calls': self.calls,
+            'samples': self.samples,
+            'total_ms': self.time_ns / 1e6,
+            'mean_us': self.time_ns / self.calls / 1e3 if self.calls else 0.0,
+            'max_us': self.max_time_ns / 1e3,
+            'allocations': self.allocations,
+        }
+
+
+class FilterStage(Stage):
+    """
+    Filters sensor voltages before conversion.
+
+    Each configured channel row runs through its chain of streaming filters;
+    other rows pass through unchanged. Raw counts are converted to volts
+    first. Filters are designed for the block sample rate when the first
+    block arrives (and again if the rate changes), and keep their state
+    between blocks, including across gaps. The raw block is left as it is
+    for logging.
+    """
+
+    name = 'filter'
+    requires = ('sensors',)
+    provides = ('sensors',)
+
+    def __init__(self, filters: Dict[int, Sequence[dict]]):
+        """
+        Initialize stage.
+
+        Args:
+            filters: Filter configurations (see filter_from_config()) in
+                order, by block row
+        """
+        super().__init__()
+        self.configs = {row: list(chain) for row, chain in filters.items() if chain}
+        for chain in self.configs.values():
+            for config in chain:
+                if config.get('type') not in FILTER_TYPES:
+                    raise ValueError(
+                        f"Unknown filter type '{config.get('type')}', expected one of {FILTER_TYPES}"
+                    )
+        self.reset()
+
+    def reset(self):
+        self.filters = {}
+        self.sample_rate = None
+
+    def process(self, data: PipelineData):
+        sensors = data.sensors
+        if sensors.sample_rate != self.sample_rate:
+            self.sample_rate = sensors.sample_rate
+            self.filters = {
+                row: [filter_from_config(config, sensors.sample_rate) for config in chain]
+                for row, chain in self.configs.items()
+            }
+
+        dtype = np.float32 if sensors.data.dtype == np.float32 else np.float64
+        out = self.buffer('sensors', sensors.num_channels, sensors.num_samples, dtype)
+        if sensors.is_counts:
+            np.multiply(sensors.data, sensors.scale, out=out)
+            out += sensors.offset
+        else:
+            out[...] = sensors.data
+        for row, chain in self.filters.items():
+            for stage_filter in chain:
+                out[row] = stage_filter.process(out[row])
+                self.allocations += 1  # Filters return new arrays
+        data.sensors = sensors.with_data(out)
+
+
+class DecimationStage(Stage):
+    """
+    Reduces the sample rate of the sensor signals for the stages after it.
+
+    Conversion, modulus, events and the sinks then work at the lower rate;
+    the raw block is left at the full rate for logging.
+    """
+
+    name = 'decimate'
+    requires = ('sensors',)
+    provides = ('sensors',)
+
+    def __init__(self, decimator: Decimator):
+        super().__init__()
+        self.decimator = decimator
+
+    def process(self, data: PipelineData):
+        data.sensors = self.decimator.process(data.sensors)
+        self.allocations += 1  # Decimator returns a new block
+
+    def reset(self):
+        self.decimator.reset()
+
+
+class CalibrationStage(Stage):
+    """Converts voltages (or counts) to force and displacement."""
+
+    name = 'calibration'
+    requires = ('sensors',)
+    provides = ('engineering',)
+
+    def __init__(self, calibration: CalibrationManager):
+        super().__init__()
+        self.calibration = calibration
+
+    def process(self, data: PipelineData):
+        out = self.buffer('engineering', 2, data.sensors.num_samples)
+        data.engineering = self.calibration.convert_block(data.sensors, out=out)
+
+
+class MechanicsStage(Stage):
+    """Computes stress and strain."""
+
+    name = 'mechanics'
+    requires = ('engineering',)
+    provides = ('mechanics',)
+
+    def __init__(self, mechanics: MechanicsCalculator):
+        super().__init__()
+        self.mechanics = mechanics
+
+    def process(self, data: PipelineData):
+        out = self.buffer('mechanics', 2, data.engineering.num_samples)
+        data.mechanics = self.mechanics.calculate_block(data.engineering, out=out)
+
+
+class ConversionStage(Stage):
+    """Computes force, displacement, stress and strain in one fused pass."""
+
+    name = 'conversion'
+    requires = ('sensors',)
+    provides = ('engineering', 'mechanics')
+
+    def __init__(self, conversion: FusedConversion):
+        super().__init__()
+        self.conversion = conversion
+
+    def process(self, data: PipelineData):
+        sensors = data.sensors
+        out = self.buffer('conversion', 4, sensors.num_samples, self.conversion.output_dtype(sensors))
+        data.engineering, data.mechanics = self.conversion.convert(sensors, out=out)
+
+
+class ModulusStage(Stage):
+    """Computes the rolling Young's modulus."""
+
+    name = 'modulus'
+    requires = ('mechanics',)
+    provides = ('youngs',)
+
+    def __init__(self, modulus: RollingModulus):
+        super().__init__()
+        self.modulus = modulus
+
+    def process(self, data: PipelineData):
+        stress, strain = data.mechanics.data
+        data.youngs = self.modulus.update(stress, strain, gap=bool(data.raw.gap))
+        self.allocations += 1  # RollingModulus returns a new array
+
+    def reset(self):
+        self.modulus.reset()
+
+
+class EventStage(Stage):
+    """
+    Detects acquisition gaps and specimen fracture.
+
+    Fracture is reported once per session, at the first sample where the
+    force falls below fracture_drop times its peak, after the peak has
+    exceeded min_force. Event sample indices are at the raw sample rate.
+    """
+
+    name = 'events'
+    requires = ('engineering',)
+    provides = ('events',)
+
+    def __init__(self, fracture_drop: float = 0.5, min_force: float = 100.0):
+        """
+        Initialize detector.
+
+        Args:
+            fracture_drop: Fraction of the peak force that marks fracture
+            min_force: Peak force (N) needed before fracture is detected
+        """
+        super().__init__()
+        self.fracture_drop = fracture_drop
+        self.min_force = min_force
+        self.reset()
+
+    def reset(self):
+        self.peak_force = -np.inf
+        self.fractured = False
+
+    def process(self, data: PipelineData):
+        raw = data.raw
+        if raw.gap:
+            data.events.append(('gap', raw.gap_start, float(raw.gap)))
+        if self.fractured:
+            return
+
+        force = data.engineering.data[0]
+        if len(force) == 0:
+            return
+        peak = np.maximum.accumulate(force)
+        np.maximum(peak, self.peak_force, out=peak)
+        broken = (peak > self.min_force) & (force < self.fracture_drop * peak)
+        if broken.any():
+            i = int(np.argmax(broken))
+            engineering = data.engineering
+            factor = round(raw.sample_rate / engineering.sample_rate)  # Decimation
+            index = (int(engineering.start_index) + i) * factor
+            data.events.append(('fracture', index, float(force[i])))
+            self.fractured = True
+        self.peak_force = peak[-1]
+        self.allocations += 1  # Running peak
+
+
+class BlockSink(Stage):
+    """Passes each block to an object with append_block(raw, engineering, mechanics)."""
+
+    requires = ('engineering', 'mechanics')
+
+    def __init__(self, name: str, target):
+        super().__init__()
+        self.name = name
+        self.target = target
+
+    def process(self, data: PipelineData):
+        self.target.append_block(data.raw, data.engineering, data.mechanics)
+
+
+class CallbackSink(Stage):
+    """Passes the pipeline data of each block to a callback."""
+
+    def __init__(
+        self,
+        name: str,
+        callback: Callable[[PipelineData], None],
+        requires: Sequence[str] = ('engineering', 'mechanics')
+    ):
+        super().__init__()
+        self.name = name
+        self.callback = callback
+        self.requires = tuple(requires)
+
+    def process(self, data: PipelineData):
+        self.callback(data)
+
+
+class Pipeline:
+    """
+    Runs a block through an ordered list of stages.
+
+    Stages are checked at construction: each must come after the stages
+    providing what it requires, and before those using what it provides
+    (stages transforming a product, like filter and decimate, may follow
+    each other). Time and allocations are recorded per stage.
+    """
+
+    def __init__(self, stages: Sequence[Stage]):
+        """
+        Initialize pipeline.
+
+        Args:
+            stages: Stages in processing order
+        """
+        provided = {'raw', 'sensors'}
+        used = set()
+        for stage in stages:
+            missing = [product for product in stage.requires if product not in provided]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' needs {missing} from an earlier stage")
+            late = [product for product in stage.provides if product in used]
+            if late:
+                raise ValueError(f"Stage '{stage.name}' provides {late} used by an earlier stage")
+            provided.update(stage.provides)
+            used.update(product for product in stage.requires if product not in stage.provides)
+        self.stages = list(stages)
+
+    @classmethod
+    def from_config(cls, config: dict, available: Dict[str, Stage]) -> 'Pipeline':
+        """
+        Build a pipeline from the 'pipeline' configuration section.
+
+        Args:
+            config: Full configuration dict; pipeline.stages lists the stage
+                names to run in order (default: DEFAULT_STAGES)
+            available: Stages by name; configured stages that are not
+                available here (e.g. live_tap without an address) are skipped
+
+        Returns:
+            Pipeline
+        """
+        names = (config.get('pipeline') or {}).get('stages') or DEFAULT_STAGES
+        unknown = [name for name in names if name not in PIPELINE_STAGES]
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages {unknown}, expected some of {PIPELINE_STAGES}")
+        return cls([available[name] for name in names if available.get(name) is not None])
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """Stage names in processing order."""
+        return tuple(stage.name for stage in self.stages)
+
+    def process(self, raw: SampleBlock) -> PipelineData:
+        """
+        Run one block through all stages.
+
+        Args:
+            raw: Block from the DAQ
+
+        Returns:
+            Pipeline data with the products of all stages
+        """
+        data = PipelineData(raw)
+        for stage in self.stages:
+            start = time.perf_counter_ns()
+            stage.process(data)
+            elapsed = time.perf_counter_ns() - start
+            stage.calls += 1
+            stage.samples += raw.num_samples
+            stage.time_ns += elapsed
+            stage.max_time_ns = max(stage.max_time_ns, elapsed)
+        return data
+
+    def reset(self):
+        """Reset all stages and their statistics (start of a new session)."""
+        for stage in self.stages:
+            stage.reset()
+            stage.calls = stage.samples = stage.time_ns = stage.max_time_ns = 0
+            stage.allocations = 0
+
+    def get_statistics(self) -> Dict[str, dict]:
+        """Get statistics per stage name, in processing order."""
+        return {stage.name: stage.get_statistics() for stage in self.stages}
+
+
+def standard_stages(
+    config: dict,
+    calibration: CalibrationManager,
+    mechanics: MechanicsCalculator,
+    modulus: Optional[RollingModulus] = None
+) -> Dict[str, Stage]:
+    """
+    Create the processing stages (filter to events) from a configuration.
+
+    Args:
+        config: Full configuration dict (filters lists the filters per
+            channel name; decimation.factor and decimation.taps_per_phase
+            set the processed rate; pipeline.fracture_drop and
+            pipeline.fracture_min_force configure event detection)
+        calibration: Sensor calibrations
+        mechanics: Stress/strain calculator
+        modulus: Rolling modulus estimator (default: 100-sample window)
+
+    Returns:
+        Stages by name ('filter' is None without any filters, 'decimate'
+        with a factor of 1); sinks are added by the caller
+    """
+    pipeline_config = config.get('pipeline') or {}
+    rows = {'load': calibration.load_row, 'displacement': calibration.displacement_row}
+    filters = {}
+    for channel, chain in (config.get('filters') or {}).items():
+        if channel not in rows:
+            raise ValueError(f"Unknown filter channel '{channel}', expected one of {tuple(rows)}")
+        filters[rows[channel]] = [chain] if isinstance(chain, dict) else list(chain or [])
+    filter_stage = FilterStage(filters)
+    decimation_config = config.get('decimation') or {}
+    factor = int(decimation_config.get('factor', 1))
+
+    return {
+        'filter': filter_stage if filter_stage.configs else None,
+        'decimate': DecimationStage(
+            Decimator(factor, decimation_config.get('taps_per_phase', 16))
+        ) if factor > 1 else None,
+        'conversion': ConversionStage(FusedConversion(calibration, mechanics)),
+        'calibration': CalibrationStage(calibration),
+        'mechanics': MechanicsStage(mechanics),
+        'modulus': ModulusStage(modulus or RollingModulus()),
+        'events': EventStage(
+            fracture_drop=pipeline_config.get('fracture_drop', 0.5),
+            min_force=pipeline_config.get('fracture_min_force', 100.0)
+        ),
+    }
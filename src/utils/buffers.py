@@ -1,10 +1,13 @@
 """Thread-safe buffer utilities for data sharing between threads."""
 
 import queue
-from collections import deque
+import time
+from multiprocessing import shared_memory
 from typing import Any, Optional
 import numpy as np
 
+from ..acquisition.sample_block import SampleBlock
+
 
 class DataQueue:
     """Thread-safe queue wrapper for passing data between threads."""
@@ -30,37 +33,519 @@ class DataQueue:
 
 
 class RollingBuffer:
-    """Fixed-size rolling buffer for real-time display."""
-
-    def __init__(self, maxlen: int):
-        self.time = deque(maxlen=maxlen)
-        self.ch0 = deque(maxlen=maxlen)
-        self.ch1 = deque(maxlen=maxlen)
-        self.maxlen = maxlen
-
-    def append(self, time_val: float, ch0_val: float, ch1_val: float):
-        """Append new data point."""
-        self.time.append(time_val)
-        self.ch0.append(ch0_val)
-        self.ch1.append(ch1_val)
-
-    def extend(self, time_arr: np.ndarray, ch0_arr: np.ndarray, ch1_arr: np.ndarray):
-        """Extend buffer with arrays."""
-        for t, c0, c1 in zip(time_arr, ch0_arr, ch1_arr):
-            self.time.append(t)
-            self.ch0.append(c0)
-            self.ch1.append(c1)
+    """
+    Fixed-size rolling buffer for real-time display.
+
+    Samples are stored in one preallocated (num_channels, maxlen) array used
+    as a ring, so extend() is a vectorized copy of at most two slices and
+    clear() only resets the counters. The contents are read oldest first,
+    either as up to two zero-copy segments or as one contiguous array.
+    """
+
+    def __init__(self, maxlen: int, num_channels: int = 3, dtype=np.float64):
+        """
+        Initialize buffer.
+
+        Args:
+            maxlen: Samples kept per channel
+            num_channels: Number of channels (e.g. time, force, displacement)
+            dtype: Sample data type
+        """
+        self.maxlen = int(maxlen)
+        self.num_channels = num_channels
+        self.data = np.zeros((num_channels, self.maxlen), dtype=dtype)
+        self.head = 0   # Position of the next write
+        self.count = 0  # Valid samples
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the sample storage in bytes."""
+        return self.data.nbytes
+
+    def append(self, *values: float):
+        """Append new data point (one value per channel)."""
+        self.data[:, self.head] = values
+        self.head = (self.head + 1) % self.maxlen
+        self.count = min(self.count + 1, self.maxlen)
+
+    def extend(self, *arrays: np.ndarray):
+        """Extend buffer with arrays (one per channel, equal lengths)."""
+        n = len(arrays[0])
+        if n == 0:
+            return
+        if n >= self.maxlen:
+            # Only the newest maxlen samples survive
+            for row, values in zip(self.data, arrays):
+                row[:] = values[n - self.maxlen:]
+            self.head = 0
+            self.count = self.maxlen
+            return
+
+        first = min(n, self.maxlen - self.head)
+        for row, values in zip(self.data, arrays):
+            row[self.head:self.head + first] = values[:first]
+            row[:n - first] = values[first:]
+        self.head = (self.head + n) % self.maxlen
+        self.count = min(self.count + n, self.maxlen)
+
+    def segments(self, n: Optional[int] = None) -> list:
+        """
+        Get the newest samples as zero-copy views.
+
+        Args:
+            n: Number of samples (default: all)
+
+        Returns:
+            One or two (num_channels, k) views, oldest first
+        """
+        n = self.count if n is None else min(n, self.count)
+        start = self.head - n
+        if start >= 0:
+            return [self.data[:, start:self.head]]
+        return [self.data[:, start:], self.data[:, :self.head]]
+
+    def latest(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        Get the newest samples as one (num_channels, n) array.
+
+        This is a view unless the samples wrap around the end of the ring,
+        in which case the two segments are copied into a new array.
+
+        Args:
+            n: Number of samples (default: all)
+        """
+        segments = self.segments(n)
+        if len(segments) == 1:
+            return segments[0]
+        return np.concatenate(segments, axis=1)
 
     def get_arrays(self) -> tuple:
-        """Get buffer contents as numpy arrays."""
-        return (
-            np.array(self.time),
-            np.array(self.ch0),
-            np.array(self.ch1)
-        )
+        """Get buffer contents as numpy arrays (one per channel)."""
+        return tuple(self.latest())
 
     def clear(self):
         """Clear buffer."""
-        self.time.clear()
-        self.ch0.clear()
-        self.ch1.clear()
+        self.head = 0
+        self.count = 0
+
+
+class BlockRing:
+    """
+    Lock-free single-producer/single-consumer ring of sample blocks.
+
+    Samples are copied into one preallocated (num_channels, capacity) array
+    and block metadata into fixed-size descriptor arrays. Only the producer
+    advances the head counters and only the consumer advances the tail, so
+    no lock is needed between one acquisition thread and one processing
+    thread.
+
+    Blocks lost to backpressure are reported on the next delivered block:
+    the consumer compares each block's start_index with the end of the
+    previous one and adds the missing samples to its gap (and sets overrun).
+
+    Backpressure policies when the ring is full:
+        'drop-oldest': discard the oldest unread blocks
+        'block': wait for the consumer (up to block_timeout), then drop the new block
+        'grow': double the preallocated storage
+    """
+
+    POLICIES = ('drop-oldest', 'block', 'grow')
+
+    # Counter slots; producer-owned except TAIL
+    HEAD = 0            # Blocks written
+    HEAD_POS = 1        # Samples written
+    DROPPED_UPTO = 2    # Blocks below this index were discarded
+    DROPPED_BLOCKS = 3
+    DROPPED_SAMPLES = 4
+    HIGH_WATER = 5
+    TAIL = 6            # Blocks read (consumer-owned)
+    FIRST_INDEX = 7     # Sample index where the first pushed block's gap starts
+    NUM_COUNTERS = 8
+
+    # Block descriptor fields
+    DESCRIPTORS = (
+        ('pos', np.int64),
+        ('length', np.int64),
+        ('start_index', np.int64),
+        ('sequence', np.int64),
+        ('t0', np.float64),
+        ('sample_rate', np.float64),
+        ('overrun', np.bool_),
+        ('gap', np.int64),
+        ('scale', np.float64),      # NaN for blocks in physical units
+        ('offset', np.float64),
+        ('anchor_index', np.int64),         # -1 if the block has no clock anchor
+        ('anchor_monotonic_ns', np.int64),
+        ('anchor_wall_ns', np.int64),
+    )
+
+    def __init__(
+        self,
+        num_channels: int,
+        capacity: int,
+        max_blocks: int = 256,
+        policy: str = 'drop-oldest',
+        dtype=np.float64,
+        block_timeout: float = 1.0
+    ):
+        """
+        Initialize ring.
+
+        Args:
+            num_channels: Number of channels per block
+            capacity: Sample capacity per channel
+            max_blocks: Maximum number of queued blocks
+            policy: Backpressure policy ('drop-oldest', 'block' or 'grow')
+            dtype: Sample data type
+            block_timeout: Maximum producer wait in seconds for the 'block' policy
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown backpressure policy '{policy}', expected one of {self.POLICIES}")
+
+        self.num_channels = num_channels
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._counters, self._storage = self._allocate(num_channels, capacity, max_blocks, np.dtype(dtype))
+        self._next_index: Optional[int] = None  # Consumer-owned: sample index expected next
+
+    def _allocate(self, num_channels: int, capacity: int, max_blocks: int, dtype: np.dtype) -> tuple:
+        """Allocate counters, sample storage and block descriptor arrays."""
+        counters = np.zeros(self.NUM_COUNTERS, dtype=np.int64)
+        storage = {'data': np.zeros((num_channels, capacity), dtype=dtype)}
+        for key, field_dtype in self.DESCRIPTORS:
+            storage[key] = np.zeros(max_blocks, dtype=field_dtype)
+        return counters, storage
+
+    @property
+    def capacity(self) -> int:
+        """Sample capacity per channel."""
+        return self._storage['data'].shape[1]
+
+    @property
+    def max_blocks(self) -> int:
+        """Maximum number of queued blocks."""
+        return len(self._storage['pos'])
+
+    @property
+    def dropped_blocks(self) -> int:
+        """Number of blocks discarded by backpressure."""
+        return int(self._counters[self.DROPPED_BLOCKS])
+
+    @property
+    def dropped_samples(self) -> int:
+        """Number of samples per channel discarded by backpressure."""
+        return int(self._counters[self.DROPPED_SAMPLES])
+
+    @property
+    def high_water_mark(self) -> int:
+        """Maximum number of blocks queued at once."""
+        return int(self._counters[self.HIGH_WATER])
+
+    def __len__(self) -> int:
+        """Approximate number of queued blocks."""
+        return int(self._counters[self.HEAD] - self._oldest())
+
+    def push(self, block: SampleBlock) -> bool:
+        """
+        Copy a block into the ring (producer side).
+
+        Args:
+            block: Block to enqueue
+
+        Returns:
+            True if the block was queued, False if it was dropped
+        """
+        counters = self._counters
+        n = block.num_samples
+        if n > self.capacity and self.policy != 'grow':
+            raise ValueError(f"Block of {n} samples exceeds ring capacity of {self.capacity}")
+        if counters[self.HEAD] == 0 and counters[self.DROPPED_BLOCKS] == 0:
+            counters[self.FIRST_INDEX] = block.gap_start
+
+        deadline = None
+        while not self._fits(n):
+            if self.policy == 'drop-oldest':
+                self._drop_oldest()
+            elif self.policy == 'grow':
+                self._grow(n)
+            else:
+                if deadline is None:
+                    deadline = time.perf_counter() + self.block_timeout
+                elif time.perf_counter() > deadline:
+                    counters[self.DROPPED_BLOCKS] += 1
+                    counters[self.DROPPED_SAMPLES] += n
+                    return False
+                time.sleep(0.0005)
+
+        head = int(counters[self.HEAD])
+        head_pos = int(counters[self.HEAD_POS])
+        storage = self._storage
+        capacity = storage['data'].shape[1]
+        start = head_pos % capacity
+        first = min(n, capacity - start)
+        storage['data'][:, start:start + first] = block.data[:, :first]
+        storage['data'][:, :n - first] = block.data[:, first:]
+
+        slot = head % len(storage['pos'])
+        storage['pos'][slot] = head_pos
+        storage['length'][slot] = n
+        storage['start_index'][slot] = block.start_index
+        storage['sequence'][slot] = block.sequence
+        storage['t0'][slot] = block.t0
+        storage['sample_rate'][slot] = block.sample_rate
+        storage['overrun'][slot] = block.overrun
+        storage['gap'][slot] = block.gap
+        storage['scale'][slot] = np.nan if block.scale is None else block.scale
+        storage['offset'][slot] = block.offset
+        anchor_index, monotonic_ns, wall_ns = block.anchor if block.anchor is not None else (-1, 0, 0)
+        storage['anchor_index'][slot] = anchor_index
+        storage['anchor_monotonic_ns'][slot] = monotonic_ns
+        storage['anchor_wall_ns'][slot] = wall_ns
+
+        # Publish (head is advanced last)
+        counters[self.HEAD_POS] = head_pos + n
+        counters[self.HEAD] = head + 1
+
+        queued = head + 1 - self._oldest()
+        if queued > counters[self.HIGH_WATER]:
+            counters[self.HIGH_WATER] = queued
+
+        return True
+
+    def drain(self, max_blocks: Optional[int] = None) -> list:
+        """
+        Remove queued blocks from the ring (consumer side).
+
+        Args:
+            max_blocks: Maximum number of blocks to return (default: all queued)
+
+        Returns:
+            List of SampleBlocks in order
+        """
+        counters = self._counters
+
+        # Read head before storage so a concurrent grow cannot hide blocks
+        head = int(counters[self.HEAD])
+        storage = self._storage
+        capacity = storage['data'].shape[1]
+        slots = len(storage['pos'])
+
+        first_block = self._oldest()
+        last_block = head if max_blocks is None else min(head, first_block + max_blocks)
+        if self._next_index is None and head > 0:
+            self._next_index = int(counters[self.FIRST_INDEX])
+
+        blocks = []
+        for i in range(first_block, last_block):
+            slot = i % slots
+            n = int(storage['length'][slot])
+            start = int(storage['pos'][slot]) % capacity
+            first = min(n, capacity - start)
+
+            data = np.empty((self.num_channels, n), dtype=storage['data'].dtype)
+            data[:, :first] = storage['data'][:, start:start + first]
+            data[:, first:] = storage['data'][:, :n - first]
+
+            scale = float(storage['scale'][slot])
+            anchor = None
+            if storage['anchor_index'][slot] >= 0:
+                anchor = (
+                    int(storage['anchor_index'][slot]),
+                    int(storage['anchor_monotonic_ns'][slot]),
+                    int(storage['anchor_wall_ns'][slot])
+                )
+            block = SampleBlock(
+                data,
+                t0=storage['t0'][slot],
+                sample_rate=storage['sample_rate'][slot],
+                start_index=storage['start_index'][slot],
+                sequence=int(storage['sequence'][slot]),
+                overrun=bool(storage['overrun'][slot]),
+                gap=int(storage['gap'][slot]),
+                scale=None if np.isnan(scale) else scale,
+                offset=float(storage['offset'][slot]),
+                anchor=anchor
+            )
+
+            # Discard if the producer overwrote this block while we copied it
+            if i < counters[self.DROPPED_UPTO]:
+                continue
+
+            # Samples of dropped blocks become part of this block's gap
+            missing = int(block.start_index) - self._next_index
+            if missing > block.gap:
+                block.gap = missing
+                block.overrun = True
+            self._next_index = int(block.start_index) + n
+            blocks.append(block)
+
+        counters[self.TAIL] = max(last_block, counters[self.TAIL])
+        return blocks
+
+    def get_statistics(self) -> dict:
+        """Get ring occupancy and loss counters."""
+        return {
+            'queued_blocks': len(self),
+            'high_water_mark': self.high_water_mark,
+            'dropped_blocks': self.dropped_blocks,
+            'dropped_samples': self.dropped_samples,
+            'capacity': self.capacity,
+            'max_blocks': self.max_blocks,
+        }
+
+    def _oldest(self) -> int:
+        """Index of the oldest block still in the ring."""
+        return int(max(self._counters[self.TAIL], self._counters[self.DROPPED_UPTO]))
+
+    def _fits(self, n: int, capacity: Optional[int] = None) -> bool:
+        """Check whether a block of n samples fits without overwriting unread data."""
+        storage = self._storage
+        if capacity is None:
+            capacity = storage['data'].shape[1]
+            if self._counters[self.HEAD] - self._oldest() >= len(storage['pos']):
+                return False
+
+        oldest = self._oldest()
+        if oldest == self._counters[self.HEAD]:
+            return n <= capacity
+        oldest_pos = storage['pos'][oldest % len(storage['pos'])]
+        return self._counters[self.HEAD_POS] + n - oldest_pos <= capacity
+
+    def _drop_oldest(self):
+        """Discard the oldest unread block (producer side)."""
+        counters = self._counters
+        oldest = self._oldest()
+        slot = oldest % len(self._storage['pos'])
+        counters[self.DROPPED_BLOCKS] += 1
+        counters[self.DROPPED_SAMPLES] += self._storage['length'][slot]
+        counters[self.DROPPED_UPTO] = oldest + 1
+
+    def _grow(self, n: int):
+        """Double storage until a block of n samples fits (producer side)."""
+        old = self._storage
+        old_capacity = old['data'].shape[1]
+        old_slots = len(old['pos'])
+        head = int(self._counters[self.HEAD])
+        oldest = self._oldest()
+
+        capacity = old_capacity
+        while not self._fits(n, capacity):
+            capacity *= 2
+        slots = old_slots * 2 if head - oldest >= old_slots else old_slots
+
+        _, new = self._allocate(self.num_channels, capacity, slots, old['data'].dtype)
+
+        # Copy queued blocks to the same absolute positions in the new storage
+        for i in range(oldest, head):
+            old_slot = i % old_slots
+            new_slot = i % slots
+            for key, _ in self.DESCRIPTORS:
+                new[key][new_slot] = old[key][old_slot]
+
+            positions = old['pos'][old_slot] + np.arange(old['length'][old_slot])
+            new['data'][:, positions % capacity] = old['data'][:, positions % old_capacity]
+
+        self._storage = new
+
+
+class SharedBlockRing(BlockRing):
+    """
+    BlockRing whose counters and storage live in a shared memory segment.
+
+    One process creates the ring and passes spec() to another process,
+    which attaches with SharedBlockRing.attach(). The 'grow' policy is not
+    supported because the segment size is fixed.
+    """
+
+    POLICIES = ('drop-oldest', 'block')
+
+    def __init__(
+        self,
+        num_channels: int,
+        capacity: int,
+        max_blocks: int = 256,
+        policy: str = 'drop-oldest',
+        dtype=np.float64,
+        block_timeout: float = 1.0,
+        name: Optional[str] = None
+    ):
+        """
+        Create a ring, or attach to an existing one.
+
+        Args:
+            num_channels: Number of channels per block
+            capacity: Sample capacity per channel
+            max_blocks: Maximum number of queued blocks
+            policy: Backpressure policy ('drop-oldest' or 'block')
+            dtype: Sample data type
+            block_timeout: Maximum producer wait in seconds for the 'block' policy
+            name: Name of an existing segment to attach to (default: create one)
+        """
+        self._name = name
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        super().__init__(num_channels, capacity, max_blocks, policy, dtype, block_timeout)
+
+    @classmethod
+    def attach(cls, spec: dict) -> 'SharedBlockRing':
+        """Attach to a ring created in another process from its spec()."""
+        return cls(**spec)
+
+    @property
+    def name(self) -> str:
+        """Shared memory segment name."""
+        return self._shm.name
+
+    def spec(self) -> dict:
+        """Get picklable parameters for attaching from another process."""
+        return {
+            'num_channels': self.num_channels,
+            'capacity': self.capacity,
+            'max_blocks': self.max_blocks,
+            'policy': self.policy,
+            'dtype': self._storage['data'].dtype.str,
+            'block_timeout': self.block_timeout,
+            'name': self.name,
+        }
+
+    def _allocate(self, num_channels: int, capacity: int, max_blocks: int, dtype: np.dtype) -> tuple:
+        """Lay out counters, sample storage and descriptors in one segment."""
+        layout = [('counters', np.dtype(np.int64), (self.NUM_COUNTERS,))]
+        layout.append(('data', dtype, (num_channels, capacity)))
+        for key, field_dtype in self.DESCRIPTORS:
+            layout.append((key, np.dtype(field_dtype), (max_blocks,)))
+
+        offsets = []
+        size = 0
+        for _, field_dtype, shape in layout:
+            size = -(-size // 8) * 8  # 8-byte alignment
+            offsets.append(size)
+            size += field_dtype.itemsize * int(np.prod(shape))
+
+        if self._name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._shm.buf[:size] = bytes(size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=self._name)
+
+        arrays = {
+            key: np.ndarray(shape, dtype=field_dtype, buffer=self._shm.buf, offset=offset)
+            for (key, field_dtype, shape), offset in zip(layout, offsets)
+        }
+        counters = arrays.pop('counters')
+        return counters, arrays
+
+    def close(self):
+        """Detach from the shared memory segment."""
+        if self._shm is not None:
+            # Release array views before closing the mapping
+            self._counters = None
+            self._storage = None
+            self._shm.close()
+
+    def unlink(self):
+        """Destroy the shared memory segment (call once, from the creator)."""
+        if self._shm is not None:
+            self._shm.unlink()
@@ -0,0 +1,423 @@
+"""Columnar storage of a test session's samples, in memory or spilled to disk."""
+
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict, Optional, Sequence, Tuple, Union
+import numpy as np
+
+
+# Columns kept by the GUI for the whole session
+SESSION_COLUMNS = (
+    ('time', np.float64),
+    ('ch0', np.float64),            # Load cell voltage (V)
+    ('ch1', np.float64),            # Displacement voltage (V)
+    ('force', np.float64),
+    ('displacement', np.float64),
+    ('stress', np.float64),
+    ('strain', np.float64),
+    ('youngs', np.float64),
+)
+
+
+class SessionStore:
+    """
+    Growable NumPy columns of a session's samples.
+
+    Each column is a preallocated array whose capacity doubles when full, so
+    appending a block is a vectorized copy with amortized O(1) cost per
+    sample. Reads return read-only views of the valid prefix, without
+    copying.
+
+    One thread may append while others read: the length is advanced only
+    after the data is written, and growth replaces the arrays rather than
+    resizing them in place, so views taken earlier stay valid (they just do
+    not see later samples).
+    """
+
+    def __init__(
+        self,
+        columns: Union[Dict[str, np.dtype], Sequence[Tuple[str, np.dtype]]] = SESSION_COLUMNS,
+        capacity: int = 4096
+    ):
+        """
+        Initialize store.
+
+        Args:
+            columns: Column schema as (name, dtype) pairs or a dict
+            capacity: Initial samples per column
+        """
+        self.schema = {name: np.dtype(dtype) for name, dtype in dict(columns).items()}
+        self.initial_capacity = max(int(capacity), 1)
+        self.capacity = self.initial_capacity
+        self.arrays = {name: np.empty(self.capacity, dtype) for name, dtype in self.schema.items()}
+        self.length = 0
+        self.grow_count = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.column(name)
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """Column names in schema order."""
+        return tuple(self.schema)
+
+    def extend(self, **values: np.ndarray):
+        """
+        Append samples to every column.
+
+        Args:
+            **values: One array per column name, all of the same length
+        """
+        n = self._block_length(values)
+        if self.length + n > self.capacity:
+            self._reserve(n)
+        end = self.length + n
+        for name, array in values.items():
+            self.arrays[name][self.length:end] = array
+        self.length = end
+
+    def column(self, name: str) -> np.ndarray:
+        """Get a read-only view of a column's samples."""
+        return self._view(name, self.length)
+
+    def columns(self, *names: str) -> Tuple[np.ndarray, ...]:
+        """Get read-only views of several columns, all of the same length."""
+        length = self.length
+        return tuple(self._view(name, length) for name in (names or self.schema))
+
+    def tail(self, name: str, n: int) -> np.ndarray:
+        """Get a read-only view of a column's newest n samples."""
+        length = self.length
+        return self._view(name, length)[max(length - n, 0):]
+
+    def last(self, name: str):
+        """Get the newest value of a column (None if the store is empty)."""
+        length = self.length
+        return self.arrays[name][length - 1] if length else None
+
+    def clear(self, release: bool = False):
+        """
+        Remove all samples.
+
+        Args:
+            release: Also shrink the columns back to the initial capacity
+        """
+        self.length = 0
+        if release and self.capacity > self.initial_capacity:
+            self.capacity = self.initial_capacity
+            self.arrays = {name: np.empty(self.capacity, dtype) for name, dtype in self.schema.items()}
+
+    def close(self):
+        """Release storage (nothing to do for in-memory columns)."""
+
+    def memory_usage(self) -> dict:
+        """Get sample count, capacity and bytes used/allocated per column and in total."""
+        columns = {
+            name: {
+                'dtype': str(dtype),
+                'used_bytes': self.length * dtype.itemsize,
+                'allocated_bytes': self.arrays[name].nbytes,
+            }
+            for name, dtype in self.schema.items()
+        }
+        return {
+            'samples': self.length,
+            'capacity': self.capacity,
+            'grow_count': self.grow_count,
+            'used_bytes': sum(column['used_bytes'] for column in columns.values()),
+            'allocated_bytes': sum(column['allocated_bytes'] for column in columns.values()),
+            'columns': columns,
+        }
+
+    def _block_length(self, values: Dict[str, np.ndarray]) -> int:
+        """Check a block's columns against the schema and get its length."""
+        if values.keys() != self.schema.keys():
+            missing = set(self.schema) - set(values)
+            unknown = set(values) - set(self.schema)
+            raise ValueError(f"Columns do not match the schema (missing: {sorted(missing)}, "
+                             f"unknown: {sorted(unknown)})")
+
+        lengths = {len(array) for array in values.values()}
+        if len(lengths) != 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+        return lengths.pop()
+
+    def _view(self, name: str, length: int) -> np.ndarray:
+        view = self.arrays[name][:length]
+        view.flags.writeable = False
+        return view
+
+    def _reserve(self, n: int):
+        """Double the capacity until n more samples fit."""
+        capacity = self.capacity
+        while capacity < self.length + n:
+            capacity *= 2
+
+        arrays = {}
+        for name, array in self.arrays.items():
+            grown = np.empty(capacity, array.dtype)
+            grown[:self.length] = array[:self.length]
+            arrays[name] = grown
+        self.arrays = arrays
+        self.capacity = capacity
+        self.grow_count += 1
+
+
+class SpilledColumn:
+    """
+    Read-only logical array over a spilled column.
+
+    The samples on disk are followed by the hot tail in memory. Indexing
+    with an integer or a slice reads only the requested samples (the disk
+    part through a temporary memory map, so its pages are released again);
+    np.asarray() materializes the whole column.
+
+    The hot tail is the store's ring, which the writer keeps reusing. Hot
+    samples it overwrites while (or after) they are read were spilled
+    first, so they are read again from disk.
+    """
+
+    def __init__(self, store: 'SpillingSessionStore', name: str, spilled: int, length: int):
+        """
+        Initialize view.
+
+        Args:
+            store: Store holding the column
+            name: Column name
+            spilled: Number of samples on disk
+            length: Number of samples in memory that follow them
+        """
+        self.store = store
+        self.path = store.paths[name]
+        self.dtype = store.schema[name]
+        self.ring = store.arrays[name]
+        self.spilled = spilled
+        self.shape = (spilled + length,)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        data = self[:]
+        return data if dtype is None else data.astype(dtype, copy=False)
+
+    def __getitem__(self, key):
+        length = len(self)
+        if isinstance(key, (int, np.integer)):
+            index = key + length if key < 0 else key
+            if not 0 <= index < length:
+                raise IndexError(f"index {key} is out of bounds for length {length}")
+            if index >= self.spilled:
+                return self._hot(index, index + 1, 1)[0]
+            return self._disk(self.spilled)[index].copy()
+
+        if not isinstance(key, slice):
+            raise TypeError("SpilledColumn supports integer and slice indexing only")
+
+        start, stop, step = key.indices(length)
+        if step < 0:
+            indices = range(start, stop, step)
+            if len(indices) == 0:
+                return np.empty(0, self.dtype)
+            return self[indices[-1]:indices[0] + 1:-step][::-1]
+
+        # Disk part, then the hot part starting at the next index on the stride
+        disk_indices = range(start, min(stop, self.spilled), step)
+        parts = []
+        if len(disk_indices):
+            parts.append(np.array(self._disk(self.spilled)[disk_indices.start:disk_indices.stop:step]))
+        next_index = start + len(disk_indices) * step
+        if stop > self.spilled and max(next_index, self.spilled) < stop:
+            parts.append(self._hot(max(next_index, self.spilled), stop, step))
+        if not parts:
+            return np.empty(0, self.dtype)
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def _hot(self, start: int, stop: int, step: int) -> np.ndarray:
+        """Copy hot samples [start, stop) on the stride from the ring (sample k is in slot k % capacity)."""
+        capacity = len(self.ring)
+        slot = start % capacity
+        wrap = start - slot + capacity  # First sample index back at slot 0
+        parts = [self.ring[slot:min(stop, wrap) - (start - slot):step]]
+        next_index = start + len(parts[0]) * step
+        if next_index < stop:
+            parts.append(self.ring[next_index - wrap:stop - wrap:step])
+        data = np.concatenate(parts) if len(parts) > 1 else parts[0].copy()
+
+        # Samples below this were overwritten, after spilling, by the writer
+        overwritten = self.store.reserved - capacity
+        if overwritten > start:
+            count = min(-(-(overwritten - start) // step), len(data))
+            data[:count] = self._disk(self.store.spilled)[start:start + count * step:step]
+        return data
+
+    def _disk(self, spilled: int) -> np.ndarray:
+        return np.memmap(self.path, dtype=self.dtype, mode='r', shape=(spilled,))
+
+
+class SpillingSessionStore(SessionStore):
+    """
+    Session store that keeps a hot tail in memory and spills older samples to disk.
+
+    The hot tail is a ring of a fixed number of segments per column, sized
+    from the memory budget, in which sample k is kept in slot k % capacity.
+    When it is full the oldest segments are appended to one file per column
+    and their slots reused, so memory use stays bounded however long the
+    test runs and nothing is reallocated or moved. Reads return
+    SpilledColumn views that present disk and memory as one array; recent
+    samples (tail(), last()) do not touch the disk.
+    """
+
+    def __init__(
+        self,
+        columns: Union[Dict[str, np.dtype], Sequence[Tuple[str, np.dtype]]] = SESSION_COLUMNS,
+        directory: Optional[str] = None,
+        memory_budget: int = 64 * 2**20,
+        segment_samples: int = 65536
+    ):
+        """
+        Initialize store.
+
+        Args:
+            columns: Column schema as (name, dtype) pairs or a dict
+            directory: Directory for the column files (default: a temporary
+                directory removed by close())
+            memory_budget: Bytes of hot tail across all columns (at least two
+                segments are kept)
+            segment_samples: Samples spilled to disk at a time
+        """
+        schema = {name: np.dtype(dtype) for name, dtype in dict(columns).items()}
+        row_bytes = sum(dtype.itemsize for dtype in schema.values())
+        segments = max(int(memory_budget) // (segment_samples * row_bytes), 2)
+        super().__init__(schema, capacity=segments * segment_samples)
+
+        self.memory_budget = memory_budget
+        self.segment_samples = segment_samples
+        self.owns_directory = directory is None
+        self.directory = tempfile.mkdtemp(prefix='session_') if directory is None else directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.paths = {name: os.path.join(self.directory, f'{name}.bin') for name in self.schema}
+        self.files = {name: open(path, 'w+b') for name, path in self.paths.items()}
+        self.spilled = 0
+        self.reserved = 0  # End of the samples being written to the ring
+        self.spill_count = 0
+        self.lock = threading.Lock()  # Keeps (spilled, length) consistent for readers
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.spilled + self.length
+
+    def extend(self, **values: np.ndarray):
+        """
+        Append samples to every column, spilling the oldest to disk as needed.
+
+        Args:
+            **values: One array per column name, all of the same length
+        """
+        n = self._block_length(values)
+        excess = self.length + n - self.capacity
+        if excess > 0:
+            segments = -(-excess // self.segment_samples)
+            self._spill(min(segments * self.segment_samples, self.length))
+
+        skip = n - self.capacity
+        if skip > 0:
+            # A block larger than the hot tail: its oldest samples go straight to disk
+            for name, array in values.items():
+                np.asarray(array[:skip], dtype=self.schema[name]).tofile(self.files[name])
+                self.files[name].flush()
+            with self.lock:
+                self.spilled += skip
+            values = {name: array[skip:] for name, array in values.items()}
+            n -= skip
+
+        # The slots written held samples already spilled; readers check reserved
+        start = self.spilled + self.length
+        self.reserved = start + n
+        slot = start % self.capacity
+        first = min(n, self.capacity - slot)
+        for name, array in values.items():
+            ring = self.arrays[name]
+            ring[slot:slot + first] = array[:first]
+            ring[:n - first] = array[first:]
+        with self.lock:
+            self.length += n
+
+    def column(self, name: str) -> SpilledColumn:
+        """Get a read-only logical array of a column's samples."""
+        return self.columns(name)[0]
+
+    def columns(self, *names: str) -> Tuple[SpilledColumn, ...]:
+        """Get read-only logical arrays of several columns, all of the same length."""
+        with self.lock:
+            spilled, length = self.spilled, self.length
+        return tuple(SpilledColumn(self, name, spilled, length) for name in (names or self.schema))
+
+    def tail(self, name: str, n: int) -> np.ndarray:
+        """Get a column's newest n samples."""
+        column = self.column(name)
+        return column[max(len(column) - n, 0):]
+
+    def last(self, name: str):
+        """Get the newest value of a column (None if the store is empty)."""
+        column = self.column(name)
+        return column[-1] if len(column) else None
+
+    def clear(self, release: bool = False):
+        """
+        Remove all samples, in memory and on disk.
+
+        Args:
+            release: Unused; the hot tail has a fixed size
+        """
+        with self.lock:
+            self.length = 0
+            self.spilled = 0
+            self.reserved = 0
+        for file in self.files.values():
+            file.seek(0)
+            file.truncate()
+
+    def close(self):
+        """Close the column files (and remove them if the directory is temporary)."""
+        for file in self.files.values():
+            file.close()
+        if self.owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def memory_usage(self) -> dict:
+        """Get sample counts and bytes in memory and on disk."""
+        usage = super().memory_usage()
+        with self.lock:
+            spilled, length = self.spilled, self.length
+        usage.update({
+            'samples': spilled + length,
+            'hot_samples': length,
+            'spilled_samples': spilled,
+            'spill_count': self.spill_count,
+            'disk_bytes': spilled * sum(dtype.itemsize for dtype in self.schema.values()),
+            'memory_budget': self.memory_budget,
+        })
+        return usage
+
+    def _spill(self, count: int):
+        """Append the oldest count hot samples to the column files."""
+        if count <= 0:
+            return
+        slot = self.spilled % self.capacity
+        first = min(count, self.capacity - slot)
+        for name, ring in self.arrays.items():
+            file = self.files[name]
+            ring[slot:slot + first].tofile(file)
+            ring[:count - first].tofile(file)
+            file.flush()
+
+        with self.lock:
+            self.spilled += count
+            self.length -= count
+        self.spill_count += 1
@@ -79,8 +79,8 @@ def test_simulation():
 
         data_received = []
 
-        def callback(t, ch0, ch1):
-            data_received.append((t, ch0, ch1))
+        def callback(block):
+            data_received.append(block)
 
         daq = MCCDataAcquisition(sample_rate=100, buffer_size=500)
         daq.set_data_callback(callback)